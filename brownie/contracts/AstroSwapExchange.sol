@@ -27,6 +27,15 @@ contract AstroSwapExchange {
     mapping (address => uint256) public investorShares;
     uint256 public totalShares;
 
+    // Time weighted price accumulators (like Uniswap V2): each price times the seconds it held, summed since the seed
+    // Prices are 112 bit fixed point: tokenPool / ethPool and ethPool / tokenPool, scaled by 2**112
+    // TWAP between two reads = (cumulative2 - cumulative1) / (timestamp2 - timestamp1) / 2**112, they wrap so subtract mod 2**256
+    // Pools are capped at uint112 (also like Uniswap V2) so pool << 112 can't lose its high bits
+    uint256 constant MAX_RESERVE = type(uint112).max;
+    uint256 public tokenPriceCumulative;
+    uint256 public ethPriceCumulative;
+    uint256 public priceTimestamp;
+
     event TokenPurchase(address indexed user, address indexed recipient, uint256 ethIn, uint256 tokensOut);
     event EthPurchase(address indexed user, address indexed recipient, uint256 tokensIn, uint256 ethOut);
     event TokenToTokenOut(address indexed user, address indexed recipient, address indexed tokenExchangeAddress, uint256 tokensIn, uint256 ethTransfer);
@@ -39,15 +48,52 @@ contract AstroSwapExchange {
         token = _token;
     }
 
+    // Replaces the constructor for clones made by the factory (a clone starts with empty storage)
+    function initialize(IERC20 _token, uint256 _fee) public {
+        require(address(factory) == address(0), "Already initialized");
+        factory = AstroSwapFactory(msg.sender);
+        feeAmmount = _fee;
+        token = _token;
+    }
+
     modifier hasLiquidity() {
         require(invariant > 0);
         _;
     }
 
+    // Called before the pools change, adds the old price for the time it held. Only the first change in a block writes
+    function updatePriceCumulatives() private {
+        uint256 elapsed = block.timestamp - priceTimestamp;
+        if (elapsed == 0) return;
+        if (ethPool > 0 && tokenPool > 0) {
+            unchecked {
+                tokenPriceCumulative += (tokenPool << 112) / ethPool * elapsed;
+                ethPriceCumulative += (ethPool << 112) / tokenPool * elapsed;
+            }
+        }
+        priceTimestamp = block.timestamp;
+    }
+
+    // The accumulators as they would be if updated now, so two calls are enough for a TWAP even with no trades in between
+    function currentPriceCumulatives() public view returns (uint256 tokenCumulative, uint256 ethCumulative, uint256 timestamp) {
+        tokenCumulative = tokenPriceCumulative;
+        ethCumulative = ethPriceCumulative;
+        uint256 elapsed = block.timestamp - priceTimestamp;
+        if (elapsed > 0 && ethPool > 0 && tokenPool > 0) {
+            unchecked {
+                tokenCumulative += (tokenPool << 112) / ethPool * elapsed;
+                ethCumulative += (ethPool << 112) / tokenPool * elapsed;
+            }
+        }
+        return (tokenCumulative, ethCumulative, block.timestamp);
+    }
+
     function seedInvest(uint256 tokenInvestment) public payable {
         require (totalShares == 0, "Liquidity pool is already seeded, use invest() instead");
         require (tokenInvestment > 0 && msg.value > 0, "Must invest ETH and tokens");
         token.transferFrom(msg.sender, address(this), tokenInvestment);
+        updatePriceCumulatives();
+        require(tokenInvestment <= MAX_RESERVE && msg.value <= MAX_RESERVE, "Pool overflow");
         tokenPool = tokenInvestment;
         ethPool = msg.value;
         invariant = ethPool * tokenPool;
@@ -63,8 +109,10 @@ contract AstroSwapExchange {
         require(maxTokensInvested >= tokenInvestment, "Max < required investment");
         require (token.transferFrom(msg.sender, address(this), tokenInvestment));
         uint256 sharesPurchased = (tokenInvestment * totalShares)/ tokenPool;
+        updatePriceCumulatives();
         ethPool += msg.value;
         tokenPool += tokenInvestment;
+        require(ethPool <= MAX_RESERVE && tokenPool <= MAX_RESERVE, "Pool overflow");
         invariant = ethPool * tokenPool;
         // Give the investor their shares
         investorShares[msg.sender] += sharesPurchased;
@@ -85,19 +133,26 @@ contract AstroSwapExchange {
         uint256 ethOut = (ethPool * shares) / totalShares;
         uint256 tokenOut = (tokenPool * shares) / totalShares;
         require(token.transfer(msg.sender, tokenOut));
-        payable(msg.sender).call{value:ethOut};
+        updatePriceCumulatives();
         ethPool -= ethOut;
         tokenPool -= tokenOut;
         invariant = ethPool * tokenPool;
         investorShares[msg.sender] -= shares;
         totalShares -= shares;
         emit Divestment(msg.sender, shares, ethOut, tokenOut);
+        (bool sent, ) = payable(msg.sender).call{value:ethOut}("");
+        require(sent, "Eth OUT transfer fail");
     }
 
     function getShares(address investor) public view returns (uint256 shareCount) {
         return investorShares[investor];
     }
 
+    // Everything a client needs to price trades and shares in one call, instead of five getters
+    function getPoolState() public view returns (uint256 _ethPool, uint256 _tokenPool, uint256 _invariant, uint256 _feeAmmount, uint256 _totalShares) {
+        return (ethPool, tokenPool, invariant, feeAmmount, totalShares);
+    }
+
     function getEthToTokenQuote(uint256 ethValue) public view returns (uint256 tokenQuote) {
         uint256 fee = ethValue / feeAmmount;
         uint256 mockPool = ethPool + ethValue;
@@ -118,7 +173,9 @@ contract AstroSwapExchange {
 
     function ethToTokenPrivate(uint256 value) private returns(uint256 tokenToPay){
         uint256 fee = value / feeAmmount;
+        updatePriceCumulatives();
         ethPool = ethPool + value;
+        require(ethPool <= MAX_RESERVE, "Pool overflow");
         uint256 tokensPaid = tokenPool - (invariant / (ethPool - fee) + 1); // k = x * y <==> y = k / x, we payout the difference
         // The +1 in the above line is to prevent a rouding error that causes the invariant to lower on transactions where the fee rounds down to 0
         require(tokensPaid <= tokenPool, "Lacking pool tokens"); // Make sure we have enough tokens to pay out
@@ -129,7 +186,9 @@ contract AstroSwapExchange {
 
     function tokenToEthPrivate(uint256 tokensIn) private returns(uint256 ethToPay){
         uint256 fee = tokensIn / feeAmmount;
+        updatePriceCumulatives();
         tokenPool = tokenPool + tokensIn;
+        require(tokenPool <= MAX_RESERVE, "Pool overflow");
         uint256 ethPaid = ethPool - (invariant / (tokenPool - fee) + 1); // k = x * y <==> x = k / y, we payout the difference
         // The +1 in the above line is to prevent a rouding error that causes the invariant to lower on transactions where the fee rounds down to 0
         require(ethPaid <= ethPool, "Lacking pool eth"); // Make sure we have enough eth to pay out
@@ -151,7 +210,8 @@ contract AstroSwapExchange {
         uint256 ethPaid = tokenToEthPrivate(tokensIn);
         require(ethPaid >= minEthOut, "ethPaid < minEthOut");
         emit EthPurchase(msg.sender, recipient, tokensIn, ethPaid);
-        payable(recipient).call{value:ethPaid};
+        (bool sent, ) = payable(recipient).call{value:ethPaid}("");
+        require(sent, "Eth OUT transfer fail");
         return ethPaid;
     }
 
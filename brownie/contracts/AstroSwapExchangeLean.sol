@@ -0,0 +1,184 @@
+// contracts/AstroSwapExchangeLean.sol
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "./AstroSwapFactory.sol";
+
+// Gas lean version of AstroSwapExchange with the same ABI and the same rounding
+// - Both pools are packed in one storage slot, a swap does one SLOAD and one SSTORE for the pools instead of three of each
+// - The invariant is not stored, it is allways ethPool * tokenPool (like MiniSwap)
+// - factory, token and feeAmmount never change so they are immutable and cost no storage reads
+contract AstroSwapExchangeLean {
+    AstroSwapFactory public immutable factory;
+    IERC20 public immutable token;
+    uint256 public immutable feeAmmount;
+
+    // uint128 is plenty for wei and token amounts and lets both pools share a slot
+    struct Reserves {
+        uint128 ethPool;
+        uint128 tokenPool;
+    }
+    Reserves private reserves;
+
+    mapping (address => uint256) public investorShares;
+    uint256 public totalShares;
+
+    event TokenPurchase(address indexed user, address indexed recipient, uint256 ethIn, uint256 tokensOut);
+    event EthPurchase(address indexed user, address indexed recipient, uint256 tokensIn, uint256 ethOut);
+    event TokenToTokenOut(address indexed user, address indexed recipient, address indexed tokenExchangeAddress, uint256 tokensIn, uint256 ethTransfer);
+    event Investment(address indexed user, uint256 indexed sharesPurchased, uint256 ethInvested, uint256 tokensInvested);
+    event Divestment(address indexed user, uint256 indexed sharesBurned, uint256 ethDivested, uint256 tokensDivested);
+
+    constructor(IERC20 _token, uint256 _fee) {
+        factory = AstroSwapFactory(msg.sender);
+        feeAmmount = _fee;
+        token = _token;
+    }
+
+    modifier hasLiquidity() {
+        Reserves memory pools = reserves;
+        require(uint256(pools.ethPool) * pools.tokenPool > 0);
+        _;
+    }
+
+    function ethPool() public view returns (uint256) {
+        return reserves.ethPool;
+    }
+
+    function tokenPool() public view returns (uint256) {
+        return reserves.tokenPool;
+    }
+
+    function invariant() public view returns (uint256) {
+        Reserves memory pools = reserves;
+        return uint256(pools.ethPool) * pools.tokenPool;
+    }
+
+    function setReserves(uint256 _ethPool, uint256 _tokenPool) private {
+        require(_ethPool <= type(uint128).max && _tokenPool <= type(uint128).max, "Pool overflow");
+        reserves = Reserves(uint128(_ethPool), uint128(_tokenPool));
+    }
+
+    function seedInvest(uint256 tokenInvestment) public payable {
+        require (totalShares == 0, "Liquidity pool is already seeded, use invest() instead");
+        require (tokenInvestment > 0 && msg.value > 0, "Must invest ETH and tokens");
+        token.transferFrom(msg.sender, address(this), tokenInvestment);
+        setReserves(msg.value, tokenInvestment);
+        // Give the starting investor 10000 shares
+        investorShares[msg.sender] = 10000;
+        totalShares = 10000;
+        emit Investment(msg.sender, 10000, msg.value, tokenInvestment);
+    }
+
+    function invest(uint256 maxTokensInvested) public payable{
+        Reserves memory pools = reserves;
+        // Amount of tokens to invest is bassed of of the current ratio of eth to token in the pools
+        uint256 tokenInvestment = (pools.tokenPool * msg.value / pools.ethPool);
+        require(maxTokensInvested >= tokenInvestment, "Max < required investment");
+        require (token.transferFrom(msg.sender, address(this), tokenInvestment));
+        uint256 shares = totalShares;
+        uint256 sharesPurchased = (tokenInvestment * shares)/ pools.tokenPool;
+        setReserves(pools.ethPool + msg.value, pools.tokenPool + tokenInvestment);
+        // Give the investor their shares
+        investorShares[msg.sender] += sharesPurchased;
+        totalShares = shares + sharesPurchased;
+        emit Investment(msg.sender, sharesPurchased, msg.value, tokenInvestment);
+    }
+
+    function investQuoteFromEth(uint256 ethPaid) public view returns (uint256 tokensRequired) {
+        Reserves memory pools = reserves;
+        return (pools.tokenPool * ethPaid / pools.ethPool);
+    }
+
+    function investQuoteFromTokens(uint256 tokensPaid) public view returns (uint256 ethRequired) {
+        Reserves memory pools = reserves;
+        return (pools.ethPool * tokensPaid / pools.tokenPool);
+    }
+
+    function divest(uint256 shares) public {
+        uint256 investorShare = investorShares[msg.sender];
+        require(investorShare >= shares, "Not enough shares to divest");
+        Reserves memory pools = reserves;
+        uint256 sharesTotal = totalShares;
+        uint256 ethOut = (pools.ethPool * shares) / sharesTotal;
+        uint256 tokenOut = (pools.tokenPool * shares) / sharesTotal;
+        require(token.transfer(msg.sender, tokenOut));
+        setReserves(pools.ethPool - ethOut, pools.tokenPool - tokenOut);
+        investorShares[msg.sender] = investorShare - shares;
+        totalShares = sharesTotal - shares;
+        emit Divestment(msg.sender, shares, ethOut, tokenOut);
+        (bool sent, ) = payable(msg.sender).call{value:ethOut}("");
+        require(sent, "Eth OUT transfer fail");
+    }
+
+    function getShares(address investor) public view returns (uint256 shareCount) {
+        return investorShares[investor];
+    }
+
+    function getEthToTokenQuote(uint256 ethValue) public view returns (uint256 tokenQuote) {
+        Reserves memory pools = reserves;
+        uint256 fee = ethValue / feeAmmount;
+        uint256 mockPool = pools.ethPool + ethValue;
+        return (pools.tokenPool - (uint256(pools.ethPool) * pools.tokenPool / (mockPool - fee) + 1));
+    }
+
+    function getTokenToEthQuote(uint256 tokenValue) public view returns (uint256 ethQuote) {
+        Reserves memory pools = reserves;
+        uint256 fee = tokenValue / feeAmmount;
+        uint256 mockPool = pools.tokenPool + tokenValue;
+        return (pools.ethPool - (uint256(pools.ethPool) * pools.tokenPool / (mockPool - fee) + 1));
+    }
+
+    function getTokenToTokenQuote(uint256 tokenValue, address tokenOutAddress) public view returns (uint256 tokenQuote) {
+        uint256 ethTransfer = getTokenToEthQuote(tokenValue);
+        AstroSwapExchange outExchange = AstroSwapExchange(factory.tokenToExchange(tokenOutAddress));
+        return outExchange.getEthToTokenQuote(ethTransfer);
+    }
+
+    function ethToTokenPrivate(uint256 value) private returns(uint256 tokenToPay){
+        Reserves memory pools = reserves;
+        uint256 fee = value / feeAmmount;
+        uint256 newEthPool = pools.ethPool + value;
+        uint256 tokensPaid = pools.tokenPool - (uint256(pools.ethPool) * pools.tokenPool / (newEthPool - fee) + 1); // k = x * y <==> y = k / x, we payout the difference
+        // The +1 in the above line is to prevent a rouding error that causes the invariant to lower on transactions where the fee rounds down to 0
+        setReserves(newEthPool, pools.tokenPool - tokensPaid);
+        return tokensPaid;
+    }
+
+    function tokenToEthPrivate(uint256 tokensIn) private returns(uint256 ethToPay){
+        Reserves memory pools = reserves;
+        uint256 fee = tokensIn / feeAmmount;
+        uint256 newTokenPool = pools.tokenPool + tokensIn;
+        uint256 ethPaid = pools.ethPool - (uint256(pools.ethPool) * pools.tokenPool / (newTokenPool - fee) + 1); // k = x * y <==> x = k / y, we payout the difference
+        // The +1 in the above line is to prevent a rouding error that causes the invariant to lower on transactions where the fee rounds down to 0
+        setReserves(pools.ethPool - ethPaid, newTokenPool);
+        return ethPaid;
+    }
+
+    function ethToToken(address recipient, uint256 minTokensOut) public payable hasLiquidity returns(uint256 tokensPaid){
+        tokensPaid = ethToTokenPrivate(msg.value);
+        require(tokensPaid >= minTokensOut, "tknsPaid < minTknsOut");
+        emit TokenPurchase(msg.sender, recipient, msg.value, tokensPaid);
+        require(token.transfer(recipient, tokensPaid), "Tkn OUT transfer fail");
+    }
+
+    function tokenToEth(address recipient, uint256 tokensIn, uint256 minEthOut) public hasLiquidity returns(uint256 ethPaid){
+        require(token.transferFrom(msg.sender, address(this), tokensIn), "Tkn IN transfer fail");
+        ethPaid = tokenToEthPrivate(tokensIn);
+        require(ethPaid >= minEthOut, "ethPaid < minEthOut");
+        emit EthPurchase(msg.sender, recipient, tokensIn, ethPaid);
+        (bool sent, ) = payable(recipient).call{value:ethPaid}("");
+        require(sent, "Eth OUT transfer fail");
+    }
+
+    function tokenToToken(address recipient, address tokenOutAddress, uint256 tokensIn, uint256 minTokensOut) public hasLiquidity{
+        require(token.transferFrom(msg.sender, address(this), tokensIn), "Tkn IN transfer fail");
+        uint256 ethTransfer = tokenToEthPrivate(tokensIn);
+        require(ethTransfer > 0, "Eth out is too small");
+        address tokenExchangeAddress = factory.tokenToExchange(tokenOutAddress);
+        uint256 tokensOut = AstroSwapExchange(tokenExchangeAddress).ethToToken{value: ethTransfer}(recipient, minTokensOut); // Call the outcontract with the value
+        require(tokensOut >= minTokensOut, "Output less than minTokensOut");
+        emit TokenToTokenOut(msg.sender, recipient, tokenExchangeAddress, tokensIn, ethTransfer);
+    }
+}
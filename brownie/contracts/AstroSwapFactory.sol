@@ -4,18 +4,39 @@ pragma solidity ^0.8.0;
 
 import "./AstroSwapExchange.sol";
 import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/proxy/Clones.sol";
 
 // Almost directly taken from https://github.com/Uniswap/old-solidity-contracts/blob/master/contracts/Exchange/UniswapFactory.sol
 contract AstroSwapFactory {
     uint256 public feeRate;
-    uint256 public exchangeCount;
+    // Every exchange is a minimal proxy (EIP-1167) of this one, way cheaper to deploy than a full exchange
+    address public exchangeImplementation;
     mapping(address => address) public tokenToExchange;
     mapping(address => address) public exchangeToToken;
+    // Every exchange in the order they were added, so clients can list them without scanning the logs
+    address[] public exchangeList;
 
     event TokenExchangeAdded(address indexed tokenExchange, address indexed tokenAddress);
 
     constructor(uint256 _fee) {
         feeRate = _fee;
+        exchangeImplementation = address(new AstroSwapExchange(IERC20(address(0)), _fee));
+    }
+
+    function exchangeCount() public view returns (uint256) {
+        return exchangeList.length;
+    }
+
+    // Up to limit exchanges (and their tokens) starting at offset, an offset past the end returns empty lists
+    function getExchanges(uint256 offset, uint256 limit) public view returns (address[] memory exchanges, address[] memory tokens) {
+        uint256 count = offset < exchangeList.length ? exchangeList.length - offset : 0;
+        if (count > limit) count = limit;
+        exchanges = new address[](count);
+        tokens = new address[](count);
+        for (uint256 i = 0; i < count; i++) {
+            exchanges[i] = exchangeList[offset + i];
+            tokens[i] = exchangeToToken[exchanges[i]];
+        }
     }
 
     function convertTokenToExchange(address token) public view returns (address exchange) {
@@ -29,8 +50,25 @@ contract AstroSwapFactory {
     function addTokenExchange(address tokenAddress) public {
         require(tokenToExchange[tokenAddress] == address(0), "Allready added");
         require(tokenAddress != address(0));
-        AstroSwapExchange exchange = new AstroSwapExchange(IERC20(tokenAddress), feeRate);
-        exchangeCount++;
+        createExchange(tokenAddress);
+    }
+
+    // Creates exchanges for a whole list of tokens in one transaction
+    // Tokens that allready have an exchange (or are listed twice) and the 0x0 address are skipped instead of reverting
+    function addTokenExchanges(address[] calldata tokenAddresses) public returns (uint256 added) {
+        for (uint256 i = 0; i < tokenAddresses.length; i++) {
+            if (tokenAddresses[i] == address(0) || tokenToExchange[tokenAddresses[i]] != address(0)) {
+                continue;
+            }
+            createExchange(tokenAddresses[i]);
+            added++;
+        }
+    }
+
+    function createExchange(address tokenAddress) private {
+        AstroSwapExchange exchange = AstroSwapExchange(Clones.clone(exchangeImplementation));
+        exchange.initialize(IERC20(tokenAddress), feeRate);
+        exchangeList.push(address(exchange));
         tokenToExchange[tokenAddress] = address(exchange);
         exchangeToToken[address(exchange)] = tokenAddress;
         emit TokenExchangeAdded(address(exchange), tokenAddress);
@@ -0,0 +1,37 @@
+// contracts/AstroSwapMulticall.sol
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+// Runs a list of view calls in one eth_call so a client can read many exchanges in one round trip
+// Works with any contract, calldata is encoded client side (see scripts/multicall.py)
+contract AstroSwapMulticall {
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    // Reverts if any call fails, use tryAggregate when some targets might not answer (ex: unseeded pools)
+    function aggregate(Call[] calldata calls) public view returns (uint256 blockNumber, bytes[] memory returnData) {
+        blockNumber = block.number;
+        returnData = new bytes[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            (bool success, bytes memory data) = calls[i].target.staticcall(calls[i].callData);
+            require(success, "Call failed");
+            returnData[i] = data;
+        }
+    }
+
+    function tryAggregate(Call[] calldata calls) public view returns (uint256 blockNumber, Result[] memory results) {
+        blockNumber = block.number;
+        results = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            (bool success, bytes memory data) = calls[i].target.staticcall(calls[i].callData);
+            results[i] = Result(success, data);
+        }
+    }
+}
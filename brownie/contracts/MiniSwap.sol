@@ -21,6 +21,32 @@ contract MiniSwap {
     } 
 
     mapping (address => Exchange) public exchanges; // Mapping of token addresses to exchanges
+
+    // Time weighted price accumulators per token, same as AstroSwapExchange's
+    // Kept out of Exchange so the exchanges getter keeps returning (token, ethPool, tokenPool, totalShares)
+    struct PriceCumulatives {
+        uint256 tokenPriceCumulative; // tokenPool / ethPool * 2**112 times seconds
+        uint256 ethPriceCumulative; // ethPool / tokenPool * 2**112 times seconds
+        uint256 timestamp;
+    }
+
+    mapping (address => PriceCumulatives) public priceCumulatives; // Mapping of token addresses to their accumulators
+
+    // Pools are capped at uint112 like AstroSwapExchange's so pool << 112 can't lose its high bits
+    uint256 constant MAX_RESERVE = type(uint112).max;
+
+    // Kinds of swap for multiSwap
+    uint8 constant ETH_TO_TOKEN = 0;
+    uint8 constant TOKEN_TO_ETH = 1;
+    uint8 constant TOKEN_TO_TOKEN = 2;
+
+    struct SwapInstruction {
+        uint8 kind;
+        address tokenIn; // Ignored for ETH_TO_TOKEN
+        address tokenOut; // Ignored for TOKEN_TO_ETH
+        uint256 amountIn;
+        uint256 minOut;
+    }
     
     event TokenPurchase(address indexed exchange, address indexed user, address indexed recipient, uint256 ethIn, uint256 tokensOut);
     event EthPurchase(address indexed exchange, address indexed user, address indexed recipient, uint256 tokensIn, uint256 ethOut);
@@ -37,10 +63,51 @@ contract MiniSwap {
         _;
     }
 
+    // Called before a pool changes, adds the old price for the time it held. Only the first change in a block writes
+    function updatePriceCumulatives(address tokenAddress) private {
+        PriceCumulatives storage cumulatives = priceCumulatives[tokenAddress];
+        uint256 elapsed = block.timestamp - cumulatives.timestamp;
+        if (elapsed == 0) return;
+        uint256 ethPool = exchanges[tokenAddress].ethPool;
+        uint256 tokenPool = exchanges[tokenAddress].tokenPool;
+        if (ethPool > 0 && tokenPool > 0) {
+            unchecked {
+                cumulatives.tokenPriceCumulative += (tokenPool << 112) / ethPool * elapsed;
+                cumulatives.ethPriceCumulative += (ethPool << 112) / tokenPool * elapsed;
+            }
+        }
+        cumulatives.timestamp = block.timestamp;
+    }
+
+    // The accumulators as they would be if updated now, so two calls are enough for a TWAP even with no trades in between
+    function currentPriceCumulatives(address tokenAddress) public view returns (uint256 tokenCumulative, uint256 ethCumulative, uint256 timestamp) {
+        PriceCumulatives storage cumulatives = priceCumulatives[tokenAddress];
+        tokenCumulative = cumulatives.tokenPriceCumulative;
+        ethCumulative = cumulatives.ethPriceCumulative;
+        uint256 elapsed = block.timestamp - cumulatives.timestamp;
+        uint256 ethPool = exchanges[tokenAddress].ethPool;
+        uint256 tokenPool = exchanges[tokenAddress].tokenPool;
+        if (elapsed > 0 && ethPool > 0 && tokenPool > 0) {
+            unchecked {
+                tokenCumulative += (tokenPool << 112) / ethPool * elapsed;
+                ethCumulative += (ethPool << 112) / tokenPool * elapsed;
+            }
+        }
+        return (tokenCumulative, ethCumulative, block.timestamp);
+    }
+
     function seedInvest(address tokenAddress, uint256 tokenInvestment) public payable {
         require (exchanges[tokenAddress].totalShares == 0, "Liquidity pool is already seeded, use invest() instead");
         require (tokenInvestment > 0 && msg.value > 0, "Must invest ETH and tokens");
+        require (tokenAddress != address(0));
+        if (address(exchanges[tokenAddress].token) == address(0)) {
+            // First time this token is seeded, create its exchange
+            exchanges[tokenAddress].token = IERC20(tokenAddress);
+            exchangeCount++;
+        }
         exchanges[tokenAddress].token.transferFrom(msg.sender, address(this), tokenInvestment);
+        updatePriceCumulatives(tokenAddress);
+        require(tokenInvestment <= MAX_RESERVE && msg.value <= MAX_RESERVE, "Pool overflow");
         exchanges[tokenAddress].tokenPool = tokenInvestment;
         exchanges[tokenAddress].ethPool = msg.value;
         // Give the starting investor 10000 shares
@@ -55,8 +122,10 @@ contract MiniSwap {
         require(maxTokensInvested >= tokenInvestment, "Max < required investment");
         require (exchanges[tokenAddress].token.transferFrom(msg.sender, address(this), tokenInvestment));
         uint256 sharesPurchased = (tokenInvestment * exchanges[tokenAddress].totalShares)/ exchanges[tokenAddress].tokenPool;
+        updatePriceCumulatives(tokenAddress);
         exchanges[tokenAddress].ethPool += msg.value;
         exchanges[tokenAddress].tokenPool += tokenInvestment;
+        require(exchanges[tokenAddress].ethPool <= MAX_RESERVE && exchanges[tokenAddress].tokenPool <= MAX_RESERVE, "Pool overflow");
         // Give the investor their shares
         exchanges[tokenAddress].investorShares[msg.sender] += sharesPurchased;
         exchanges[tokenAddress].totalShares += sharesPurchased;
@@ -76,18 +145,26 @@ contract MiniSwap {
         uint256 ethOut = (exchanges[tokenAddress].ethPool * shares) / exchanges[tokenAddress].totalShares;
         uint256 tokenOut = (exchanges[tokenAddress].tokenPool * shares) / exchanges[tokenAddress].totalShares;
         require(exchanges[tokenAddress].token.transfer(msg.sender, tokenOut));
-        payable(msg.sender).call{value:ethOut};
+        updatePriceCumulatives(tokenAddress);
         exchanges[tokenAddress].ethPool -= ethOut;
         exchanges[tokenAddress].tokenPool -= tokenOut;
         exchanges[tokenAddress].investorShares[msg.sender] -= shares;
         exchanges[tokenAddress].totalShares -= shares;
         emit Divestment(tokenAddress, msg.sender, shares, ethOut, tokenOut);
+        (bool sent, ) = payable(msg.sender).call{value:ethOut}("");
+        require(sent, "Eth OUT transfer fail");
     }
 
     function getShares(address tokenAddress, address investor) public view returns (uint256 shareCount) {
         return exchanges[tokenAddress].investorShares[investor];
     }
 
+    // Same as AstroSwapExchange.getPoolState for one token, the invariant is computed like everywhere else here
+    function getPoolState(address tokenAddress) public view returns (uint256 ethPool, uint256 tokenPool, uint256 invariant, uint256 fee, uint256 totalShares) {
+        Exchange storage exchange = exchanges[tokenAddress];
+        return (exchange.ethPool, exchange.tokenPool, exchange.ethPool * exchange.tokenPool, feeRate, exchange.totalShares);
+    }
+
     function getEthToTokenQuote(address tokenAddress, uint256 ethValue) public view returns (uint256 tokenQuote) {
         uint256 fee = ethValue / feeRate;
         uint256 mockPool = exchanges[tokenAddress].ethPool + ethValue;
@@ -104,8 +181,10 @@ contract MiniSwap {
     
     function ethToTokenPrivate(address tokenAddress, uint256 value) private returns(uint256 tokenToPay){
         uint256 fee = value / feeRate;
+        uint256 invariant = exchanges[tokenAddress].ethPool * exchanges[tokenAddress].tokenPool; // Before the pool grows, like getEthToTokenQuote
+        updatePriceCumulatives(tokenAddress);
         exchanges[tokenAddress].ethPool += value;
-        uint256 invariant = exchanges[tokenAddress].ethPool * exchanges[tokenAddress].tokenPool;
+        require(exchanges[tokenAddress].ethPool <= MAX_RESERVE, "Pool overflow");
         uint256 tokensPaid = exchanges[tokenAddress].tokenPool - (invariant / (exchanges[tokenAddress].ethPool - fee) + 1); // k = x * y <==> y = k / x, we payout the difference
         // The +1 in the above line is to prevent a rouding error that causes the invariant to lower on transactions where the fee rounds down to 0
         require(tokensPaid <= exchanges[tokenAddress].tokenPool, "Lacking pool tokens"); // Make sure we have enough tokens to pay out
@@ -115,8 +194,10 @@ contract MiniSwap {
 
     function tokenToEthPrivate(address tokenAddress, uint256 tokensIn) private returns(uint256 ethToPay){
         uint256 fee = tokensIn / feeRate;
+        uint256 invariant = exchanges[tokenAddress].ethPool * exchanges[tokenAddress].tokenPool; // Before the pool grows, like getTokenToEthQuote
+        updatePriceCumulatives(tokenAddress);
         exchanges[tokenAddress].tokenPool += tokensIn;
-        uint256 invariant = exchanges[tokenAddress].ethPool * exchanges[tokenAddress].tokenPool;
+        require(exchanges[tokenAddress].tokenPool <= MAX_RESERVE, "Pool overflow");
         uint256 ethPaid = exchanges[tokenAddress].ethPool - (invariant / (exchanges[tokenAddress].tokenPool - fee) + 1); // k = x * y <==> x = k / y, we payout the difference
         // The +1 in the above line is to prevent a rouding error that causes the invariant to lower on transactions where the fee rounds down to 0
         require(ethPaid <= exchanges[tokenAddress].ethPool, "Lacking pool eth"); // Make sure we have enough eth to pay out
@@ -137,7 +218,8 @@ contract MiniSwap {
         uint256 ethPaid = tokenToEthPrivate(tokenAddress, tokensIn);
         require(ethPaid >= minEthOut, "ethPaid < minEthOut");
         emit EthPurchase(tokenAddress, msg.sender, recipient, tokensIn, ethPaid);
-        payable(recipient).call{value:ethPaid};
+        (bool sent, ) = payable(recipient).call{value:ethPaid}("");
+        require(sent, "Eth OUT transfer fail");
         return ethPaid;
     }
 
@@ -151,4 +233,92 @@ contract MiniSwap {
         emit TokenToToken(tokenFromAddress, msg.sender, recipient, tokenToAddress, tokensIn, ethTransfer);
         return tokensOut;
     }
+
+    // Runs many swaps in one transaction, every leg moves the pools and emits its usual event but tokens and ETH only move once at the end
+    // Tokens are netted per token: what the legs take in is pulled from the sender once and what they pay out is sent to the recipient once
+    // ETH paid out by earlier legs is spent by later ones before msg.value. What is left of it goes to the recipient,
+    // what is left of msg.value is refunded to the sender
+    function multiSwap(SwapInstruction[] calldata swaps, address recipient) public payable returns (uint256[] memory amountsOut) {
+        amountsOut = new uint256[](swaps.length);
+        address[] memory tokens = new address[](swaps.length * 2);
+        int256[] memory deltas = new int256[](swaps.length * 2); // > 0 owed to the recipient, < 0 owed by the sender
+        uint256 tokenCount = 0;
+        uint256 ethPaid = msg.value; // The sender's, refunded if not spent
+        uint256 ethEarned = 0; // Paid out by the legs, owed to the recipient
+        for (uint256 i = 0; i < swaps.length; i++) {
+            SwapInstruction calldata swap = swaps[i];
+            if (swap.kind == ETH_TO_TOKEN) {
+                require(ethEarned + ethPaid >= swap.amountIn, "Not enough ETH for leg");
+                if (swap.amountIn <= ethEarned) {
+                    ethEarned -= swap.amountIn;
+                } else {
+                    ethPaid -= swap.amountIn - ethEarned;
+                    ethEarned = 0;
+                }
+                amountsOut[i] = multiSwapEthToToken(swap, recipient);
+                tokenCount = addDelta(tokens, deltas, tokenCount, swap.tokenOut, int256(amountsOut[i]));
+            } else if (swap.kind == TOKEN_TO_ETH) {
+                amountsOut[i] = multiSwapTokenToEth(swap, recipient);
+                ethEarned += amountsOut[i];
+                tokenCount = addDelta(tokens, deltas, tokenCount, swap.tokenIn, -int256(swap.amountIn));
+            } else if (swap.kind == TOKEN_TO_TOKEN) {
+                amountsOut[i] = multiSwapTokenToToken(swap, recipient);
+                tokenCount = addDelta(tokens, deltas, tokenCount, swap.tokenIn, -int256(swap.amountIn));
+                tokenCount = addDelta(tokens, deltas, tokenCount, swap.tokenOut, int256(amountsOut[i]));
+            } else {
+                revert("Unknown swap kind");
+            }
+        }
+        // Settle, pulls first
+        for (uint256 i = 0; i < tokenCount; i++) {
+            if (deltas[i] < 0) {
+                require(exchanges[tokens[i]].token.transferFrom(msg.sender, address(this), uint256(-deltas[i])), "Tkn IN transfer fail");
+            }
+        }
+        for (uint256 i = 0; i < tokenCount; i++) {
+            if (deltas[i] > 0) {
+                require(exchanges[tokens[i]].token.transfer(recipient, uint256(deltas[i])), "Tkn OUT transfer fail");
+            }
+        }
+        if (ethEarned > 0) {
+            (bool sent, ) = payable(recipient).call{value:ethEarned}("");
+            require(sent, "Eth OUT transfer fail");
+        }
+        if (ethPaid > 0) {
+            (bool refunded, ) = payable(msg.sender).call{value:ethPaid}("");
+            require(refunded, "Eth refund fail");
+        }
+    }
+
+    function addDelta(address[] memory tokens, int256[] memory deltas, uint256 tokenCount, address token, int256 delta) private pure returns (uint256 newTokenCount) {
+        for (uint256 i = 0; i < tokenCount; i++) {
+            if (tokens[i] == token) {
+                deltas[i] += delta;
+                return tokenCount;
+            }
+        }
+        tokens[tokenCount] = token;
+        deltas[tokenCount] = delta;
+        return tokenCount + 1;
+    }
+
+    function multiSwapEthToToken(SwapInstruction calldata swap, address recipient) private hasLiquidity(swap.tokenOut) returns (uint256 tokensPaid) {
+        tokensPaid = ethToTokenPrivate(swap.tokenOut, swap.amountIn);
+        require(tokensPaid >= swap.minOut, "tknsPaid < minTknsOut");
+        emit TokenPurchase(swap.tokenOut, msg.sender, recipient, swap.amountIn, tokensPaid);
+    }
+
+    function multiSwapTokenToEth(SwapInstruction calldata swap, address recipient) private hasLiquidity(swap.tokenIn) returns (uint256 ethPaid) {
+        ethPaid = tokenToEthPrivate(swap.tokenIn, swap.amountIn);
+        require(ethPaid >= swap.minOut, "ethPaid < minEthOut");
+        emit EthPurchase(swap.tokenIn, msg.sender, recipient, swap.amountIn, ethPaid);
+    }
+
+    function multiSwapTokenToToken(SwapInstruction calldata swap, address recipient) private hasLiquidity(swap.tokenIn) hasLiquidity(swap.tokenOut) returns (uint256 tokensOut) {
+        uint256 ethTransfer = tokenToEthPrivate(swap.tokenIn, swap.amountIn);
+        require(ethTransfer > 0, "Not enough tokens in paid in");
+        tokensOut = ethToTokenPrivate(swap.tokenOut, ethTransfer);
+        require(tokensOut >= swap.minOut, "Output less than minTokensOut");
+        emit TokenToToken(swap.tokenIn, msg.sender, recipient, swap.tokenOut, swap.amountIn, ethTransfer);
+    }
 }
\ No newline at end of file
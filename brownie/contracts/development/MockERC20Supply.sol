@@ -0,0 +1,12 @@
+// contracts/MockERC20Supply.sol
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+
+// Like MockERC20 but with a chosen supply, for pools bigger than MockERC20 can fill
+contract MockERC20Supply is ERC20 {
+    constructor(string memory name, uint256 supply) ERC20(name, name) {
+        _mint(msg.sender, supply);
+    }
+}
@@ -0,0 +1,30 @@
+// contracts/MockLeanFactory.sol
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import "../AstroSwapExchangeLean.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+
+// Same as AstroSwapFactory but spawns AstroSwapExchangeLean, used to measure the lean exchange (tokenToToken needs a factory)
+contract MockLeanFactory {
+    uint256 public feeRate;
+    uint256 public exchangeCount;
+    mapping(address => address) public tokenToExchange;
+    mapping(address => address) public exchangeToToken;
+
+    event TokenExchangeAdded(address indexed tokenExchange, address indexed tokenAddress);
+
+    constructor(uint256 _fee) {
+        feeRate = _fee;
+    }
+
+    function addTokenExchange(address tokenAddress) public {
+        require(tokenToExchange[tokenAddress] == address(0), "Allready added");
+        require(tokenAddress != address(0));
+        AstroSwapExchangeLean exchange = new AstroSwapExchangeLean(IERC20(tokenAddress), feeRate);
+        exchangeCount++;
+        tokenToExchange[tokenAddress] = address(exchange);
+        exchangeToToken[address(exchange)] = tokenAddress;
+        emit TokenExchangeAdded(address(exchange), tokenAddress);
+    }
+}
@@ -0,0 +1,162 @@
+# Exact integer models of the AstroSwap pricing math
+# Mirrors the uint256 arithmetic of AstroSwapExchange.ethToTokenPrivate/tokenToEthPrivate (and the MiniSwap quote functions)
+# so trades can be priced locally without a getEthToTokenQuote round trip per trade.
+
+UINT256_MAX = 2**256 - 1
+MAX_RESERVE = 2**112 - 1 # The contracts cap both pools at uint112 so the price accumulators can't overflow
+
+class SwapReverted(Exception):
+    pass
+
+def swap_output(fromPool, toPool, amount, fee):
+    # Same steps as the contract: floor the fee, grow the in pool, payout the difference to the invariant (+1 rounding)
+    if fromPool * toPool == 0:
+        raise SwapReverted("No liquidity")
+    if fee == 0:
+        raise SwapReverted("Division by zero")
+    newFromPool = fromPool + amount
+    if newFromPool > MAX_RESERVE:
+        raise SwapReverted("Pool overflow")
+    kept = fromPool * toPool // (newFromPool - amount // fee) + 1
+    if kept > toPool:
+        raise SwapReverted("Underflow") # The contract underflows on trades too small to move the pool
+    return toPool - kept
+
+def eth_to_token(ethPool, tokenPool, ethIn, fee, minTokensOut=0):
+    # Returns (tokensOut, newEthPool, newTokenPool) like ethToToken would leave the exchange
+    tokensOut = swap_output(ethPool, tokenPool, ethIn, fee)
+    if tokensOut < minTokensOut:
+        raise SwapReverted("tknsPaid < minTknsOut")
+    return tokensOut, ethPool + ethIn, tokenPool - tokensOut
+
+def token_to_eth(ethPool, tokenPool, tokensIn, fee, minEthOut=0):
+    # Returns (ethOut, newEthPool, newTokenPool) like tokenToEth would leave the exchange
+    ethOut = swap_output(tokenPool, ethPool, tokensIn, fee)
+    if ethOut < minEthOut:
+        raise SwapReverted("ethPaid < minEthOut")
+    return ethOut, ethPool - ethOut, tokenPool + tokensIn
+
+def token_to_token(fromPools, toPools, tokensIn, fromFee, toFee, minTokensOut=0):
+    # fromPools and toPools are (ethPool, tokenPool) tuples, returns (tokensOut, newFromPools, newToPools)
+    ethTransfer, fromEth, fromTokens = token_to_eth(fromPools[0], fromPools[1], tokensIn, fromFee)
+    if ethTransfer == 0:
+        raise SwapReverted("Eth out is too small")
+    tokensOut, toEth, toTokens = eth_to_token(toPools[0], toPools[1], ethTransfer, toFee, minTokensOut)
+    return tokensOut, (fromEth, fromTokens), (toEth, toTokens)
+
+def _broadcast(values, count):
+    if isinstance(values, (list, tuple)):
+        if len(values) != count:
+            raise ValueError("Expected " + str(count) + " values, got " + str(len(values)))
+        return values
+    return [values] * count
+
+def _simulate(fromPools, toPools, amounts, fee, minOuts):
+    # Every trade is priced independently against its own pool, reverted trades come back as None and keep their pools
+    count = max(len(x) if isinstance(x, (list, tuple)) else 1 for x in (fromPools, toPools, amounts, fee, minOuts))
+    fromPools = _broadcast(fromPools, count)
+    toPools = _broadcast(toPools, count)
+    amounts = _broadcast(amounts, count)
+    fees = _broadcast(fee, count)
+    minOuts = _broadcast(minOuts, count)
+    outputs = []
+    newFromPools = []
+    newToPools = []
+    for fromPool, toPool, amount, fee, minOut in zip(fromPools, toPools, amounts, fees, minOuts):
+        # Inlined copy of swap_output, this loop is the hot path
+        paid = None
+        if fromPool * toPool != 0 and fee != 0 and fromPool + amount <= MAX_RESERVE:
+            kept = fromPool * toPool // (fromPool + amount - amount // fee) + 1
+            if kept <= toPool and toPool - kept >= minOut:
+                paid = toPool - kept
+        outputs.append(paid)
+        if paid is None:
+            newFromPools.append(fromPool)
+            newToPools.append(toPool)
+        else:
+            newFromPools.append(fromPool + amount)
+            newToPools.append(toPool - paid)
+    return outputs, newFromPools, newToPools
+
+def simulate_eth_to_token(ethPools, tokenPools, ethIns, fee, minTokensOut=0):
+    # Any argument can be a list or a single value shared by every trade
+    # Returns (tokensOut, newEthPools, newTokenPools) lists
+    return _simulate(ethPools, tokenPools, ethIns, fee, minTokensOut)
+
+def simulate_token_to_eth(ethPools, tokenPools, tokensIns, fee, minEthOut=0):
+    # Returns (ethOut, newEthPools, newTokenPools) lists
+    ethOuts, newTokenPools, newEthPools = _simulate(tokenPools, ethPools, tokensIns, fee, minEthOut)
+    return ethOuts, newEthPools, newTokenPools
+
+class Pool:
+    # Exact model of one exchange (or one MiniSwap token) including its shares
+    # investorShares is only tracked when given, a mirror built from a snapshot doesn't know the individual investors
+    def __init__(self, fee, ethPool = 0, tokenPool = 0, totalShares = 0, investorShares = None):
+        self.fee = fee
+        self.ethPool = ethPool
+        self.tokenPool = tokenPool
+        self.totalShares = totalShares
+        self.investorShares = investorShares
+
+    @property
+    def invariant(self):
+        return self.ethPool * self.tokenPool
+
+    def _add_shares(self, investor, shares):
+        if self.investorShares is not None:
+            self.investorShares[investor] = self.investorShares.get(investor, 0) + shares
+
+    def seed_invest(self, investor, ethIn, tokensIn):
+        if self.totalShares != 0:
+            raise SwapReverted("Liquidity pool is already seeded, use invest() instead")
+        if ethIn == 0 or tokensIn == 0:
+            raise SwapReverted("Must invest ETH and tokens")
+        if ethIn > MAX_RESERVE or tokensIn > MAX_RESERVE:
+            raise SwapReverted("Pool overflow")
+        self.ethPool = ethIn
+        self.tokenPool = tokensIn
+        if self.investorShares is not None:
+            self.investorShares[investor] = 10000
+        self.totalShares = 10000
+        return 10000
+
+    def invest(self, investor, ethIn, maxTokensInvested = UINT256_MAX):
+        # Returns (tokensInvested, sharesPurchased)
+        if self.ethPool == 0 or self.tokenPool == 0:
+            raise SwapReverted("Division by zero")
+        tokenInvestment = self.tokenPool * ethIn // self.ethPool
+        if tokenInvestment > maxTokensInvested:
+            raise SwapReverted("Max < required investment")
+        sharesPurchased = tokenInvestment * self.totalShares // self.tokenPool
+        if self.ethPool + ethIn > MAX_RESERVE or self.tokenPool + tokenInvestment > MAX_RESERVE:
+            raise SwapReverted("Pool overflow")
+        self.ethPool += ethIn
+        self.tokenPool += tokenInvestment
+        self._add_shares(investor, sharesPurchased)
+        self.totalShares += sharesPurchased
+        return tokenInvestment, sharesPurchased
+
+    def divest(self, investor, shares):
+        # Returns (ethOut, tokensOut)
+        if self.investorShares is not None and self.investorShares.get(investor, 0) < shares:
+            raise SwapReverted("Not enough shares to divest")
+        if self.totalShares == 0:
+            raise SwapReverted("Division by zero")
+        ethOut = self.ethPool * shares // self.totalShares
+        tokenOut = self.tokenPool * shares // self.totalShares
+        self.ethPool -= ethOut
+        self.tokenPool -= tokenOut
+        self._add_shares(investor, -shares)
+        self.totalShares -= shares
+        return ethOut, tokenOut
+
+    def eth_to_token(self, ethIn, minTokensOut = 0):
+        tokensOut, self.ethPool, self.tokenPool = eth_to_token(self.ethPool, self.tokenPool, ethIn, self.fee, minTokensOut)
+        return tokensOut
+
+    def token_to_eth(self, tokensIn, minEthOut = 0):
+        ethOut, self.ethPool, self.tokenPool = token_to_eth(self.ethPool, self.tokenPool, tokensIn, self.fee, minEthOut)
+        return ethOut
+
+    def copy(self):
+        return Pool(self.fee, self.ethPool, self.tokenPool, self.totalShares, None if self.investorShares is None else dict(self.investorShares))
@@ -0,0 +1,42 @@
+from scripts.arbitrage import find_opportunities
+from scripts.pool_mirror import PoolMirror
+from scripts.indexer import Indexer
+from brownie import AstroSwapFactory, MiniSwap, MockERC20
+import time
+
+# Keeps every pool in memory through a PoolMirror and scans all same token pool pairs each time a block lands
+
+def pools_by_token(mirror):
+    grouped = {}
+    for key, pool in mirror.pools.items():
+        token = key[1] if isinstance(key, tuple) else mirror.indexer.exchanges.get(key)
+        if token != None:
+            grouped.setdefault(token, {})[key] = pool
+    return grouped
+
+def scan(mirror, minProfit = 1):
+    start = time.perf_counter()
+    opportunities = find_opportunities(pools_by_token(mirror), minProfit)
+    elapsed = (time.perf_counter() - start) * 1000
+    return opportunities, elapsed
+
+def watch(mirror, minProfit = 1, pollInterval = 1, callback = None):
+    # Blocks forever, calls callback(block, opportunities) whenever a new block has opportunities
+    block = None
+    while True:
+        newBlock = mirror.update()
+        if newBlock != block:
+            block = newBlock
+            opportunities, elapsed = scan(mirror, minProfit)
+            if opportunities:
+                if callback != None:
+                    callback(block, opportunities)
+                else:
+                    print("Block", block, "found", len(opportunities), "opportunities in", round(elapsed, 2), "ms. Best:", opportunities[0])
+        time.sleep(pollInterval)
+
+def main():
+    indexer = Indexer(AstroSwapFactory[-1].address, [miniSwap.address for miniSwap in MiniSwap])
+    mirror = PoolMirror(indexer, [token.address for token in MockERC20])
+    mirror.load()
+    watch(mirror)
@@ -0,0 +1,62 @@
+from scripts.amm import swap_output, SwapReverted
+from math import sqrt
+
+# Round trip ETH -> token -> ETH between two pools of the same token (ex: a factory exchange and a MiniSwap pool)
+# Buying x ETH of tokens in pool A and selling them in pool B pays f(x) = N*x / (D + c*x) with
+#   N = gA*gB*TA*EB, D = EA*TB, c = gA*(TB + gB*TA) and g = 1 - 1/fee
+# so the trade is profitable only when N > D, and the best size is x* = (sqrt(N*D) - D) / c.
+# The float screen is cheap enough to run on every pool pair each block, survivors are checked with the exact math.
+
+def _gain(fee):
+    return 1 - 1 / fee
+
+def round_trip(buyPool, sellPool, ethIn):
+    # Exact ETH back from buying with ethIn in buyPool and selling everything in sellPool, None if a leg reverts
+    try:
+        tokens = swap_output(buyPool.ethPool, buyPool.tokenPool, ethIn, buyPool.fee)
+        return swap_output(sellPool.tokenPool, sellPool.ethPool, tokens, sellPool.fee)
+    except SwapReverted:
+        return None
+
+def optimal_size(buyPool, sellPool):
+    # Closed form best ETH input, 0 when the prices are within the fees
+    if buyPool.ethPool * buyPool.tokenPool == 0 or sellPool.ethPool * sellPool.tokenPool == 0 or buyPool.fee <= 1 or sellPool.fee <= 1:
+        return 0
+    gainBuy = _gain(buyPool.fee)
+    gainSell = _gain(sellPool.fee)
+    numerator = gainBuy * gainSell * buyPool.tokenPool * sellPool.ethPool
+    denominator = buyPool.ethPool * sellPool.tokenPool
+    if numerator <= denominator:
+        return 0
+    return int((sqrt(numerator * denominator) - denominator) / (gainBuy * (sellPool.tokenPool + gainSell * buyPool.tokenPool)))
+
+def _best_exact(buyPool, sellPool, guess):
+    # Rounding moves the exact optimum a little, probe around the float guess
+    best = (0, 0)
+    for size in (guess, guess - guess // 1000, guess + guess // 1000, guess // 2):
+        if size <= 0:
+            continue
+        ethOut = round_trip(buyPool, sellPool, size)
+        if ethOut is not None and ethOut - size > best[1]:
+            best = (size, ethOut - size)
+    return best
+
+def find_opportunities(poolsByToken, minProfit = 1):
+    # poolsByToken is {token: {poolKey: Pool}}, returns [(profit, token, buyKey, sellKey, ethIn), ...] best first
+    opportunities = []
+    for token, pools in poolsByToken.items():
+        if len(pools) < 2:
+            continue
+        items = list(pools.items())
+        for buyKey, buyPool in items:
+            for sellKey, sellPool in items:
+                if buyKey == sellKey:
+                    continue
+                guess = optimal_size(buyPool, sellPool)
+                if guess == 0:
+                    continue
+                ethIn, profit = _best_exact(buyPool, sellPool, guess)
+                if profit >= minProfit:
+                    opportunities.append((profit, token, buyKey, sellKey, ethIn))
+    opportunities.sort(key = lambda opportunity: -opportunity[0])
+    return opportunities
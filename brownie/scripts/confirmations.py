@@ -0,0 +1,142 @@
+from brownie import web3
+from concurrent.futures import Future
+from threading import Thread, Lock, Event
+import requests
+import time
+
+# One watcher for every transaction we wait on, instead of a tx.wait(1) polling loop per transaction
+# Each poll is one eth_blockNumber. On a new block the receipts of every tracked transaction are fetched in batched
+# JSON-RPC requests (batchSize per request), so the polling load doesn't grow with the number of transactions in flight.
+# - track(txid) returns a Future with the receipt once it is confirmations blocks deep, a callback(txid, receipt, error) can be given too
+# - wait(txid) blocks for the receipt, a transaction that isn't confirmed in time fails with ConfirmationTimeout
+# Receipts are the node's JSON with blockNumber, status and gasUsed as ints. Receipts are fetched again until they are deep
+# enough, so a transaction moved by a reorg is only resolved once it is confirmations deep in its new block.
+# Providers without an endpoint_uri (IPC, websocket) get one request per receipt instead of a batch.
+
+class ConfirmationTimeout(Exception):
+    pass
+
+class ConfirmationManager:
+    def __init__(self, confirmations = 1, timeout = 300, pollInterval = 0.5, batchSize = 500):
+        self.confirmations = confirmations
+        self.timeout = timeout
+        self.pollInterval = pollInterval
+        self.batchSize = batchSize
+        self.tracked = {} # txid -> (future, confirmations, deadline, callback)
+        self.lock = Lock()
+        self.head = None
+        self.checked = set() # txids whose receipt was fetched at head
+        self.requests = 0 # JSON-RPC requests sent so far, batches count once
+        self.stopped = Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if self.thread == None:
+            self.stopped.clear()
+            self.thread = Thread(target = self._loop, daemon = True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread != None:
+            self.thread.join()
+            self.thread = None
+
+    def track(self, txid, confirmations = None, timeout = None, callback = None):
+        future = Future()
+        deadline = time.time() + (self.timeout if timeout == None else timeout)
+        with self.lock:
+            self.tracked[str(txid)] = (future, self.confirmations if confirmations == None else confirmations, deadline, callback)
+        self.start()
+        return future
+
+    def wait(self, txid, confirmations = None, timeout = None):
+        return self.track(txid, confirmations, timeout).result()
+
+    @property
+    def pending(self):
+        with self.lock:
+            return len(self.tracked)
+
+    def _loop(self):
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                # A failed poll (node restarting, timeout) is retried on the next interval
+                print("Confirmation poll failed:", e)
+            self.stopped.wait(self.pollInterval)
+
+    def poll(self):
+        # One round: the head, the receipts of everything not fetched at that head yet, then the timeouts
+        with self.lock:
+            tracked = dict(self.tracked)
+        if not tracked:
+            return
+        head = int(self._batch([("eth_blockNumber", [])])[0], 16)
+        if head != self.head:
+            self.head = head
+            self.checked = set()
+        # Transactions tracked since the last fetch are fetched even if no block came, they may be in the head already
+        txids = [txid for txid in tracked if txid not in self.checked]
+        if txids:
+            self.checked.update(txids)
+            for txid, receipt in zip(txids, self._batch([("eth_getTransactionReceipt", [txid]) for txid in txids])):
+                if receipt == None or receipt.get("blockNumber") == None:
+                    continue
+                receipt = _receipt(receipt)
+                if head - receipt["blockNumber"] + 1 >= tracked[txid][1]:
+                    self._resolve(txid, receipt, None)
+        now = time.time()
+        for txid, (future, confirmations, deadline, callback) in tracked.items():
+            if deadline < now and not future.done():
+                self._resolve(txid, None, ConfirmationTimeout(txid + " not confirmed " + str(confirmations) + " deep in time"))
+
+    def _resolve(self, txid, receipt, error):
+        with self.lock:
+            entry = self.tracked.pop(txid, None)
+        if entry == None:
+            return
+        future, _, _, callback = entry
+        # The callback runs first so whoever waits on the future sees what it did
+        if callback != None:
+            try:
+                callback(txid, receipt, error)
+            except Exception as e:
+                print("Confirmation callback failed:", e)
+        if error != None:
+            future.set_exception(error)
+        else:
+            future.set_result(receipt)
+
+    def _batch(self, calls):
+        # [(method, params)] -> [result], one HTTP request per batchSize calls
+        endpoint = getattr(web3.provider, "endpoint_uri", None)
+        if endpoint == None:
+            self.requests += len(calls)
+            return [web3.provider.make_request(method, params).get("result") for method, params in calls]
+        results = []
+        for i in range(0, len(calls), self.batchSize):
+            chunk = calls[i:i + self.batchSize]
+            payload = [{"jsonrpc": "2.0", "id": j, "method": method, "params": params} for j, (method, params) in enumerate(chunk)]
+            response = requests.post(str(endpoint), json = payload, timeout = 30)
+            self.requests += 1
+            response.raise_for_status()
+            byId = {item["id"]: item.get("result") for item in response.json()}
+            results += [byId.get(j) for j in range(len(chunk))]
+        return results
+
+def _receipt(receipt):
+    receipt = dict(receipt)
+    for field in ("blockNumber", "status", "gasUsed", "cumulativeGasUsed", "transactionIndex"):
+        if isinstance(receipt.get(field), str):
+            receipt[field] = int(receipt[field], 16)
+    return receipt
@@ -0,0 +1,236 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import exchange_from_address
+from scripts.multicall import deploy_multicall, Multicall
+from scripts.fuzz_model import generate_sequence, expected_results, shrink, REVERT
+from brownie import network, config, web3, history, AstroSwapFactory, MiniSwap, MockERC20Supply
+from concurrent.futures import ThreadPoolExecutor
+import time
+import os
+
+# Differential fuzzer: random op sequences (see fuzz_model.py) run on the contracts and on the exact Python model
+# Outputs and revert status are compared for every op, reserves, invariant and shares after every checkEvery ops.
+# Every sequence runs from the same chain snapshot and is reverted afterwards, failing sequences are shrunk.
+# - brownie run scripts/fuzz.py                 -> fuzz both contracts for FUZZ_SECONDS (default 60)
+# - brownie test tests/test_fuzz.py -n auto     -> FUZZ_SEQUENCES seeds per contract, one chain per xdist worker
+# Ops are sent back to back with a fixed gas limit (no estimation, no waiting) and checked afterwards from the receipts
+# and one multicall per checked op, pinned to that op's block. This needs an automining dev chain, one op per block.
+
+fee = 400
+FUZZ_GAS_LIMIT = 1000000
+INVESTOR_TOKENS = 10**26 # Per investor and token, far more than a sequence can spend (200 ops of at most 10**21)
+CHECK_WORKERS = 16
+
+def _deploy_tokens(count, investors, account):
+    # MockERC20 only mints 10**24, these are big enough for every investor's share
+    return [MockERC20Supply.deploy("fuzz" + str(i), INVESTOR_TOKENS * len(investors), {'from': account}) for i in range(count)]
+
+def _fund_investors(tokens, spenders, investors, account):
+    for token in tokens:
+        for investor in investors:
+            if investor != account:
+                token.transfer(investor, INVESTOR_TOKENS, {'from': account})
+            for spender in spenders:
+                token.approve(spender, 2**256 - 1, {'from': investor})
+
+def _last_tx(send):
+    # Reverted ops are expected, keep their receipt instead of the exception
+    try:
+        return send()
+    except Exception:
+        return history[-1]
+
+class ExchangeTarget:
+    # poolCount factory exchanges, tokenToToken goes through the factory
+    name = "AstroSwapExchange"
+
+    def __init__(self, investors, poolCount = 2, aggregator = None):
+        account = smart_get_account(1)
+        self.investors = investors
+        self.poolCount = poolCount
+        self.aggregator = aggregator if aggregator != None else deploy_multicall()
+        self.factory = AstroSwapFactory.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+        self.tokens = _deploy_tokens(poolCount, investors, account)
+        self.exchanges = []
+        for token in self.tokens:
+            forgeTx = self.factory.addTokenExchange(token.address, {'from': account})
+            self.exchanges.append(exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"]))
+        _fund_investors(self.tokens, [exchange.address for exchange in self.exchanges], investors, account)
+
+    def send(self, op, params):
+        function, investor = op[0], op[1]
+        params = dict(params, **{'from': self.investors[investor]})
+        if function == "tokenToToken":
+            _, _, fromPool, toPool, tokensIn, minOut = op
+            return self.exchanges[fromPool].tokenToToken(self.investors[investor], self.tokens[toPool].address, tokensIn, minOut, params)
+        exchange = self.exchanges[op[2]]
+        if function == "seedInvest":
+            return exchange.seedInvest(op[4], dict(params, value = op[3]))
+        if function == "invest":
+            return exchange.invest(op[4], dict(params, value = op[3]))
+        if function == "divest":
+            return exchange.divest(op[3], params)
+        if function == "ethToToken":
+            return exchange.ethToToken(self.investors[investor], op[4], dict(params, value = op[3]))
+        return exchange.tokenToEth(self.investors[investor], op[3], op[4], params)
+
+    def outputs(self, op, tx):
+        # Same shape as FuzzModel.apply
+        function = op[0]
+        if function in ("seedInvest", "invest"):
+            event = tx.events["Investment"]
+            return (event["sharesPurchased"], event["ethInvested"], event["tokensInvested"])
+        if function == "divest":
+            event = tx.events["Divestment"]
+            return (event["sharesBurned"], event["ethDivested"], event["tokensDivested"])
+        if function == "ethToToken":
+            return (tx.events["TokenPurchase"]["tokensOut"],)
+        if function == "tokenToEth":
+            return (tx.events["EthPurchase"]["ethOut"],)
+        return (tx.events["TokenToTokenOut"]["ethTransfer"], tx.events["TokenPurchase"]["tokensOut"])
+
+    def read_state(self, block):
+        multicall = Multicall(self.aggregator)
+        for exchange in self.exchanges:
+            for field in ("ethPool", "tokenPool", "invariant", "totalShares"):
+                multicall.add(getattr(exchange, field))
+            for investor in self.investors:
+                multicall.add(exchange.getShares, investor)
+        results = multicall.call(block = block)
+        size = 4 + len(self.investors)
+        return tuple(tuple(results[i * size:i * size + 4]) + (tuple(results[i * size + 4:(i + 1) * size]),) for i in range(self.poolCount))
+
+class MiniSwapTarget:
+    # poolCount tokens in one MiniSwap
+    name = "MiniSwap"
+
+    def __init__(self, investors, poolCount = 2, aggregator = None):
+        account = smart_get_account(1)
+        self.investors = investors
+        self.poolCount = poolCount
+        self.aggregator = aggregator if aggregator != None else deploy_multicall()
+        self.miniSwap = MiniSwap.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+        self.tokens = _deploy_tokens(poolCount, investors, account)
+        _fund_investors(self.tokens, [self.miniSwap.address], investors, account)
+
+    def send(self, op, params):
+        function, investor = op[0], op[1]
+        params = dict(params, **{'from': self.investors[investor]})
+        if function == "tokenToToken":
+            _, _, fromPool, toPool, tokensIn, minOut = op
+            return self.miniSwap.tokenToToken(self.tokens[fromPool].address, self.investors[investor], self.tokens[toPool].address, tokensIn, minOut, params)
+        token = self.tokens[op[2]].address
+        if function == "seedInvest":
+            return self.miniSwap.seedInvest(token, op[4], dict(params, value = op[3]))
+        if function == "invest":
+            return self.miniSwap.invest(token, op[4], dict(params, value = op[3]))
+        if function == "divest":
+            return self.miniSwap.divest(token, op[3], params)
+        if function == "ethToToken":
+            return self.miniSwap.ethToToken(token, self.investors[investor], op[4], dict(params, value = op[3]))
+        return self.miniSwap.tokenToEth(token, self.investors[investor], op[3], op[4], params)
+
+    def outputs(self, op, tx):
+        function = op[0]
+        if function in ("seedInvest", "invest"):
+            event = tx.events["Investment"]
+            return (event["sharesPurchased"], event["ethInvested"], event["tokensInvested"])
+        if function == "divest":
+            event = tx.events["Divestment"]
+            return (event["sharesBurned"], event["ethDivested"], event["tokensDivested"])
+        if function == "ethToToken":
+            return (tx.events["TokenPurchase"]["tokensOut"],)
+        if function == "tokenToEth":
+            return (tx.events["EthPurchase"]["ethOut"],)
+        # tokensOut isn't in the TokenToToken event, the last Transfer is the payout
+        return (tx.events["TokenToToken"]["ethTransfer"], tx.events["Transfer"][-1]["value"])
+
+    def read_state(self, block):
+        multicall = Multicall(self.aggregator)
+        for token in self.tokens:
+            multicall.add(self.miniSwap.exchanges, token.address)
+            for investor in self.investors:
+                multicall.add(self.miniSwap.getShares, token.address, investor)
+        results = multicall.call(block = block)
+        size = 1 + len(self.investors)
+        state = []
+        for i in range(self.poolCount):
+            _, ethPool, tokenPool, totalShares = results[i * size]
+            state.append((ethPool, tokenPool, ethPool * tokenPool, totalShares, tuple(results[i * size + 1:(i + 1) * size])))
+        return tuple(state)
+
+def _check_step(target, step, op, tx, expected, checkState):
+    # Returns (step, op, what, expected, actual) for the first difference, None if the op matches the model
+    outputs, state = expected
+    tx.wait(1)
+    if outputs == REVERT:
+        if tx.status == 1:
+            return (step, op, "status", REVERT, target.outputs(op, tx))
+    else:
+        if tx.status != 1:
+            return (step, op, "status", outputs, REVERT)
+        actual = target.outputs(op, tx)
+        if tuple(actual) != outputs:
+            return (step, op, "outputs", outputs, tuple(actual))
+    if checkState:
+        actual = target.read_state(tx.block_number)
+        if actual != state:
+            return (step, op, "state", state, actual)
+    return None
+
+def run_sequence(target, ops, checkEvery = 1):
+    # Returns the first mismatch or None, the chain is back to where it was afterwards
+    # Takes its own node snapshot, brownie's chain.snapshot() keeps a single id and a test's isolation snapshot would be lost
+    expected = expected_results(ops, fee, target.poolCount, len(target.investors))
+    params = {'gas_limit': FUZZ_GAS_LIMIT, 'required_confs': 0, 'allow_revert': True}
+    snapshotId = web3.provider.make_request("evm_snapshot", []).get("result")
+    try:
+        txs = [_last_tx(lambda: target.send(op, params)) for op in ops]
+        with ThreadPoolExecutor(max_workers = CHECK_WORKERS) as executor:
+            checks = list(executor.map(
+                lambda step: _check_step(target, step, ops[step], txs[step], expected[step], step % checkEvery == 0 or step == len(ops) - 1),
+                range(len(ops))
+            ))
+        mismatches = [check for check in checks if check != None]
+        return mismatches[0] if mismatches else None
+    finally:
+        web3.provider.make_request("evm_revert", [snapshotId])
+
+def fuzz_seed(target, seed, length = 200, checkEvery = 1, shrinkRuns = 200):
+    # Returns None or (minimal ops, mismatch of those ops)
+    ops = generate_sequence(seed, length, fee, target.poolCount, len(target.investors))
+    mismatch = run_sequence(target, ops, checkEvery)
+    if mismatch == None:
+        return None
+    ops = shrink(ops, lambda candidate: run_sequence(target, candidate, checkEvery) != None, shrinkRuns)
+    return ops, run_sequence(target, ops)
+
+def fuzz_investors(count = 3):
+    return [smart_get_account(i + 1) for i in range(count)]
+
+def print_failure(target, seed, failure):
+    ops, mismatch = failure
+    print(target.name, "seed", seed, "fails after shrinking to", len(ops), "ops:")
+    for op in ops:
+        print("   ", op)
+    print("Mismatch:", mismatch)
+
+def main():
+    seconds = float(os.environ.get("FUZZ_SECONDS", 60))
+    length = int(os.environ.get("FUZZ_LENGTH", 200))
+    investors = fuzz_investors()
+    aggregator = deploy_multicall()
+    targets = [ExchangeTarget(investors, aggregator = aggregator), MiniSwapTarget(investors, aggregator = aggregator)]
+    start = time.time()
+    seed = int(os.environ.get("FUZZ_SEED", int(start)))
+    opCount = 0
+    failures = 0
+    while time.time() - start < seconds:
+        for target in targets:
+            failure = fuzz_seed(target, seed, length)
+            opCount += length
+            if failure != None:
+                failures += 1
+                print_failure(target, seed, failure)
+        seed += 1
+    elapsed = time.time() - start
+    print(opCount, "ops in", round(elapsed, 1), "s (" + str(round(opCount * 3600 / elapsed)) + " ops/hour),", failures, "failing sequences")
@@ -0,0 +1,166 @@
+from scripts.amm import Pool, SwapReverted, UINT256_MAX
+import random
+
+# Pure side of the differential fuzzer (scripts/fuzz.py): the reference model, the sequence generator and the shrinker
+# An op is a tuple, the first two fields are always (function, investor index):
+# - ("seedInvest", investor, pool, ethIn, tokensIn)
+# - ("invest", investor, pool, ethIn, maxTokensInvested)
+# - ("divest", investor, pool, shares)
+# - ("ethToToken", investor, pool, ethIn, minTokensOut)
+# - ("tokenToEth", investor, pool, tokensIn, minEthOut)
+# - ("tokenToToken", investor, fromPool, toPool, tokensIn, minTokensOut)
+
+REVERT = "revert"
+OP_WEIGHTS = [("seedInvest", 1), ("invest", 3), ("divest", 3), ("ethToToken", 6), ("tokenToEth", 6), ("tokenToToken", 4)]
+MAX_ETH = 10**18 # Per op, keeps the dev accounts funded for a whole sequence
+MAX_TOKENS = 10**21
+
+class FuzzModel:
+    # Exact state of poolCount pools traded by investorCount investors
+    def __init__(self, fee, poolCount, investorCount):
+        self.fee = fee
+        self.investorCount = investorCount
+        self.pools = [Pool(fee, investorShares = {}) for i in range(poolCount)]
+
+    def apply(self, op):
+        # Returns the outputs the contract emits for op, REVERT if it should revert (the state is then unchanged)
+        backup = [pool.copy() for pool in self.pools]
+        try:
+            return self._apply(op)
+        except (SwapReverted, ZeroDivisionError):
+            self.pools = backup
+            return REVERT
+
+    def _apply(self, op):
+        function, investor = op[0], op[1]
+        if function == "seedInvest":
+            _, _, pool, ethIn, tokensIn = op
+            return (self.pools[pool].seed_invest(investor, ethIn, tokensIn), ethIn, tokensIn)
+        if function == "invest":
+            _, _, pool, ethIn, maxTokens = op
+            tokens, shares = self.pools[pool].invest(investor, ethIn, maxTokens)
+            return (shares, ethIn, tokens)
+        if function == "divest":
+            _, _, pool, shares = op
+            ethOut, tokensOut = self.pools[pool].divest(investor, shares)
+            return (shares, ethOut, tokensOut)
+        if function == "ethToToken":
+            _, _, pool, ethIn, minOut = op
+            return (self.pools[pool].eth_to_token(ethIn, minOut),)
+        if function == "tokenToEth":
+            _, _, pool, tokensIn, minOut = op
+            return (self.pools[pool].token_to_eth(tokensIn, minOut),)
+        if function == "tokenToToken":
+            _, _, fromPool, toPool, tokensIn, minOut = op
+            ethTransfer = self.pools[fromPool].token_to_eth(tokensIn)
+            if ethTransfer == 0:
+                raise SwapReverted("Eth out is too small")
+            return (ethTransfer, self.pools[toPool].eth_to_token(ethTransfer, minOut))
+        raise ValueError("Unknown op: " + str(function))
+
+    def copy(self):
+        model = FuzzModel(self.fee, 0, self.investorCount)
+        model.pools = [pool.copy() for pool in self.pools]
+        return model
+
+    def state(self):
+        # Per pool (ethPool, tokenPool, invariant, totalShares, (shares of every investor))
+        return tuple((pool.ethPool, pool.tokenPool, pool.invariant, pool.totalShares, tuple(pool.investorShares.get(i, 0) for i in range(self.investorCount))) for pool in self.pools)
+
+def _amount(rng, maximum):
+    # Log uniform so tiny amounts (0, 1, dust) show up as often as big ones
+    return rng.randint(0, min(maximum, 10**rng.randint(0, len(str(maximum)))))
+
+def _min_out(rng, model, op):
+    # Mostly no minimum, sometimes exactly the output or one more, where the require flips
+    roll = rng.random()
+    if roll < 0.8:
+        return 0
+    outputs = model.copy().apply(op + (0,))
+    if outputs == REVERT:
+        return 0
+    return outputs[-1] + (1 if roll < 0.9 else 0)
+
+def generate_sequence(seed, length, fee, poolCount, investorCount):
+    # Random ops, values are picked from the model state as it evolves so most ops are valid and hit the edges
+    rng = random.Random(seed)
+    model = FuzzModel(fee, poolCount, investorCount)
+    names = [name for name, weight in OP_WEIGHTS for i in range(weight)]
+    ops = []
+    for i in range(length):
+        investor = rng.randrange(investorCount)
+        pool = rng.randrange(poolCount)
+        function = rng.choice(names)
+        if all(p.totalShares == 0 for p in model.pools) or (function == "seedInvest" and model.pools[pool].totalShares == 0):
+            op = ("seedInvest", investor, pool, _amount(rng, MAX_ETH) or 1, _amount(rng, MAX_TOKENS) or 1)
+        elif function == "seedInvest":
+            op = ("seedInvest", investor, pool, _amount(rng, MAX_ETH), _amount(rng, MAX_TOKENS)) # Allready seeded, reverts
+        elif function == "invest":
+            op = ("invest", investor, pool, _amount(rng, MAX_ETH), UINT256_MAX if rng.random() < 0.9 else _amount(rng, MAX_TOKENS))
+        elif function == "divest":
+            owned = model.pools[pool].investorShares.get(investor, 0)
+            op = ("divest", investor, pool, rng.choice([owned, owned + 1, rng.randint(0, owned)]))
+        elif function == "ethToToken":
+            op = ("ethToToken", investor, pool, _amount(rng, MAX_ETH))
+            op = op + (_min_out(rng, model, op),)
+        elif function == "tokenToEth":
+            op = ("tokenToEth", investor, pool, _amount(rng, MAX_TOKENS))
+            op = op + (_min_out(rng, model, op),)
+        else:
+            toPool = (pool + rng.randrange(1, poolCount)) % poolCount if poolCount > 1 else pool
+            op = ("tokenToToken", investor, pool, toPool, _amount(rng, MAX_TOKENS))
+            op = op + (_min_out(rng, model, op),)
+        model.apply(op)
+        ops.append(op)
+    return ops
+
+def expected_results(ops, fee, poolCount, investorCount):
+    # [(outputs or REVERT, state after the op)] for every op
+    model = FuzzModel(fee, poolCount, investorCount)
+    results = []
+    for op in ops:
+        outputs = model.apply(op)
+        results.append((outputs, model.state()))
+    return results
+
+def _smaller_values(op):
+    # Candidate ops with one amount made simpler, fields 0 and 1 (function, investor) and pool indexes stay
+    first = 4 if op[0] == "tokenToToken" else 3
+    for index in range(first, len(op)):
+        value = op[index]
+        for smaller in (0, 1, value // 2):
+            if smaller < value:
+                yield op[:index] + (smaller,) + op[index + 1:]
+
+def shrink(ops, fails, maxRuns = 500):
+    # Smallest sequence we can find that still fails(ops), first drops chunks of ops then simplifies the amounts
+    # fails runs the candidate (on a chain or anywhere else) and returns True while the bug still shows
+    runs = 0
+    chunk = len(ops) // 2
+    while chunk >= 1 and runs < maxRuns:
+        start = 0
+        removed = False
+        while start < len(ops) and runs < maxRuns:
+            candidate = ops[:start] + ops[start + chunk:]
+            runs += 1
+            if candidate and fails(candidate):
+                ops = candidate
+                removed = True
+            else:
+                start += chunk
+        if not removed:
+            chunk //= 2
+    changed = True
+    while changed and runs < maxRuns:
+        changed = False
+        for i in range(len(ops)):
+            for op in _smaller_values(ops[i]):
+                if runs >= maxRuns:
+                    break
+                candidate = ops[:i] + [op] + ops[i + 1:]
+                runs += 1
+                if fails(candidate):
+                    ops = candidate
+                    changed = True
+                    break
+    return ops
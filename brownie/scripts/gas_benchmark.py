@@ -0,0 +1,190 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20
+from scripts.runMiniSwap import swap_instruction, ETH_TO_TOKEN, TOKEN_TO_ETH, TOKEN_TO_TOKEN
+from brownie import network, config, AstroSwapFactory, AstroSwapExchange, AstroSwapExchangeLean, MockLeanFactory, MiniSwap
+from brownie.network.contract import Contract
+import json
+import os
+
+# Fixed, deterministic workload against every contract, gas per function is compared to gas_snapshot.json
+# brownie run scripts/gas_benchmark.py                   -> fails if a function got more expensive than the threshold
+# brownie run scripts/gas_benchmark.py update_snapshot   -> rewrites the snapshot (commit it with the change)
+# The threshold is a percentage of the snapshot's avg, set GAS_REGRESSION_THRESHOLD to change it.
+# brownie run scripts/gas_benchmark.py multiswap_comparison -> MiniSwap.multiSwap vs the same legs as separate transactions
+# brownie run scripts/gas_benchmark.py proxy_comparison      -> listing cost and per call overhead of the clone exchanges
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gas_snapshot.json")
+DEFAULT_THRESHOLD = 2.0
+fee = 400
+tradeSizes = [10**15, 10**17, 3*10**17] # ETH, token trades use 100x these
+
+def _record(gas, name, tx):
+    gas.setdefault(name, []).append(tx.gas_used)
+
+def _deploy(container, *args):
+    account = smart_get_account(1)
+    return container.deploy(*args, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+
+def _exchange_workload(gas, name, factoryContainer, exchangeContainer, direct = False):
+    # direct deploys full exchanges with their constructor instead of through the factory (no tokenToToken without a factory)
+    account = smart_get_account(1)
+    if not direct:
+        factory = _deploy(factoryContainer, fee)
+        _record(gas, factoryContainer._name + ".constructor", factory.tx)
+    exchanges = []
+    for i in range(2):
+        token = deploy_erc20()
+        if direct:
+            exchange = _deploy(exchangeContainer, token.address, fee)
+            _record(gas, name + ".constructor", exchange.tx)
+        else:
+            forgeTx = factory.addTokenExchange(token.address, {'from': account})
+            _record(gas, factoryContainer._name + ".addTokenExchange", forgeTx)
+            exchange = Contract.from_abi(name, forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"], exchangeContainer.abi)
+        token.approve(exchange.address, 10**27, {'from': account}).wait(1)
+        _record(gas, name + ".seedInvest", exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}))
+        exchanges.append((token, exchange))
+    (token1, exchange1), (token2, exchange2) = exchanges
+    for size in tradeSizes:
+        _record(gas, name + ".ethToToken", exchange1.ethToToken(account.address, 0, {'from': account, 'value': size}))
+        _record(gas, name + ".tokenToEth", exchange1.tokenToEth(account.address, size * 100, 0, {'from': account}))
+        if not direct:
+            _record(gas, name + ".tokenToToken", exchange1.tokenToToken(account.address, token2.address, size * 100, 0, {'from': account}))
+        _record(gas, name + ".invest", exchange1.invest(10**27, {'from': account, 'value': size}))
+        _record(gas, name + ".divest", exchange1.divest(100, {'from': account}))
+
+def _seeded_miniswap(gas, tokenCount):
+    account = smart_get_account(1)
+    miniSwap = _deploy(MiniSwap, fee)
+    _record(gas, "MiniSwap.constructor", miniSwap.tx)
+    tokens = []
+    for i in range(tokenCount):
+        token = deploy_erc20()
+        token.approve(miniSwap.address, 10**27, {'from': account}).wait(1)
+        _record(gas, "MiniSwap.seedInvest", miniSwap.seedInvest(token.address, 100*10**18, {'from': account, 'value': 1*10**18}))
+        tokens.append(token)
+    return miniSwap, tokens
+
+def _multiswap_legs(tokens):
+    # Every token is bought, sold and traded for the next one
+    legs = []
+    for i, token in enumerate(tokens):
+        nextToken = tokens[(i + 1) % len(tokens)]
+        legs.append(swap_instruction(ETH_TO_TOKEN, 10**16, tokenOut = token.address))
+        legs.append(swap_instruction(TOKEN_TO_ETH, 10**18, tokenIn = token.address))
+        legs.append(swap_instruction(TOKEN_TO_TOKEN, 10**18, tokenIn = token.address, tokenOut = nextToken.address))
+    return legs
+
+def _send_leg(miniSwap, leg, account):
+    kind, tokenIn, tokenOut, amountIn, minOut = leg
+    if kind == ETH_TO_TOKEN:
+        return miniSwap.ethToToken(tokenOut, account.address, minOut, {'from': account, 'value': amountIn})
+    if kind == TOKEN_TO_ETH:
+        return miniSwap.tokenToEth(tokenIn, account.address, amountIn, minOut, {'from': account})
+    return miniSwap.tokenToToken(tokenIn, account.address, tokenOut, amountIn, minOut, {'from': account})
+
+def _miniswap_workload(gas):
+    account = smart_get_account(1)
+    miniSwap, (token1, token2) = _seeded_miniswap(gas, 2)
+    for size in tradeSizes:
+        _record(gas, "MiniSwap.ethToToken", miniSwap.ethToToken(token1.address, account.address, 0, {'from': account, 'value': size}))
+        _record(gas, "MiniSwap.tokenToEth", miniSwap.tokenToEth(token1.address, account.address, size * 100, 0, {'from': account}))
+        _record(gas, "MiniSwap.tokenToToken", miniSwap.tokenToToken(token1.address, account.address, token2.address, size * 100, 0, {'from': account}))
+        _record(gas, "MiniSwap.invest", miniSwap.invest(token1.address, 10**27, {'from': account, 'value': size}))
+        _record(gas, "MiniSwap.divest", miniSwap.divest(token1.address, 100, {'from': account}))
+    legs = _multiswap_legs([token1, token2])
+    _record(gas, "MiniSwap.multiSwap", miniSwap.multiSwap(legs, account.address, {'from': account, 'value': sum(leg[3] for leg in legs if leg[0] == ETH_TO_TOKEN)}))
+
+def multiswap_comparison(tokenCount = 5):
+    # Same legs from the same state, once as separate transactions and once through multiSwap
+    # Gas used includes the 21000 base cost of every transaction
+    account = smart_get_account(1)
+    gas = {}
+    sequentialSwap, sequentialTokens = _seeded_miniswap(gas, tokenCount)
+    batchSwap, batchTokens = _seeded_miniswap(gas, tokenCount)
+    sequential = sum(_send_leg(sequentialSwap, leg, account).gas_used for leg in _multiswap_legs(sequentialTokens))
+    legs = _multiswap_legs(batchTokens)
+    batched = batchSwap.multiSwap(legs, account.address, {'from': account, 'value': sum(leg[3] for leg in legs if leg[0] == ETH_TO_TOKEN)}).gas_used
+    print(len(legs), "legs over", tokenCount, "tokens")
+    print("Sequential:", sequential, "(" + str(sequential // len(legs)) + " per leg)")
+    print("multiSwap: ", batched, "(" + str(batched // len(legs)) + " per leg)")
+    print("Saved:", str(round((sequential - batched) * 100 / sequential, 1)) + "%")
+    return sequential, batched
+
+def proxy_comparison(results = None):
+    # Clone listing (addTokenExchange) vs a full deployment, then what the delegatecall adds to every exchange function
+    if results == None: results = run_workload()
+    clone = results["AstroSwapFactory.addTokenExchange"]["avg"]
+    direct = results["AstroSwapExchangeDirect.constructor"]["avg"]
+    print("Listing: clone", clone, "vs new", direct, "(" + str(round(direct / clone, 1)) + "x cheaper)")
+    print("function".ljust(14), "clone".rjust(9), "direct".rjust(9), "overhead".rjust(9))
+    overheads = {}
+    for function in ("seedInvest", "ethToToken", "tokenToEth", "invest", "divest"):
+        proxied, full = results["AstroSwapExchange." + function]["avg"], results["AstroSwapExchangeDirect." + function]["avg"]
+        overheads[function] = proxied - full
+        print(function.ljust(14), str(proxied).rjust(9), str(full).rjust(9), str(proxied - full).rjust(9))
+    return clone, direct, overheads
+
+def run_workload():
+    # Returns {"Contract.function": {"min", "avg", "max", "calls"}}
+    # Factory exchanges are clones, the direct ones show what the proxy adds to every call
+    gas = {}
+    _exchange_workload(gas, "AstroSwapExchange", AstroSwapFactory, AstroSwapExchange)
+    _exchange_workload(gas, "AstroSwapExchangeDirect", None, AstroSwapExchange, direct = True)
+    _exchange_workload(gas, "AstroSwapExchangeLean", MockLeanFactory, AstroSwapExchangeLean)
+    _miniswap_workload(gas)
+    return {name: {"min": min(used), "avg": sum(used) // len(used), "max": max(used), "calls": len(used)} for name, used in sorted(gas.items())}
+
+def load_snapshot(path = SNAPSHOT_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def find_unbaselined(snapshot, results):
+    # Functions benchmarked but missing from the snapshot (new or renamed), they fail too or they would never be gated
+    return [name for name in results if name not in snapshot]
+
+def find_regressions(snapshot, results, threshold = None):
+    # Returns [(function, snapshot avg, new avg, % change)] for every function over the threshold
+    # Functions missing from the snapshot are left to find_unbaselined
+    if threshold == None: threshold = float(os.environ.get("GAS_REGRESSION_THRESHOLD", DEFAULT_THRESHOLD))
+    regressions = []
+    for name, stats in results.items():
+        if name not in snapshot:
+            continue
+        change = (stats["avg"] - snapshot[name]["avg"]) * 100 / snapshot[name]["avg"]
+        if change > threshold:
+            regressions.append((name, snapshot[name]["avg"], stats["avg"], round(change, 2)))
+    return regressions
+
+def print_results(results, snapshot = None):
+    print("function".ljust(36), "min".rjust(9), "avg".rjust(9), "max".rjust(9), "snapshot avg".rjust(13))
+    for name, stats in results.items():
+        previous = str(snapshot[name]["avg"]) if snapshot and name in snapshot else "-"
+        print(name.ljust(36), str(stats["min"]).rjust(9), str(stats["avg"]).rjust(9), str(stats["max"]).rjust(9), previous.rjust(13))
+
+def update_snapshot(path = SNAPSHOT_PATH):
+    results = run_workload()
+    print_results(results)
+    with open(path, "w") as f:
+        f.write(json.dumps(results, indent = 2, sort_keys = True) + "\n")
+    print("Wrote", path)
+    return results
+
+def check(path = SNAPSHOT_PATH, threshold = None):
+    snapshot = load_snapshot(path)
+    if snapshot == None:
+        raise Exception("No gas snapshot at " + path + ", run update_snapshot first")
+    results = run_workload()
+    print_results(results, snapshot)
+    unbaselined = find_unbaselined(snapshot, results)
+    if unbaselined:
+        raise Exception("Not in the gas snapshot, run update_snapshot and commit it: " + ", ".join(unbaselined))
+    regressions = find_regressions(snapshot, results, threshold)
+    if regressions:
+        raise Exception("Gas regressions: " + ", ".join(name + " " + str(old) + " -> " + str(new) + " (+" + str(change) + "%)" for name, old, new, change in regressions))
+    return results
+
+def main():
+    check()
@@ -0,0 +1,50 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20
+from brownie import network, config, AstroSwapFactory, AstroSwapExchange, AstroSwapExchangeLean, MockLeanFactory
+from brownie.network.contract import Contract
+
+# Runs the same trades on AstroSwapExchange and AstroSwapExchangeLean and prints the gas used by each function
+# brownie run scripts/gas_compare.py
+
+fee = 400
+
+def deploy_pair(factoryContainer, exchangeContainer, account):
+    factory = factoryContainer.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+    exchanges = []
+    for i in range(2):
+        token = deploy_erc20()
+        forgeTx = factory.addTokenExchange(token.address, {'from': account})
+        forgeTx.wait(1)
+        exchange = Contract.from_abi(exchangeContainer._name, forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"], exchangeContainer.abi)
+        token.approve(exchange.address, 10**27, {'from': account}).wait(1)
+        exchanges.append((token, exchange))
+    return factory, exchanges
+
+def run_workload(exchanges, account):
+    # Returns {function: gas used}, every step starts from the same state on both contracts
+    (token1, exchange1), (token2, exchange2) = exchanges
+    gas = {}
+    seedTx = exchange1.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
+    exchange2.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    gas["seedInvest"] = seedTx.gas_used
+    gas["ethToToken"] = exchange1.ethToToken(account.address, 0, {'from': account, 'value': 10**17}).gas_used
+    gas["tokenToEth"] = exchange1.tokenToEth(account.address, 5*10**18, 0, {'from': account}).gas_used
+    gas["tokenToToken"] = exchange1.tokenToToken(account.address, token2.address, 5*10**18, 0, {'from': account}).gas_used
+    gas["invest"] = exchange1.invest(10**24, {'from': account, 'value': 10**17}).gas_used
+    gas["divest"] = exchange1.divest(1000, {'from': account}).gas_used
+    return gas
+
+def compare():
+    account = smart_get_account(1)
+    _, original = deploy_pair(AstroSwapFactory, AstroSwapExchange, account)
+    _, lean = deploy_pair(MockLeanFactory, AstroSwapExchangeLean, account)
+    before = run_workload(original, account)
+    after = run_workload(lean, account)
+    print("function".ljust(14), "AstroSwapExchange".rjust(18), "Lean".rjust(10), "change".rjust(9))
+    for function in before:
+        change = (after[function] - before[function]) * 100 / before[function]
+        print(function.ljust(14), str(before[function]).rjust(18), str(after[function]).rjust(10), (str(round(change, 1)) + "%").rjust(9))
+    return before, after
+
+def main():
+    compare()
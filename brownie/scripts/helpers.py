@@ -1,37 +1,183 @@
-from brownie import network, accounts, config, Contract, MockERC20
-from math import floor
+from brownie import network, accounts, config, Contract, MockERC20, AstroSwapExchange
+from scripts.amm import swap_output
+from collections import OrderedDict
+from threading import Lock
+import eth_keyfile
+import atexit
+import json
+import os
+import time
 
 LOCAL_BLOCKCHAIN_ENVIRONMENTS = ["development","ganache-local"]
 FORKED = ["mainnet-fork","mainnet-fork-dev"]
 realAccountNames = []
 
+# Process wide cache of Contract.from_abi handles, keyed by (address, abi), least recently used dropped first
+CONTRACT_CACHE_SIZE = 4096
+contractCache = OrderedDict() # (lowercase address, id(abi)) -> (abi, handle), the abi is kept so its id can't be reused
+contractCacheLock = Lock()
+
+# Keystores are decrypted once per process, accounts.load runs scrypt and may ask for the password every time
+# Set ASTROSWAP_UNLOCK_SECONDS to also keep the keys in UNLOCK_DIR for that long, so the next scripts don't ask again.
+# The files are encrypted with ASTROSWAP_UNLOCK_KEY (a random secret exported in the shell, never written to disk),
+# without it nothing is cached. Expired files are deleted on every load and at exit, lock_accounts() deletes them all.
+# On POSIX the directory and files must be owner only, otherwise they are not used.
+accountCache = {} # keystore id -> account
+UNLOCK_DIR = os.path.join(os.path.expanduser("~"), ".astroswap", "unlocked")
+UNLOCK_KEY_ENV = "ASTROSWAP_UNLOCK_KEY"
+
 def get_account(index = 0, id = None): # Automaticaly gets a good account
     if id != None:
-        return accounts.load(id)
+        return load_account(id)
     if network.show_active() in LOCAL_BLOCKCHAIN_ENVIRONMENTS or network.show_active() in FORKED:
         return accounts[index]
-    return accounts.load("test1")
+    return load_account("test1")
 
 def smart_get_account(index):
     if network.show_active() in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
         return accounts[index]
-    return accounts.load("test"+str(index))
-    return accounts.load(realAccountNames[index])
-    
+    return load_account("test"+str(index))
+    return load_account(realAccountNames[index])
+
+def load_account(id):
+    if id in accountCache:
+        return accountCache[id]
+    purge_unlocked()
+    unlockSeconds = int(os.environ.get("ASTROSWAP_UNLOCK_SECONDS", 0))
+    unlockKey = _unlock_key() if unlockSeconds > 0 else None
+    account = _read_unlocked(id, unlockKey) if unlockKey != None else None
+    if account == None:
+        account = accounts.load(id)
+        if unlockKey != None:
+            _write_unlocked(id, account, unlockSeconds, unlockKey)
+    accountCache[id] = account
+    return account
+
+def _unlock_key():
+    key = os.environ.get(UNLOCK_KEY_ENV)
+    if not key:
+        print("ASTROSWAP_UNLOCK_SECONDS is set without " + UNLOCK_KEY_ENV + ", keys are not cached on disk. Set it with:")
+        print("  export " + UNLOCK_KEY_ENV + "=$(python -c \"import secrets; print(secrets.token_hex(32))\")")
+        return None
+    return key.encode()
+
+def _owner_only(path):
+    # POSIX only, Windows has no uid and its permission bits don't mean the same thing
+    if not hasattr(os, "getuid"):
+        return True
+    info = os.stat(path)
+    return not info.st_mode & 0o077 and info.st_uid == os.getuid()
+
+def _unlock_dir():
+    # Returns the directory, or None if someone else could read or write it
+    os.makedirs(UNLOCK_DIR, mode = 0o700, exist_ok = True)
+    if not _owner_only(UNLOCK_DIR):
+        print(UNLOCK_DIR, "is readable or writable by others, keys are not cached. Fix it with: chmod 700", UNLOCK_DIR)
+        return None
+    return UNLOCK_DIR
+
+def _unlock_path(id):
+    return os.path.join(UNLOCK_DIR, id + ".json")
+
+def purge_unlocked():
+    # Deletes every expired or unreadable key file
+    if not os.path.isdir(UNLOCK_DIR):
+        return
+    now = time.time()
+    for name in os.listdir(UNLOCK_DIR):
+        path = os.path.join(UNLOCK_DIR, name)
+        if name.endswith(".tmp") and os.path.getmtime(path) > now - 60:
+            continue # Another process may be writing it
+        try:
+            with open(path, "r") as f:
+                expired = json.load(f)["expires"] < now
+        except (OSError, ValueError, KeyError, TypeError):
+            expired = True
+        if expired and os.path.exists(path):
+            os.remove(path)
+
+atexit.register(purge_unlocked)
+
+def _read_unlocked(id, unlockKey):
+    path = _unlock_path(id)
+    if _unlock_dir() == None or not os.path.exists(path):
+        return None
+    if not _owner_only(path):
+        # Someone else could have read or written it, don't trust it
+        os.remove(path)
+        return None
+    with open(path, "r") as f:
+        unlocked = json.load(f)
+    try:
+        privateKey = eth_keyfile.decode_keyfile_json(unlocked["keystore"], unlockKey)
+    except ValueError:
+        # Written with another ASTROSWAP_UNLOCK_KEY
+        os.remove(path)
+        return None
+    return accounts.add("0x" + privateKey.hex())
+
+def _write_unlocked(id, account, seconds, unlockKey):
+    if _unlock_dir() == None:
+        return
+    path = _unlock_path(id)
+    tempPath = path + "." + str(os.getpid()) + ".tmp"
+    # The key is random, so one pbkdf2 round is enough, the slow KDF is what the cache is there to skip
+    keystore = eth_keyfile.create_keyfile_json(bytes.fromhex(account.private_key[2:]), unlockKey, kdf = "pbkdf2", iterations = 1)
+    # Created owner only from the start, then moved over the old one so it is never half written
+    fd = os.open(tempPath, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"address": account.address, "expires": time.time() + seconds, "keystore": keystore}, f)
+    os.replace(tempPath, path)
+
+def lock_accounts():
+    # Forgets every decrypted account, in memory and on disk
+    accountCache.clear()
+    if os.path.isdir(UNLOCK_DIR):
+        for name in os.listdir(UNLOCK_DIR):
+            os.remove(os.path.join(UNLOCK_DIR, name))
+
 def calculate_liquidity_pool_output(fromPool, toPool, amount, fee):
-    invariant = fromPool * toPool
-    feesTaken = floor(amount / fee)
-    print(feesTaken, amount / fee)
-    newPool = fromPool - feesTaken + amount
-    newToPool = floor(invariant / newPool + 1)
-    print(newPool, newToPool)
-    paid = toPool - newToPool
-    return paid
+    # Exact uint256 math of the exchange, raises SwapReverted where the contract would revert
+    return swap_output(fromPool, toPool, amount, fee)
+
+def cached_contract(name, address, abi):
+    # Same as Contract.from_abi but builds the handle once per process
+    key = (str(address).lower(), id(abi))
+    with contractCacheLock:
+        entry = contractCache.get(key)
+        if entry != None:
+            contractCache.move_to_end(key)
+            return entry[1]
+    handle = Contract.from_abi(name, address, abi)
+    with contractCacheLock:
+        contractCache[key] = (abi, handle)
+        while len(contractCache) > CONTRACT_CACHE_SIZE:
+            contractCache.popitem(last = False)
+    return handle
+
+def erc20_from_address(address):
+    return cached_contract("ERC20", address, MockERC20.abi)
+
+def list_exchanges(factory, pageSize = 500, block = None):
+    # [(exchange, token)] in the order the factory added them, one getExchanges call per pageSize exchanges
+    pairs = []
+    while True:
+        exchanges, tokens = factory.getExchanges(len(pairs), pageSize, block_identifier = block)
+        pairs += zip(exchanges, tokens)
+        if len(exchanges) < pageSize:
+            return pairs
+
+def warm_contract_cache(factory, pageSize = 500):
+    # Builds the handles of every exchange listed by the factory and of their tokens, returns how many exchanges
+    pairs = list_exchanges(factory, pageSize)
+    for exchangeAddress, tokenAddress in pairs:
+        cached_contract("AstroSwapExchange", exchangeAddress, AstroSwapExchange.abi)
+        erc20_from_address(tokenAddress)
+    return len(pairs)
 
 def approve_transfer(tokenAddress, outputAddress, account, amount):
     print("Approving to:", tokenAddress)
-    ercAbi = MockERC20.abi
-    erc20Contract = Contract.from_abi("ERC20", tokenAddress, ercAbi)
+    erc20Contract = erc20_from_address(tokenAddress)
     approveTx = erc20Contract.approve(outputAddress, amount, {'from': account})
     approveTx.wait(1)
     print("Approved transfer", approveTx.events)
\ No newline at end of file
@@ -0,0 +1,171 @@
+from brownie import web3, AstroSwapFactory, AstroSwapExchange, MiniSwap
+import eth_event
+import sqlite3
+import json
+
+# Streams the factory, exchange and MiniSwap logs into SQLite
+# Progress is checkpointed after every block range and the last block hashes are kept so a reorg only rolls back what changed.
+
+INDEXED_EVENTS = ["TokenExchangeAdded", "TokenPurchase", "EthPurchase", "TokenToTokenOut", "TokenToToken", "Investment", "Divestment"]
+ADDRESS_BATCH = 500 # Max addresses per eth_getLogs filter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    token TEXT,
+    name TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_block ON events (block_number);
+CREATE INDEX IF NOT EXISTS events_name ON events (name, address);
+CREATE TABLE IF NOT EXISTS exchanges (
+    address TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    block_number INTEGER NOT NULL
+);
+"""
+
+def _hex(value):
+    if isinstance(value, str):
+        return value if value.startswith("0x") else "0x" + value
+    return "0x" + bytes(value).hex()
+
+def _topic_map():
+    topicMap = {}
+    for abi in (AstroSwapFactory.abi, AstroSwapExchange.abi, MiniSwap.abi):
+        for topic, event in eth_event.get_topic_map(abi).items():
+            if event["name"] in INDEXED_EVENTS:
+                topicMap[topic] = event
+    return topicMap
+
+class Indexer:
+    def __init__(self, factoryAddress, miniSwapAddresses = (), dbPath = "astroswap_index.sqlite", startBlock = 0, blockRange = 5000, confirmations = 0, reorgDepth = 64):
+        self.factoryAddress = web3.toChecksumAddress(factoryAddress)
+        self.miniSwapAddresses = [web3.toChecksumAddress(address) for address in miniSwapAddresses]
+        self.startBlock = startBlock
+        self.blockRange = blockRange
+        self.confirmations = confirmations
+        self.reorgDepth = reorgDepth
+        self.topicMap = _topic_map()
+        self.db = sqlite3.connect(dbPath)
+        self.db.executescript(SCHEMA)
+        self.exchanges = dict(self.db.execute("SELECT address, token FROM exchanges"))
+
+    @property
+    def checkpoint(self):
+        row = self.db.execute("SELECT block_number FROM checkpoint WHERE id = 1").fetchone()
+        return row[0] if row else self.startBlock - 1
+
+    def sync(self, toBlock = None):
+        # Index everything up to toBlock (default: the head minus confirmations), returns the new checkpoint
+        if toBlock == None: toBlock = web3.eth.block_number - self.confirmations
+        self.handle_reorg()
+        start = self.checkpoint + 1
+        while start <= toBlock:
+            end = min(start + self.blockRange - 1, toBlock)
+            try:
+                self._index_range(start, end)
+            except ValueError:
+                # Nodes refuse ranges with too many results, retry with a smaller range
+                if end == start: raise
+                self.blockRange = max(1, self.blockRange // 2)
+                continue
+            start = end + 1
+        return self.checkpoint
+
+    def handle_reorg(self):
+        # Walk back the stored hashes until one still matches the chain, then drop everything after it
+        rows = self.db.execute("SELECT number, hash FROM blocks ORDER BY number DESC").fetchall()
+        if not rows:
+            return None
+        for number, blockHash in rows:
+            if _hex(web3.eth.get_block(number)["hash"]) == blockHash:
+                if number == rows[0][0]:
+                    return None
+                self._rollback(number)
+                return number
+        self._rollback(self.startBlock - 1)
+        return self.startBlock - 1
+
+    def _rollback(self, blockNumber):
+        print("Reorg detected, rolling back to block", blockNumber)
+        with self.db:
+            self.db.execute("DELETE FROM events WHERE block_number > ?", (blockNumber,))
+            self.db.execute("DELETE FROM exchanges WHERE block_number > ?", (blockNumber,))
+            self.db.execute("DELETE FROM blocks WHERE number > ?", (blockNumber,))
+            self.db.execute("INSERT OR REPLACE INTO checkpoint (id, block_number) VALUES (1, ?)", (blockNumber,))
+        self.exchanges = dict(self.db.execute("SELECT address, token FROM exchanges"))
+
+    def _get_logs(self, start, end, addresses):
+        logs = []
+        for i in range(0, len(addresses), ADDRESS_BATCH):
+            logs += web3.eth.get_logs({"fromBlock": start, "toBlock": end, "address": addresses[i:i + ADDRESS_BATCH], "topics": [list(self.topicMap)]})
+        return logs
+
+    def _decode(self, log):
+        event = eth_event.decode_log({"address": log["address"], "topics": [_hex(topic) for topic in log["topics"]], "data": _hex(log["data"])}, self.topicMap)
+        args = {}
+        for item in event["data"]:
+            value = item["value"]
+            args[item["name"]] = web3.toChecksumAddress(value) if item["type"] == "address" else value
+        return event["name"], args
+
+    def _index_range(self, start, end):
+        # Factory first so exchanges created in this range are included in the second request
+        rows = []
+        newExchanges = []
+        for log in self._get_logs(start, end, [self.factoryAddress]):
+            name, args = self._decode(log)
+            if name == "TokenExchangeAdded":
+                newExchanges.append((args["tokenExchange"], args["tokenAddress"], log["blockNumber"]))
+                self.exchanges[args["tokenExchange"]] = args["tokenAddress"]
+                rows.append(self._row(log, name, args, args["tokenAddress"]))
+        for log in self._get_logs(start, end, list(self.exchanges) + self.miniSwapAddresses):
+            name, args = self._decode(log)
+            address = web3.toChecksumAddress(log["address"])
+            # MiniSwap events carry the token address in their exchange field
+            token = args["exchange"] if address in self.miniSwapAddresses else self.exchanges[address]
+            rows.append(self._row(log, name, args, token))
+        endHash = _hex(web3.eth.get_block(end)["hash"])
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO exchanges (address, token, block_number) VALUES (?, ?, ?)", newExchanges)
+            self.db.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.executemany("INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)", set((row[0], row[1]) for row in rows) | {(end, endHash)})
+            self.db.execute("DELETE FROM blocks WHERE number <= ?", (end - self.reorgDepth,))
+            self.db.execute("INSERT OR REPLACE INTO checkpoint (id, block_number) VALUES (1, ?)", (end,))
+
+    def _row(self, log, name, args, token):
+        # uint256 values don't fit in a SQLite integer, they are kept exact in the JSON args
+        return (log["blockNumber"], _hex(log["blockHash"]), _hex(log["transactionHash"]), log["logIndex"], web3.toChecksumAddress(log["address"]), token, name, json.dumps(args))
+
+    def events(self, name = None, address = None, token = None, fromBlock = 0, toBlock = None):
+        # Returns (block_number, log_index, address, token, name, args) in chain order
+        query = "SELECT block_number, log_index, address, token, name, args FROM events WHERE block_number >= ?"
+        params = [fromBlock]
+        if toBlock != None:
+            query += " AND block_number <= ?"
+            params.append(toBlock)
+        for column, value in (("name", name), ("address", address), ("token", token)):
+            if value != None:
+                query += " AND " + column + " = ?"
+                params.append(value)
+        query += " ORDER BY block_number, log_index"
+        return [(row[0], row[1], row[2], row[3], row[4], json.loads(row[5])) for row in self.db.execute(query, params)]
+
+def main():
+    indexer = Indexer(AstroSwapFactory[-1].address, [miniSwap.address for miniSwap in MiniSwap])
+    checkpoint = indexer.sync()
+    print("Indexed up to block", checkpoint, "Exchanges:", len(indexer.exchanges), "Events:", indexer.db.execute("SELECT COUNT(*) FROM events").fetchone()[0])
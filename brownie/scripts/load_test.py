@@ -0,0 +1,225 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import exchange_from_address
+from scripts.runAstroFactory import deploy_new_exchanges, pipelineGasLimit
+from scripts.tx_pipeline import TxPipeline
+from brownie import network, config, AstroSwapFactory, MiniSwap, MockERC20Supply
+from concurrent.futures import ThreadPoolExecutor
+import random
+import math
+import json
+import time
+import os
+
+# Load generator: traders and LPs hammering factory exchanges and a MiniSwap with the same tokens on a local chain
+# Every actor is its own account and thread and sends its next op once the last one has its receipt, like a real user.
+# Reports TPS, submission to receipt latency percentiles, gas per operation and revert rates, and writes them to reports/
+# - brownie run scripts/load_test.py                             -> default run (LOAD_* env vars override the config)
+# - brownie run scripts/load_test.py compare old.json new.json   -> two reports side by side
+# Dev chains have 10 accounts, account 1 funds and seeds everything so traders + lps can be at most 9.
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "reports")
+fee = 400
+LOAD_GAS_LIMIT = 500000 # Fixed so a revert costs a mined transaction instead of failing gas estimation
+LOAD_MIX = {"ethToToken": 30, "tokenToEth": 30, "tokenToToken": 20, "invest": 10, "divest": 10}
+LP_OPS = ("invest", "divest")
+ACTOR_TOKENS = 10**24 # Per actor and token, a trade sells at most 10**19
+SEED_ETH = 10*10**18
+SEED_TOKENS = 1000*10**18
+
+def default_config():
+    return {
+        "traders": int(os.environ.get("LOAD_TRADERS", 6)),
+        "lps": int(os.environ.get("LOAD_LPS", 2)),
+        "exchanges": int(os.environ.get("LOAD_EXCHANGES", 4)),
+        "opsPerActor": int(os.environ.get("LOAD_OPS", 50)),
+        "mix": dict(LOAD_MIX),
+        "seed": int(os.environ.get("LOAD_SEED", 0)),
+    }
+
+def _trade_size(rng):
+    # 0.0001 to 0.1 ETH, log uniform, tokens are worth 1/100 ETH at the seed price
+    return 10**rng.randint(14, 16) * rng.randint(1, 10)
+
+class LoadVenue:
+    # One place to trade: a factory exchange per token, or MiniSwap
+    def __init__(self, name, tokens, exchanges = None, miniSwap = None):
+        self.name = name
+        self.tokens = tokens
+        self.exchanges = exchanges
+        self.miniSwap = miniSwap
+
+    def spender(self, i):
+        return self.exchanges[i].address if self.exchanges != None else self.miniSwap.address
+
+    def send(self, function, actor, i, j, amount, params):
+        params = dict(params, **{'from': actor})
+        token, other = self.tokens[i].address, self.tokens[j].address
+        if self.exchanges != None:
+            exchange = self.exchanges[i]
+            if function == "ethToToken": return exchange.ethToToken(actor.address, 0, dict(params, value = amount))
+            if function == "tokenToEth": return exchange.tokenToEth(actor.address, amount * 100, 0, params)
+            if function == "tokenToToken": return exchange.tokenToToken(actor.address, other, amount * 100, 0, params)
+            if function == "invest": return exchange.invest(2**256 - 1, dict(params, value = amount))
+            return exchange.divest(exchange.getShares(actor.address) // 10, params)
+        if function == "ethToToken": return self.miniSwap.ethToToken(token, actor.address, 0, dict(params, value = amount))
+        if function == "tokenToEth": return self.miniSwap.tokenToEth(token, actor.address, amount * 100, 0, params)
+        if function == "tokenToToken": return self.miniSwap.tokenToToken(token, actor.address, other, amount * 100, 0, params)
+        if function == "invest": return self.miniSwap.invest(token, 2**256 - 1, dict(params, value = amount))
+        return self.miniSwap.divest(token, self.miniSwap.getShares(token, actor.address) // 10, params)
+
+def setup_venues(exchangeCount, actors):
+    # Factory + exchangeCount exchanges and a MiniSwap on the same tokens, all seeded at 1 ETH = 100 tokens
+    # Every actor gets tokens and approves both venues, through pipelines so setup doesn't wait on every transaction
+    account = smart_get_account(1)
+    # MockERC20 only mints 10**24, enough for the seeds but not for every actor's grant
+    supply = ACTOR_TOKENS * len(actors) + 2 * SEED_TOKENS
+    tokens = [MockERC20Supply.deploy("load" + str(i), supply, {'from': account}) for i in range(exchangeCount)]
+    factory = AstroSwapFactory.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+    created = deploy_new_exchanges(factory, [token.address for token in tokens])
+    exchanges = [exchange_from_address(created[token.address]) for token in tokens]
+    miniSwap = MiniSwap.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+    venues = [LoadVenue("AstroSwapExchange", tokens, exchanges = exchanges), LoadVenue("MiniSwap", tokens, miniSwap = miniSwap)]
+    pipeline = TxPipeline(account)
+    for i, token in enumerate(tokens):
+        for venue in venues:
+            pipeline.add(token.approve, venue.spender(i), 2**256 - 1)
+        pipeline.add(exchanges[i].seedInvest, SEED_TOKENS, value = SEED_ETH, gasLimit = pipelineGasLimit)
+        pipeline.add(miniSwap.seedInvest, token.address, SEED_TOKENS, value = SEED_ETH, gasLimit = pipelineGasLimit)
+        for actor in actors:
+            if actor != account:
+                pipeline.add(token.transfer, actor, ACTOR_TOKENS)
+    pipeline.run()
+    pipeline.close()
+    for actor in actors:
+        if actor == account:
+            continue
+        pipeline = TxPipeline(actor)
+        for i, token in enumerate(tokens):
+            for venue in venues:
+                pipeline.add(token.approve, venue.spender(i), 2**256 - 1)
+        pipeline.run()
+        pipeline.close()
+    return venues
+
+def plan_ops(config, venues):
+    # [(actor index, function, venue, token index, other token index, amount)] per actor, deterministic for a seed
+    rng = random.Random(config["seed"])
+    tokenCount = len(venues[0].tokens)
+    plans = []
+    for a in range(config["traders"] + config["lps"]):
+        isLp = a >= config["traders"]
+        names = [name for name, weight in config["mix"].items() if (name in LP_OPS) == isLp for k in range(weight)]
+        plan = []
+        for k in range(config["opsPerActor"]):
+            i = rng.randrange(tokenCount)
+            j = (i + rng.randrange(1, tokenCount)) % tokenCount if tokenCount > 1 else i
+            plan.append((a, rng.choice(names), rng.choice(venues), i, j, _trade_size(rng)))
+        plans.append(plan)
+    return plans
+
+def _run_actor(actor, plan):
+    # Returns [(operation, submitted, received, gas used, reverted)], times from time.perf_counter
+    samples = []
+    params = {'gas_limit': LOAD_GAS_LIMIT, 'allow_revert': True, 'required_confs': 0}
+    for _, function, venue, i, j, amount in plan:
+        submitted = time.perf_counter()
+        try:
+            tx = venue.send(function, actor, i, j, amount, params)
+            tx.wait(1)
+            gasUsed, reverted = tx.gas_used, tx.status != 1
+        except Exception:
+            gasUsed, reverted = None, True
+        samples.append((venue.name + "." + function, submitted, time.perf_counter(), gasUsed, reverted))
+    return samples
+
+def percentile(values, p):
+    # Nearest rank, values don't need to be sorted
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered), math.ceil(p * len(ordered) / 100)) - 1)]
+
+def _latency_stats(latencies):
+    stats = {name: percentile(latencies, p) for name, p in (("p50", 50), ("p90", 90), ("p99", 99))}
+    stats["max"] = max(latencies) if latencies else None
+    return stats
+
+def summarize(samples, seconds):
+    # samples are the _run_actor tuples, latencies are in milliseconds
+    operations = {}
+    for name, submitted, received, gasUsed, reverted in samples:
+        operations.setdefault(name, []).append(((received - submitted) * 1000, gasUsed, reverted))
+    report = {
+        "seconds": round(seconds, 3),
+        "ops": len(samples),
+        "reverted": sum(1 for sample in samples if sample[4]),
+        "tps": round(sum(1 for sample in samples if not sample[4]) / seconds, 2) if seconds > 0 else None,
+        "latencyMs": _latency_stats([(received - submitted) * 1000 for _, submitted, received, _, _ in samples]),
+        "operations": {},
+    }
+    report["revertRate"] = round(report["reverted"] / report["ops"], 4) if samples else None
+    for name, rows in sorted(operations.items()):
+        gas = [gasUsed for _, gasUsed, reverted in rows if gasUsed != None and not reverted]
+        reverts = sum(1 for row in rows if row[2])
+        report["operations"][name] = {
+            "count": len(rows),
+            "revertRate": round(reverts / len(rows), 4),
+            "gasAvg": sum(gas) // len(gas) if gas else None,
+            "gasMax": max(gas) if gas else None,
+            "latencyMs": _latency_stats([row[0] for row in rows]),
+        }
+    return report
+
+def run_load(config = None):
+    if config == None: config = default_config()
+    if config["traders"] + config["lps"] > 9:
+        raise Exception("At most 9 traders + lps on a dev chain")
+    actors = [smart_get_account(a + 1) for a in range(config["traders"] + config["lps"])]
+    venues = setup_venues(config["exchanges"], actors)
+    plans = plan_ops(config, venues)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = len(actors)) as executor:
+        results = list(executor.map(_run_actor, actors, plans))
+    seconds = time.perf_counter() - start
+    report = summarize([sample for samples in results for sample in samples], seconds)
+    report["config"] = config
+    report["network"] = network.show_active()
+    report["started"] = int(time.time() - seconds)
+    return report
+
+def write_report(report, path = None):
+    if path == None:
+        os.makedirs(REPORTS_DIR, exist_ok = True)
+        path = os.path.join(REPORTS_DIR, "load_" + str(report["started"]) + ".json")
+    with open(path, "w") as f:
+        f.write(json.dumps(report, indent = 2, sort_keys = True) + "\n")
+    print("Wrote", path)
+    return path
+
+def print_report(report):
+    print(report["ops"], "ops in", report["seconds"], "s:", report["tps"], "TPS,", str(report["revertRate"] * 100) + "% reverted")
+    print("Latency ms p50/p90/p99/max:", report["latencyMs"]["p50"], report["latencyMs"]["p90"], report["latencyMs"]["p99"], report["latencyMs"]["max"])
+    print("operation".ljust(32), "count".rjust(6), "reverts".rjust(8), "gas avg".rjust(9), "p50 ms".rjust(9), "p99 ms".rjust(9))
+    for name, stats in report["operations"].items():
+        print(name.ljust(32), str(stats["count"]).rjust(6), (str(round(stats["revertRate"] * 100, 1)) + "%").rjust(8), str(stats["gasAvg"]).rjust(9), str(round(stats["latencyMs"]["p50"], 1)).rjust(9), str(round(stats["latencyMs"]["p99"], 1)).rjust(9))
+
+def compare_reports(old, new):
+    # [(metric, old, new)] for the headline numbers and the gas of every operation in both
+    rows = [("tps", old["tps"], new["tps"]), ("revertRate", old["revertRate"], new["revertRate"])]
+    rows += [("latency " + p, old["latencyMs"][p], new["latencyMs"][p]) for p in ("p50", "p90", "p99")]
+    rows += [(name + " gas", old["operations"][name]["gasAvg"], new["operations"][name]["gasAvg"]) for name in new["operations"] if name in old["operations"]]
+    return rows
+
+def compare(oldPath, newPath):
+    with open(oldPath, "r") as f:
+        old = json.load(f)
+    with open(newPath, "r") as f:
+        new = json.load(f)
+    for metric, before, after in compare_reports(old, new):
+        print(metric.ljust(40), str(before).rjust(14), str(after).rjust(14))
+
+def main():
+    report = run_load()
+    print_report(report)
+    write_report(report)
+    return report
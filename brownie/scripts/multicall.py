@@ -0,0 +1,87 @@
+from scripts.helpers import smart_get_account, cached_contract, list_exchanges
+from brownie import network, config, web3, AstroSwapMulticall, AstroSwapExchange, MiniSwap
+from brownie.network.contract import Contract
+
+EXCHANGE_FIELDS = ["token", "feeAmmount", "ethPool", "tokenPool", "invariant", "totalShares"]
+POOL_STATE_FIELDS = ["ethPool", "tokenPool", "invariant", "feeAmmount", "totalShares"] # getPoolState's outputs in order
+
+def deploy_multicall():
+    account = smart_get_account(1)
+    print("account:", account)
+    multicall = AstroSwapMulticall.deploy(
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+        )
+    print("AstroSwapMulticall@", multicall)
+    return multicall
+
+class Multicall:
+    # Queue up view calls with add() then run them all in one eth_call with call()
+    def __init__(self, aggregator = None):
+        if aggregator == None: aggregator = AstroSwapMulticall[-1]
+        self.aggregator = aggregator
+        self.calls = []
+        self.blockNumber = None
+
+    def add(self, contractCall, *args, target = None):
+        # contractCall is a brownie view method (ex: exchange.ethPool)
+        # Passing a target reuses one handle's ABI for many contracts, calldata is the same for every exchange
+        if target == None: target = contractCall._address
+        self.calls.append((target, contractCall, args))
+        return len(self.calls) - 1
+
+    def call(self, allowFailure = False, block = None):
+        # Returns the decoded results in the order they were added, failed calls are None when allowFailure is set
+        payload = [(target, contractCall.encode_input(*args)) for target, contractCall, args in self.calls]
+        if allowFailure:
+            self.blockNumber, results = self.aggregator.tryAggregate(payload, block_identifier = block)
+            decoded = [contractCall.decode_output(data) if success else None for (_, contractCall, _), (success, data) in zip(self.calls, results)]
+        else:
+            self.blockNumber, results = self.aggregator.aggregate(payload, block_identifier = block)
+            decoded = [contractCall.decode_output(data) for (_, contractCall, _), data in zip(self.calls, results)]
+        self.calls = []
+        return decoded
+
+def exchange_snapshot(exchangeAddresses, aggregator = None, block = None):
+    # Reads every field get_exchange_info prints for all the exchanges in one request (token + getPoolState per exchange)
+    multicall = Multicall(aggregator)
+    template = cached_contract("AstroSwapExchange", exchangeAddresses[0], AstroSwapExchange.abi) if exchangeAddresses else None
+    for address in exchangeAddresses:
+        multicall.add(template.token, target = address)
+        multicall.add(template.getPoolState, target = address)
+    results = multicall.call(block = block)
+    snapshot = {}
+    for i, address in enumerate(exchangeAddresses):
+        state = dict(zip(POOL_STATE_FIELDS, results[2 * i + 1]))
+        state["token"] = results[2 * i]
+        snapshot[address] = {field: state[field] for field in EXCHANGE_FIELDS}
+    return snapshot, multicall.blockNumber
+
+def factory_snapshot(factory, tokenAddresses = None, aggregator = None, block = None):
+    # Two requests for a whole factory: resolve the exchanges, then read them
+    # Without tokenAddresses every exchange of the factory is read, listed with getExchanges
+    if tokenAddresses == None:
+        if block == None: block = web3.eth.block_number # Pin the listing and the reads to the same block
+        return exchange_snapshot([exchange for exchange, token in list_exchanges(factory, block = block)], aggregator, block)
+    multicall = Multicall(aggregator)
+    for tokenAddress in tokenAddresses:
+        multicall.add(factory.tokenToExchange, tokenAddress)
+    exchangeAddresses = [address for address in multicall.call(block = block) if int(address, 16) != 0]
+    return exchange_snapshot(exchangeAddresses, aggregator, block)
+
+def miniswap_snapshot(tokenAddresses, miniSwap = None, aggregator = None, block = None):
+    if miniSwap == None: miniSwap = MiniSwap[-1]
+    multicall = Multicall(aggregator)
+    multicall.add(miniSwap.feeRate)
+    for tokenAddress in tokenAddresses:
+        multicall.add(miniSwap.exchanges, tokenAddress)
+    results = multicall.call(block = block)
+    snapshot = {}
+    for tokenAddress, (token, ethPool, tokenPool, totalShares) in zip(tokenAddresses, results[1:]):
+        snapshot[tokenAddress] = {"token": token, "feeRate": results[0], "ethPool": ethPool, "tokenPool": tokenPool, "invariant": ethPool * tokenPool, "totalShares": totalShares}
+    return snapshot, multicall.blockNumber
+
+def main():
+    deploy_multicall()
+    snapshot, blockNumber = exchange_snapshot([exchange.address for exchange in AstroSwapExchange])
+    print("Snapshot at block", blockNumber, snapshot)
@@ -0,0 +1,133 @@
+from scripts.amm import Pool, SwapReverted
+from scripts.multicall import exchange_snapshot, miniswap_snapshot
+from scripts.indexer import Indexer
+from brownie import AstroSwapFactory, MiniSwap
+import hashlib
+
+# Local copy of every pool's reserves, loaded from one multicall snapshot and then kept current by replaying
+# the contract's own state transitions on each indexed event. No per block ethPool/tokenPool/invariant reads.
+# Pools are keyed by exchange address for factory exchanges and by (miniSwap address, token address) for MiniSwap.
+
+class PoolMirror:
+    def __init__(self, indexer, miniSwapTokens = (), aggregator = None, checkInterval = 100):
+        self.indexer = indexer
+        self.miniSwapTokens = list(miniSwapTokens)
+        self.aggregator = aggregator
+        self.checkInterval = checkInterval # Blocks between verify() reads of the chain, 0 to never check
+        self.pools = {}
+        self.block = None
+        self.lastCheck = None
+        self.drift = [] # (block, pool key, reason) for every event that didn't match the model
+        self.fees = {} # Contract address -> fee rate for pools created after the snapshot
+
+    def load(self):
+        # One snapshot at the indexer's checkpoint, events after it are replayed by update()
+        block = self.indexer.sync()
+        self.discover_miniswap_tokens(block)
+        self.pools = self._read_chain(block)
+        self.block = block
+        self.lastCheck = block
+        return self.pools
+
+    def discover_miniswap_tokens(self, toBlock = None):
+        # Every MiniSwap pool is seeded with an Investment event, so the indexed ones list the tokens to snapshot
+        for miniSwapAddress in self.indexer.miniSwapAddresses:
+            for blockNumber, logIndex, address, token, name, args in self.indexer.events(name = "Investment", address = miniSwapAddress, toBlock = toBlock):
+                if args["exchange"] not in self.miniSwapTokens: self.miniSwapTokens.append(args["exchange"])
+        return self.miniSwapTokens
+
+    def _read_chain(self, block):
+        pools = {}
+        snapshot, _ = exchange_snapshot(list(self.indexer.exchanges), self.aggregator, block)
+        for address, state in snapshot.items():
+            pools[address] = Pool(state["feeAmmount"], state["ethPool"], state["tokenPool"], state["totalShares"])
+        for miniSwapAddress in self.indexer.miniSwapAddresses:
+            snapshot, _ = miniswap_snapshot(self.miniSwapTokens, MiniSwap.at(miniSwapAddress), self.aggregator, block)
+            for token, state in snapshot.items():
+                pools[(miniSwapAddress, token)] = Pool(state["feeRate"], state["ethPool"], state["tokenPool"], state["totalShares"])
+        return pools
+
+    def update(self):
+        # Pull new events from the indexer and apply them, returns the block the mirror is now at
+        if self.block == None:
+            self.load()
+        checkpoint = self.indexer.sync()
+        for blockNumber, logIndex, address, token, name, args in self.indexer.events(fromBlock = self.block + 1, toBlock = checkpoint):
+            self.apply_event(blockNumber, address, name, args)
+        self.block = checkpoint
+        if self.checkInterval and checkpoint - self.lastCheck >= self.checkInterval:
+            self.verify()
+        return self.block
+
+    def _pool(self, address, args):
+        if address in self.indexer.miniSwapAddresses:
+            key = (address, args["exchange"])
+            if key not in self.pools:
+                self.pools[key] = Pool(self._fee(address, MiniSwap))
+                if args["exchange"] not in self.miniSwapTokens: self.miniSwapTokens.append(args["exchange"])
+            return key
+        if address not in self.pools:
+            # Created after the snapshot, starts empty with the factory's fee
+            self.pools[address] = Pool(self._fee(self.indexer.factoryAddress, AstroSwapFactory))
+        return address
+
+    def _fee(self, address, container):
+        if address not in self.fees:
+            self.fees[address] = container.at(address).feeRate()
+        return self.fees[address]
+
+    def apply_event(self, blockNumber, address, name, args):
+        if name == "TokenExchangeAdded":
+            self._pool(args["tokenExchange"], args)
+            return
+        key = self._pool(address, args)
+        pool = self.pools[key]
+        try:
+            if name == "Investment":
+                if pool.totalShares == 0:
+                    pool.seed_invest(args["user"], args["ethInvested"], args["tokensInvested"])
+                else:
+                    self._check(blockNumber, key, (args["tokensInvested"], args["sharesPurchased"]), pool.invest(args["user"], args["ethInvested"]))
+            elif name == "Divestment":
+                self._check(blockNumber, key, (args["ethDivested"], args["tokensDivested"]), pool.divest(args["user"], args["sharesBurned"]))
+            elif name == "TokenPurchase":
+                self._check(blockNumber, key, args["tokensOut"], pool.eth_to_token(args["ethIn"]))
+            elif name in ("EthPurchase", "TokenToTokenOut"):
+                # TokenToTokenOut is the sell side, the out exchange emits its own TokenPurchase
+                ethOut = args["ethOut"] if name == "EthPurchase" else args["ethTransfer"]
+                self._check(blockNumber, key, ethOut, pool.token_to_eth(args["tokensIn"]))
+            elif name == "TokenToToken":
+                # MiniSwap does both legs internally and only logs the ETH in the middle
+                self._check(blockNumber, key, args["ethTransfer"], pool.token_to_eth(args["tokensIn"]))
+                self.pools[self._pool(address, {"exchange": args["tokenExchangeAddress"]})].eth_to_token(args["ethTransfer"])
+        except SwapReverted as error:
+            self.drift.append((blockNumber, key, str(error)))
+
+    def _check(self, blockNumber, key, expected, modelled):
+        if expected != modelled:
+            self.drift.append((blockNumber, key, "Event " + str(expected) + " != model " + str(modelled)))
+
+    def digest(self, pools = None):
+        # Hash of the mirrored state, to compare two mirrors or log where one stood. It is not checked against the chain,
+        # the contracts keep no such hash: verify() is the on-chain check and reads every pool.
+        if pools == None: pools = self.pools
+        digest = hashlib.sha256()
+        for key in sorted(pools, key = str):
+            pool = pools[key]
+            digest.update(str((key, pool.ethPool, pool.tokenPool, pool.totalShares)).encode())
+        return digest.hexdigest()
+
+    def verify(self):
+        # One multicall at the mirror's block, pools that drifted are replaced with the chain's values
+        onChain = self._read_chain(self.block)
+        self.lastCheck = self.block
+        drifted = [key for key in onChain if key not in self.pools or (self.pools[key].ethPool, self.pools[key].tokenPool, self.pools[key].totalShares) != (onChain[key].ethPool, onChain[key].tokenPool, onChain[key].totalShares)]
+        for key in drifted:
+            self.drift.append((self.block, key, "Chain mismatch"))
+            self.pools[key] = onChain[key]
+        return drifted
+
+def main():
+    mirror = PoolMirror(Indexer(AstroSwapFactory[-1].address, [miniSwap.address for miniSwap in MiniSwap]))
+    mirror.load()
+    print("Mirroring", len(mirror.pools), "pools at block", mirror.block, "digest", mirror.digest())
@@ -0,0 +1,113 @@
+from scripts.pool_mirror import PoolMirror
+from scripts.indexer import Indexer
+from brownie import AstroSwapFactory, MiniSwap
+from math import isqrt
+
+# Values every LP position across all factory exchanges and MiniSwap pools from the indexed history, no per position calls
+# One pass over the indexed events replays the pools (see PoolMirror) and books every Investment/Divestment per investor,
+# then all positions are valued in one batch against the current reserves.
+# - value: what divest would pay out for the shares (same floors as the contract), valueEth prices the tokens at the pool
+# - fees: growth of sqrt(invariant) per share since the shares were bought, swap fees (and the +1 rounding) grow the invariant
+# - impermanent loss: value without the fees minus holding what was put in, both at the current price, in ETH
+# The history has to start before the pools were seeded (the Indexer's startBlock), pool keys are the PoolMirror ones.
+
+SCALE = 10**18 # Fixed point for liquidity per share
+
+def liquidity_per_share(pool):
+    if pool.totalShares == 0:
+        return 0
+    return isqrt(pool.ethPool * pool.tokenPool) * SCALE // pool.totalShares
+
+class PositionBook:
+    # (pool key, investor) -> [shares, ethIn, tokensIn, entryLiquidity]
+    # ethIn and tokensIn are what is still invested (divests remove their share of it),
+    # entryLiquidity is the sum of shares * liquidity per share when they were bought
+    def __init__(self):
+        self.positions = {}
+
+    def invest(self, key, investor, shares, ethIn, tokensIn, pool):
+        position = self.positions.setdefault((key, investor), [0, 0, 0, 0])
+        position[0] += shares
+        position[1] += ethIn
+        position[2] += tokensIn
+        position[3] += shares * liquidity_per_share(pool)
+
+    def divest(self, key, investor, shares):
+        position = self.positions.get((key, investor))
+        if position == None or position[0] == 0:
+            return
+        shares = min(shares, position[0])
+        for i in (1, 2, 3):
+            position[i] -= position[i] * shares // position[0]
+        position[0] -= shares
+        if position[0] == 0:
+            del self.positions[(key, investor)]
+
+    def apply_event(self, key, name, args, pool):
+        # pool is the pool after the event
+        if name == "Investment":
+            self.invest(key, args["user"], args["sharesPurchased"], args["ethInvested"], args["tokensInvested"], pool)
+        elif name == "Divestment":
+            self.divest(key, args["user"], args["sharesBurned"])
+
+def value_positions(positions, pools):
+    # positions is PositionBook.positions, pools the current reserves by pool key
+    # Pool wide numbers are worked out once, every position is then a handful of integer operations
+    poolTerms = {}
+    for key, pool in pools.items():
+        if pool.totalShares > 0 and pool.tokenPool > 0:
+            poolTerms[key] = (pool.ethPool, pool.tokenPool, pool.totalShares, liquidity_per_share(pool))
+    rows = []
+    for (key, investor), (shares, ethIn, tokensIn, entryLiquidity) in positions.items():
+        if key not in poolTerms:
+            continue
+        ethPool, tokenPool, totalShares, liquidity = poolTerms[key]
+        ethOut = ethPool * shares // totalShares
+        tokensOut = tokenPool * shares // totalShares
+        valueEth = ethOut + tokensOut * ethPool // tokenPool
+        withoutFees = valueEth * entryLiquidity // (shares * liquidity) if liquidity > 0 else valueEth
+        hodlEth = ethIn + tokensIn * ethPool // tokenPool
+        rows.append({
+            "pool": key,
+            "investor": investor,
+            "shares": shares,
+            "ethOut": ethOut,
+            "tokensOut": tokensOut,
+            "valueEth": valueEth,
+            "feesEth": valueEth - withoutFees,
+            "hodlEth": hodlEth,
+            "impermanentLossEth": withoutFees - hodlEth,
+        })
+    return rows
+
+def by_investor(rows):
+    # {investor: {"positions", "valueEth", "feesEth", "impermanentLossEth"}}
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row["investor"], {"positions": 0, "valueEth": 0, "feesEth": 0, "impermanentLossEth": 0})
+        total["positions"] += 1
+        for field in ("valueEth", "feesEth", "impermanentLossEth"):
+            total[field] += row[field]
+    return totals
+
+def build_portfolio(indexer, pools = None):
+    # Returns (position rows, replayed mirror). pools are the current reserves, default the replayed ones,
+    # pass an up to date PoolMirror's pools to value against those instead
+    checkpoint = indexer.sync()
+    mirror = PoolMirror(indexer, checkInterval = 0)
+    book = PositionBook()
+    for blockNumber, logIndex, address, token, name, args in indexer.events(toBlock = checkpoint):
+        mirror.apply_event(blockNumber, address, name, args)
+        if name in ("Investment", "Divestment"):
+            key = (address, args["exchange"]) if address in indexer.miniSwapAddresses else address
+            book.apply_event(key, name, args, mirror.pools[key])
+    mirror.block = checkpoint
+    mirror.lastCheck = checkpoint
+    return value_positions(book.positions, pools if pools != None else mirror.pools), mirror
+
+def main():
+    indexer = Indexer(AstroSwapFactory[-1].address, [miniSwap.address for miniSwap in MiniSwap])
+    rows, mirror = build_portfolio(indexer)
+    print(len(rows), "positions in", len(mirror.pools), "pools at block", mirror.block)
+    for investor, total in by_investor(rows).items():
+        print(investor, total["positions"], "positions, value", total["valueEth"], "wei, fees", total["feesEth"], "wei, impermanent loss", total["impermanentLossEth"], "wei")
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+# Client side cache for the exchange quote views
+# Entries are keyed by (exchange, function, args, block) so a repeated quote inside one block costs no eth_call.
+# Any event that moves an exchange's pools drops that exchange's entries right away.
+
+QUOTE_FUNCTIONS = ["getEthToTokenQuote", "getTokenToEthQuote", "getTokenToTokenQuote"]
+INVALIDATING_EVENTS = ["TokenPurchase", "EthPurchase", "TokenToTokenOut", "TokenToToken", "Investment", "Divestment"]
+
+class QuoteCache:
+    def __init__(self, maxSize=4096, block=None):
+        self.maxSize = maxSize
+        self.block = block
+        self.entries = OrderedDict() # key -> quote, oldest first
+        self.byExchange = {} # exchange address -> set of keys
+        self.hits = 0
+        self.misses = 0
+
+    def set_block(self, block):
+        # Call on every new block (ex: from a block filter), quotes from older blocks are dropped
+        if block == self.block:
+            return
+        self.block = block
+        for key in [key for key in self.entries if key[3] != block]:
+            self._drop(key)
+
+    def quote(self, exchange, function, *args):
+        if function not in QUOTE_FUNCTIONS:
+            raise ValueError("Not a quote function: " + str(function))
+        key = (exchange.address, function, args, self.block)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        if self.block is None:
+            result = getattr(exchange, function)(*args)
+        else:
+            # Pin the call to the block we are keyed on so the entry can't mix two states
+            result = getattr(exchange, function)(*args, block_identifier=self.block)
+        self.entries[key] = result
+        self.byExchange.setdefault(exchange.address, set()).add(key)
+        while len(self.entries) > self.maxSize:
+            self._drop(next(iter(self.entries)))
+        return result
+
+    def invalidate(self, exchangeAddress):
+        for key in list(self.byExchange.get(exchangeAddress, ())):
+            self._drop(key)
+        # A tokenToToken quote also reads the out exchange, which we can't tell from the key without an extra call
+        for key in [key for key in self.entries if key[1] == "getTokenToTokenQuote"]:
+            self._drop(key)
+
+    def handle_event(self, exchangeAddress, eventName):
+        if eventName in INVALIDATING_EVENTS:
+            self.invalidate(exchangeAddress)
+
+    def handle_events(self, events):
+        # Takes decoded brownie events, ex: tx.events
+        for event in events:
+            self.handle_event(event.address, event.name)
+
+    def clear(self):
+        self.entries.clear()
+        self.byExchange.clear()
+
+    def _drop(self, key):
+        del self.entries[key]
+        keys = self.byExchange.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.byExchange[key[0]]
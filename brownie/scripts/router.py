@@ -0,0 +1,113 @@
+from scripts.amm import swap_output, SwapReverted
+from math import sqrt
+
+# Splits one trade across every pool trading the same pair (ex: the factory exchange and the MiniSwap pool)
+# The split starts from the closed form optimum of fee adjusted constant product pools (equal marginal price on
+# every used pool) and is then nudged with the exact contract math so the floors and the +1 rounding are accounted for.
+# pools are amm.Pool objects (or anything with ethPool, tokenPool and fee).
+
+def _leg_output(inPool, outPool, amount, fee):
+    if amount == 0:
+        return 0
+    try:
+        return swap_output(inPool, outPool, amount, fee)
+    except SwapReverted:
+        return None
+
+def _total_output(reserves, amounts):
+    total = 0
+    for (inPool, outPool, fee), amount in zip(reserves, amounts):
+        paid = _leg_output(inPool, outPool, amount, fee)
+        if paid is None:
+            return None
+        total += paid
+    return total
+
+def _continuous_split(reserves, amount):
+    # out_i(v) ~ g*T*v / (E + g*v) with g = 1 - 1/fee, every used pool ends at the same marginal output
+    # Pools are added from the best starting price until the next one would get a negative share
+    candidates = sorted((i for i, (inPool, outPool, fee) in enumerate(reserves) if inPool > 0 and outPool > 0 and fee > 1), key = lambda i: -(1 - 1 / reserves[i][2]) * reserves[i][1] / reserves[i][0])
+    shares = [0.0] * len(reserves)
+    active = []
+    for i in candidates:
+        trial = active + [i]
+        scale = (amount + sum(reserves[j][0] / (1 - 1 / reserves[j][2]) for j in trial)) / sum(sqrt(reserves[j][1] * reserves[j][0] / (1 - 1 / reserves[j][2])) for j in trial)
+        inPool, outPool, fee = reserves[i]
+        gain = 1 - 1 / fee
+        if scale * sqrt(gain * outPool * inPool) - inPool <= 0:
+            break
+        active = trial
+        for j in active:
+            inPool, outPool, fee = reserves[j]
+            gain = 1 - 1 / fee
+            shares[j] = (scale * sqrt(gain * outPool * inPool) - inPool) / gain
+    return shares
+
+def split_amount(reserves, amount, refineSteps = 24):
+    # reserves is a list of (inPool, outPool, fee), returns (totalOut, amounts) with sum(amounts) == amount
+    if not reserves or amount <= 0:
+        return 0, [0] * len(reserves)
+    shares = _continuous_split(reserves, amount)
+    total = sum(shares)
+    if total <= 0:
+        # Too small for float precision at pool scale, fall back to the best single pool
+        shares = [1.0 if i == 0 else 0.0 for i in range(len(reserves))]
+        total = 1.0
+    amounts = [int(amount * share / total) for share in shares]
+    amounts[max(range(len(amounts)), key = lambda i: amounts[i])] += amount - sum(amounts)
+    best = _total_output(reserves, amounts)
+    # Exact refinement: move shrinking chunks between legs while it pays more
+    step = max(1, amount // 1000)
+    for _ in range(refineSteps):
+        improved = False
+        for i in range(len(amounts)):
+            for j in range(len(amounts)):
+                if i == j or amounts[i] < step:
+                    continue
+                amounts[i] -= step
+                amounts[j] += step
+                output = _total_output(reserves, amounts)
+                if output is not None and (best is None or output > best):
+                    best = output
+                    improved = True
+                else:
+                    amounts[i] += step
+                    amounts[j] -= step
+        if not improved:
+            if step == 1:
+                break
+            step = max(1, step // 4)
+    # Never do worse than sending everything to the single best pool
+    for i, (inPool, outPool, fee) in enumerate(reserves):
+        single = _leg_output(inPool, outPool, amount, fee)
+        if single is not None and (best is None or single > best):
+            best = single
+            amounts = [amount if j == i else 0 for j in range(len(reserves))]
+    if best is None:
+        return 0, [0] * len(reserves)
+    return best, amounts
+
+def _legs(pools, amounts, outputs):
+    return [(pool, amountIn, amountOut) for pool, amountIn, amountOut in zip(pools, amounts, outputs) if amountIn > 0]
+
+def route_eth_to_token(pools, ethIn):
+    # Returns (tokensOut, [(pool, ethIn, tokensOut), ...]) for the legs that get a share
+    reserves = [(pool.ethPool, pool.tokenPool, pool.fee) for pool in pools]
+    total, amounts = split_amount(reserves, ethIn)
+    return total, _legs(pools, amounts, [_leg_output(inPool, outPool, amount, fee) or 0 for (inPool, outPool, fee), amount in zip(reserves, amounts)])
+
+def route_token_to_eth(pools, tokensIn):
+    # Returns (ethOut, [(pool, tokensIn, ethOut), ...])
+    reserves = [(pool.tokenPool, pool.ethPool, pool.fee) for pool in pools]
+    total, amounts = split_amount(reserves, tokensIn)
+    return total, _legs(pools, amounts, [_leg_output(inPool, outPool, amount, fee) or 0 for (inPool, outPool, fee), amount in zip(reserves, amounts)])
+
+def route_token_to_token(fromPools, toPools, tokensIn):
+    # The token -> ETH -> token path of tokenToToken, a fee is taken on each hop
+    # ETH is fungible between the hops so getting the most ETH out of the first hop is optimal for the second one
+    # Returns (tokensOut, sellLegs, buyLegs)
+    ethTransfer, sellLegs = route_token_to_eth(fromPools, tokensIn)
+    if ethTransfer == 0:
+        return 0, sellLegs, []
+    tokensOut, buyLegs = route_eth_to_token(toPools, ethTransfer)
+    return tokensOut, sellLegs, buyLegs
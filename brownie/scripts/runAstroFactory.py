@@ -1,9 +1,15 @@
 from scripts.helpers import smart_get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS, approve_transfer
-from brownie import network, accounts, config, AstroSwapExchange, AstroSwapFactory
+from brownie import network, accounts, config, web3, AstroSwapExchange, AstroSwapFactory, AstroSwapMulticall, MockERC20
 from brownie.network.contract import Contract
 from scripts.runAstroSwap import deploy_erc20, seed_invest, exchange_from_address
+from scripts.tx_pipeline import TxPipeline
+from scripts.trade_prep import prepare_token_to_token
+from scripts.amm import Pool
+from scripts.multicall import Multicall, deploy_multicall
 
 fee = 400
+blockGasHeadroom = 0.8 # Fraction of the block gas limit a bulk add may use
+pipelineGasLimit = 500000 # For pipelined transactions sent before the ones they depend on are mined
 
 def deploy_factory_contract():
     account = smart_get_account(1)
@@ -26,16 +32,56 @@ def deploy_new_exchange(factoryAddress, tokenAddress):
     print("TokenExchangeAddress:", tokenExchangeAddress)
     return tokenExchangeAddress
 
+def exchange_chunk_size(blockGasLimit, gasPerExchange, baseGas = 21000, headroom = blockGasHeadroom):
+    # How many exchanges fit in one addTokenExchanges call
+    return max(1, int((blockGasLimit * headroom - baseGas) // gasPerExchange))
+
+def chunk_tokens(tokenAddresses, chunkSize):
+    return [tokenAddresses[i:i + chunkSize] for i in range(0, len(tokenAddresses), chunkSize)]
+
+def deploy_new_exchanges(factoryAddress, tokenAddresses, chunkSize = None, aggregator = None):
+    # Creates exchanges for every token in as few transactions as the block gas limit allows
+    # Allready listed tokens are skipped by the factory, returns {token: exchange} for the new ones
+    account = smart_get_account(1)
+    print("account:", account)
+    # Listed tokens would be skipped anyway, dropping them first keeps them out of the chunks and the gas estimate
+    # One multicall for the whole list, not a request per token
+    # Only local networks get an aggregator deployed for this, elsewhere pass one (or have one deployed) or the factory skips them
+    if aggregator == None and len(AstroSwapMulticall) > 0: aggregator = AstroSwapMulticall[-1]
+    if aggregator == None and network.show_active() in LOCAL_BLOCKCHAIN_ENVIRONMENTS: aggregator = deploy_multicall()
+    unlisted = list(dict.fromkeys(str(token) for token in tokenAddresses))
+    if aggregator != None:
+        multicall = Multicall(aggregator)
+        for token in unlisted:
+            multicall.add(factoryAddress.convertTokenToExchange, token)
+        unlisted = [token for token, exchange in zip(unlisted, multicall.call()) if int(exchange, 16) == 0]
+    else:
+        print("No AstroSwapMulticall on", network.show_active(), "listed tokens are left to the factory to skip")
+    if len(unlisted) == 0:
+        return {}
+    if chunkSize == None:
+        gasPerExchange = factoryAddress.addTokenExchanges.estimate_gas([unlisted[0]], {'from': account}) - 21000
+        chunkSize = exchange_chunk_size(web3.eth.get_block("latest").gasLimit, gasPerExchange)
+    exchanges = {}
+    for chunk in chunk_tokens(unlisted, chunkSize):
+        forgeTx = factoryAddress.addTokenExchanges(chunk, {'from': account})
+        forgeTx.wait(1)
+        if "TokenExchangeAdded" in forgeTx.events:
+            for event in forgeTx.events["TokenExchangeAdded"]:
+                exchanges[event["tokenAddress"]] = event["tokenExchange"]
+        print("Added", forgeTx.return_value, "of", len(chunk), "exchanges")
+    return exchanges
+
 def get_factory_info(factory = None):
     if factory == None: factory = AstroSwapFactory[-1]
     print("Address:", factory.address, "Exchange count:", factory.exchangeCount())
 
-def tokenToToken(token1, token2, amount, factoryAddress):
+def tokenToToken(token1, token2, amount, factoryAddress, minTokensOut = 0):
     account = smart_get_account(1)
     print("account:", account)
     token1Exchange = factoryAddress.convertTokenToExchange(token1)
     exchange1 = exchange_from_address(token1Exchange)
-    token1ToToken2Tx = exchange1.tokenToToken(account, token2, amount, 0, {'from': account})
+    token1ToToken2Tx = exchange1.tokenToToken(account, token2, amount, minTokensOut, {'from': account})
     token1ToToken2Tx.wait(1)
     print("TTT Events:", token1ToToken2Tx.events)
 
@@ -50,17 +96,30 @@ def tokenToTokenQuote(token1, token2, amount, factoryAddress):
     print("TTT Quote:", quote)
     return quote
 
+def exchange_from_forge(forgeTx):
+    return exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"])
+
 def main():
-    erc20 = deploy_erc20()
-    factory = deploy_factory_contract()
-    tokenExchangeAddress = deploy_new_exchange(factory, erc20)
-    erc20_2 = deploy_erc20()
-    tokenExchangeAddress_2 = deploy_new_exchange(factory, erc20_2)
-    approve_transfer(erc20.address, tokenExchangeAddress, smart_get_account(1), 100)
-    approve_transfer(erc20_2.address, tokenExchangeAddress_2, smart_get_account(1), 100)
-    seed_invest(100, 100, exchange=exchange_from_address(tokenExchangeAddress))
-    seed_invest(100, 100, exchange=exchange_from_address(tokenExchangeAddress_2))
+    # Same flow as step by step, pipelined: every stage is sent back to back and only waits for the addresses it needs
+    account = smart_get_account(1)
+    print("account:", account)
+    pipeline = TxPipeline(account)
+    erc20 = pipeline.add(MockERC20.deploy, "0")
+    erc20_2 = pipeline.add(MockERC20.deploy, "1")
+    factory = pipeline.add(AstroSwapFactory.deploy, fee)
+    forges = []
+    for token in (erc20, erc20_2):
+        forges.append(pipeline.add_deferred(lambda factoryTx, tokenTx: (AstroSwapFactory.at(factoryTx.contract_address).addTokenExchange, (tokenTx.contract_address,)), after = [factory, token]))
+    # erc20 also gets the 20 tokens traded at the end approved
+    for token, forge, amount in ((erc20, forges[0], 120), (erc20_2, forges[1], 100)):
+        pipeline.add_deferred(lambda tokenTx, forgeTx, amount = amount: (MockERC20.at(tokenTx.contract_address).approve, (forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"], amount)), after = [token, forge])
+    for forge in forges:
+        pipeline.add_deferred(lambda forgeTx: (exchange_from_forge(forgeTx).seedInvest, (100,)), after = [forge], value = 100, gasLimit = pipelineGasLimit)
+    # Both pools are ours and only just seeded, so the trade is priced from their seeds without a quote call
+    expectedOut, minOut = prepare_token_to_token(Pool(fee, 100, 100), Pool(fee, 100, 100), 20)
+    trade = pipeline.add_deferred(lambda forgeTx, tokenTx: (exchange_from_forge(forgeTx).tokenToToken, (account.address, tokenTx.contract_address, 20, minOut)), after = [forges[0], erc20_2], gasLimit = pipelineGasLimit)
+    pipeline.run()
+    pipeline.close()
     print("Seed investments complete")
-    approve_transfer(erc20, tokenExchangeAddress, smart_get_account(1), 20)
-    tokenToTokenQuote(erc20, erc20_2, 20, factory)
-    tokenToToken(erc20, erc20_2, 20, factory)
+    print("TTT Events:", trade.tx.events, "expected", expectedOut, "min", minOut)
+    get_factory_info(AstroSwapFactory.at(factory.tx.contract_address))
@@ -1,4 +1,4 @@
-from scripts.helpers import smart_get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from scripts.helpers import smart_get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS, cached_contract
 from brownie import network, accounts, config, AstroSwapExchange, MockERC20
 from brownie.network.contract import Contract
 
@@ -8,8 +8,7 @@ tokenCounter = 0
 tokens = []
 
 def exchange_from_address(address):
-    exchangeAbi = AstroSwapExchange.abi
-    return Contract.from_abi("AstroSwapExchange", address, exchangeAbi)
+    return cached_contract("AstroSwapExchange", address, AstroSwapExchange.abi)
 
 def deploy_erc20():
     global tokenCounter
@@ -39,7 +38,8 @@ def deploy_exchage_contract(tokenAddress):
 
 def get_exchange_info(exchange = None):
     if exchange == None: exchange = AstroSwapExchange[-1]
-    print("Address:", exchange.address, "Token:", exchange.token() ,"Fee:", exchange.feeAmmount(), "ETH/ERC20:", exchange.ethPool(), "/", exchange.tokenPool(), "Invariant:", exchange.invariant())
+    ethPool, tokenPool, invariant, fee, totalShares = exchange.getPoolState()
+    print("Address:", exchange.address, "Token:", exchange.token() ,"Fee:", fee, "ETH/ERC20:", ethPool, "/", tokenPool, "Invariant:", invariant, "Shares:", totalShares)
 
 def seed_invest(eth, token, exchange = None):
     if exchange == None: exchange = AstroSwapExchange[-1]
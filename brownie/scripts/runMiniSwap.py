@@ -5,6 +5,12 @@ from brownie.network.contract import Contract
 
 fee = 400
 
+# Swap kinds for multiSwap, same as in MiniSwap.sol
+ETH_TO_TOKEN = 0
+TOKEN_TO_ETH = 1
+TOKEN_TO_TOKEN = 2
+zeroAddress = "0x0000000000000000000000000000000000000000"
+
 def deploy_mini_swap(fee):
     account = smart_get_account(1)
     print("account:", account)
@@ -22,20 +28,35 @@ def get_miniswap_info(miniSwap = None):
 
 def get_miniswap_exchange_info(token, miniSwap = None):
     if miniSwap == None: miniSwap = MiniSwap[-1]
-    print("Address:", miniSwap.address, "Exchange:", miniSwap.exchanges(token))
+    print("Address:", miniSwap.address, "Exchange:", miniSwap.exchanges(token), "State:", miniSwap.getPoolState(token))
 
 def miniswap_seed(token, miniSwap = None):
     if miniSwap == None: miniSwap = MiniSwap[-1]
     account = smart_get_account(1)
     print("account:", account)
-    approve_transfer(token, miniSwap.address, account, 100).wait(1)
+    approve_transfer(token, miniSwap.address, account, 100)
     investTx = miniSwap.seedInvest(token, 100, {'from': account, 'value': 100})
     print("Created exchange", investTx.events)
 
+def swap_instruction(kind, amountIn, tokenIn = zeroAddress, tokenOut = zeroAddress, minOut = 0):
+    return (kind, tokenIn, tokenOut, amountIn, minOut)
+
+def multi_swap(instructions, recipient = None, miniSwap = None):
+    # Runs all the instructions in one transaction, the ETH needed by the ETH_TO_TOKEN legs is sent with it
+    # Tokens sold must be approved for their net amount first
+    if miniSwap == None: miniSwap = MiniSwap[-1]
+    account = smart_get_account(1)
+    if recipient == None: recipient = account.address
+    ethIn = sum(instruction[3] for instruction in instructions if instruction[0] == ETH_TO_TOKEN)
+    swapTx = miniSwap.multiSwap(instructions, recipient, {'from': account, 'value': ethIn})
+    swapTx.wait(1)
+    print("Multi swap", swapTx.return_value)
+    return swapTx
+
 def main():
     deploy_erc20()
     deploy_mini_swap(fee)
     get_miniswap_info()
     get_miniswap_exchange_info(MockERC20[0].address)
-    create_miniswap_exchange(MockERC20[0].address)
+    miniswap_seed(MockERC20[0].address)
 
@@ -0,0 +1,59 @@
+from scripts.amm import eth_to_token, token_to_eth, token_to_token
+
+# Slippage protected trades priced from reserves we already have locally (a PoolMirror's pools, a snapshot,
+# or pools we just seeded ourselves), so preparing a trade costs no getXQuote round trip.
+# The expected output is the contract's exact math on those reserves, minOut is that less slippageBps basis points.
+# Every prepare function returns (expectedOut, minOut) and raises amm.SwapReverted if the trade would revert as priced.
+# pools are amm.Pool objects (or anything with ethPool, tokenPool and fee).
+
+BPS = 10000
+DEFAULT_SLIPPAGE_BPS = 50 # 0.5%
+
+def apply_slippage(expectedOut, slippageBps = DEFAULT_SLIPPAGE_BPS):
+    if slippageBps < 0 or slippageBps > BPS:
+        raise ValueError("Slippage must be between 0 and " + str(BPS) + " bps, got " + str(slippageBps))
+    return expectedOut * (BPS - slippageBps) // BPS
+
+def prepare_eth_to_token(pool, ethIn, slippageBps = DEFAULT_SLIPPAGE_BPS):
+    # minOut is the minTokensOut of ethToToken
+    tokensOut, _, _ = eth_to_token(pool.ethPool, pool.tokenPool, ethIn, pool.fee)
+    return tokensOut, apply_slippage(tokensOut, slippageBps)
+
+def prepare_token_to_eth(pool, tokensIn, slippageBps = DEFAULT_SLIPPAGE_BPS):
+    # minOut is the minEthOut of tokenToEth
+    ethOut, _, _ = token_to_eth(pool.ethPool, pool.tokenPool, tokensIn, pool.fee)
+    return ethOut, apply_slippage(ethOut, slippageBps)
+
+def prepare_token_to_token(fromPool, toPool, tokensIn, slippageBps = DEFAULT_SLIPPAGE_BPS):
+    # minOut is the minTokensOut of tokenToToken, both hops take their own pool's fee
+    tokensOut, _, _ = token_to_token((fromPool.ethPool, fromPool.tokenPool), (toPool.ethPool, toPool.tokenPool), tokensIn, fromPool.fee, toPool.fee)
+    return tokensOut, apply_slippage(tokensOut, slippageBps)
+
+class TradePreparer:
+    # Prepares trades against a dict of pools (ex: PoolMirror.pools, keyed by exchange or (miniSwap, token))
+    # With advance=True the cached pools move as if the trade landed, so trades sent back to back from one account
+    # (ex: through a TxPipeline) are each priced on top of the ones before them
+    def __init__(self, pools, slippageBps = DEFAULT_SLIPPAGE_BPS):
+        self.pools = pools
+        self.slippageBps = slippageBps
+
+    def _slippage(self, slippageBps):
+        return self.slippageBps if slippageBps == None else slippageBps
+
+    def eth_to_token(self, key, ethIn, slippageBps = None, advance = False):
+        pool = self.pools[key]
+        expected = prepare_eth_to_token(pool, ethIn, self._slippage(slippageBps))
+        if advance: pool.eth_to_token(ethIn)
+        return expected
+
+    def token_to_eth(self, key, tokensIn, slippageBps = None, advance = False):
+        pool = self.pools[key]
+        expected = prepare_token_to_eth(pool, tokensIn, self._slippage(slippageBps))
+        if advance: pool.token_to_eth(tokensIn)
+        return expected
+
+    def token_to_token(self, fromKey, toKey, tokensIn, slippageBps = None, advance = False):
+        fromPool, toPool = self.pools[fromKey], self.pools[toKey]
+        expected = prepare_token_to_token(fromPool, toPool, tokensIn, self._slippage(slippageBps))
+        if advance: toPool.eth_to_token(fromPool.token_to_eth(tokensIn))
+        return expected
@@ -0,0 +1,45 @@
+from scripts.multicall import Multicall
+from scripts.helpers import cached_contract
+from brownie import AstroSwapExchange
+
+# Time weighted average prices from the contracts' price accumulators, two reads per window whatever happened in it
+# (sampling ethPool/tokenPool every block takes one call per block, replaying events needs the whole history indexed)
+# A read is (tokenCumulative, ethCumulative, timestamp) from currentPriceCumulatives, pinned to a block.
+# Old blocks need an archive node, or keep your own reads (ex: one per hour) and compute windows between them.
+
+Q112 = 2**112
+
+def read_cumulatives(contract, tokenAddress = None, block = None):
+    # contract is an exchange, or MiniSwap with the tokenAddress of the pool
+    args = (tokenAddress,) if tokenAddress != None else ()
+    return tuple(contract.currentPriceCumulatives(*args, block_identifier = block))
+
+def read_many(exchangeAddresses, block = None, aggregator = None):
+    # One multicall for the accumulators of many exchanges: {address: read}
+    if not exchangeAddresses:
+        return {}
+    multicall = Multicall(aggregator)
+    template = cached_contract("AstroSwapExchange", exchangeAddresses[0], AstroSwapExchange.abi)
+    for address in exchangeAddresses:
+        multicall.add(template.currentPriceCumulatives, target = address)
+    return {address: tuple(read) for address, read in zip(exchangeAddresses, multicall.call(block = block))}
+
+def twap_fixed(first, second):
+    # (tokens per ETH, ETH per token) averaged between two reads, as 112 bit fixed point integers
+    elapsed = second[2] - first[2]
+    if elapsed <= 0:
+        raise ValueError("The second read must be later than the first")
+    return ((second[0] - first[0]) % 2**256) // elapsed, ((second[1] - first[1]) % 2**256) // elapsed
+
+def twap(first, second):
+    # Same as twap_fixed as floats
+    tokenPrice, ethPrice = twap_fixed(first, second)
+    return tokenPrice / Q112, ethPrice / Q112
+
+def twap_between_blocks(contract, fromBlock, toBlock = None, tokenAddress = None):
+    return twap(read_cumulatives(contract, tokenAddress, fromBlock), read_cumulatives(contract, tokenAddress, toBlock))
+
+def main():
+    exchange = AstroSwapExchange[-1]
+    first = read_cumulatives(exchange)
+    print("Accumulators:", first, "spot tokens per ETH:", exchange.tokenPool() / exchange.ethPool())
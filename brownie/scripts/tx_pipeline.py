@@ -0,0 +1,133 @@
+from scripts.helpers import smart_get_account
+from scripts.confirmations import ConfirmationTimeout
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Sends transactions back to back from one account instead of waiting for each one to confirm
+# Nonces are counted locally so every transaction is sent in the order it was added and lands in that order.
+# - add(method, *args) sends right away, method is any brownie transaction method or a ContractContainer's deploy
+# - add_deferred(build, after = [steps]) waits for the after steps to confirm then sends what build(*theirReceipts) returns,
+#   for transactions that need an address only known once something is mined (ex: the exchange from addTokenExchange)
+# - A transaction that only needs an earlier one to land first (ex: seedInvest after its approve) needs no after,
+#   the nonce order is enough. It does need a gasLimit though, gas estimation would run before the approve is mined.
+# - run() waits on all the receipts at once and raises if any transaction failed
+# Contracts deployed through the pipeline are not verified, use the normal deploy functions for that.
+# Pass a ConfirmationManager (scripts/confirmations.py) to have one watcher batch the receipts of every step
+# instead of a tx.wait per step, pipelines can share one.
+
+class PipelineStep:
+    def __init__(self, method, args, build, after, value, gasLimit):
+        self.method = method
+        self.args = args
+        self.build = build
+        self.after = list(after)
+        self.value = value
+        self.gasLimit = gasLimit
+        self.tx = None
+        self.receipt = None # Node receipt when a ConfirmationManager confirmed it
+        self.future = None
+        self.error = None
+        self.skipped = False
+
+    @property
+    def done(self):
+        return self.skipped or self.error != None or (self.future != None and self.future.done())
+
+    @property
+    def confirmed(self):
+        return self.future != None and self.future.done() and self.error == None and self.status == 1
+
+    @property
+    def status(self):
+        return self.receipt["status"] if self.receipt != None else self.tx.status
+
+    @property
+    def failed(self):
+        return self.done and not self.confirmed
+
+class TxPipeline:
+    def __init__(self, account = None, confirmations = 1, maxWorkers = 8, manager = None):
+        if account == None: account = smart_get_account(1)
+        self.account = account
+        self.manager = manager
+        self.confirmations = confirmations
+        self.nonce = account.nonce
+        self.steps = []
+        self.queue = [] # Steps not sent yet, in order
+        self.executor = ThreadPoolExecutor(max_workers = maxWorkers)
+
+    def add(self, method, *args, value = 0, gasLimit = None):
+        return self._schedule(PipelineStep(method, args, None, (), value, gasLimit))
+
+    def add_deferred(self, build, after, value = 0, gasLimit = None):
+        # build(*receipts of after) -> (method, args)
+        return self._schedule(PipelineStep(None, (), build, after, value, gasLimit))
+
+    def _schedule(self, step):
+        self.steps.append(step)
+        self.queue.append(step)
+        self._flush()
+        return step
+
+    def _flush(self):
+        # Sends queued steps in order until one has to wait for its after steps
+        while self.queue:
+            step = self.queue[0]
+            if any(dep.failed for dep in step.after):
+                step.skipped = True
+            elif not all(dep.confirmed for dep in step.after):
+                return
+            else:
+                self._send(step)
+            self.queue.pop(0)
+
+    def _send(self, step):
+        params = {'from': self.account, 'nonce': self.nonce, 'required_confs': 0}
+        if step.value: params['value'] = step.value
+        if step.gasLimit != None: params['gas_limit'] = step.gasLimit
+        try:
+            if step.build != None:
+                step.method, step.args = step.build(*[self._settled(dep.tx) for dep in step.after])
+            step.tx = step.method(*step.args, params)
+        except Exception as e:
+            # Nothing was broadcast (ex: gas estimation reverted), the nonce is still free
+            step.error = e
+            return
+        self.nonce += 1
+        if self.manager != None:
+            step.future = self.manager.track(step.tx.txid, self.confirmations, callback = lambda txid, receipt, error, step = step: self._confirmed(step, receipt, error))
+        else:
+            step.future = self.executor.submit(self._wait, step)
+
+    def _confirmed(self, step, receipt, error):
+        step.receipt = receipt
+        step.error = error
+
+    def _settled(self, tx):
+        # With a manager brownie still fills in its receipt (events, return value) from its own thread, that takes no request
+        # Its confirmation event is set once it did (or saw the transaction dropped), waited on up to the manager's timeout
+        if self.manager != None and not tx._confirmed.wait(self.manager.timeout):
+            raise ConfirmationTimeout(tx.txid + " confirmed but brownie never filled in its receipt")
+        return tx
+
+    def _wait(self, step):
+        try:
+            step.tx.wait(self.confirmations)
+        except Exception as e:
+            step.error = e
+
+    def run(self):
+        # Returns the steps once every transaction is confirmed or failed
+        self._flush()
+        while self.queue:
+            wait([dep.future for dep in self.queue[0].after if dep.future != None and not dep.future.done()], return_when = FIRST_COMPLETED)
+            self._flush()
+        wait([step.future for step in self.steps if step.future != None])
+        failed = [step for step in self.steps if step.failed]
+        for step in failed:
+            print("Failed:", step.method, step.args, "skipped, an after step failed" if step.skipped else step.error or step.tx)
+        if failed:
+            raise Exception(str(len(failed)) + " of " + str(len(self.steps)) + " pipelined transactions failed")
+        return self.steps
+
+    def close(self):
+        self.executor.shutdown(wait = True)
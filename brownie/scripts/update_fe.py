@@ -1,21 +1,89 @@
 import os
-import shutil 
+import hashlib
 import yaml
 import json
 
+# Syncs ./build into the front end's chain-info and brownie-config.yaml into its config.json
+# Only artifacts that changed since the last sync are written, chain-info/.manifest.json keeps the (mtime, size, sha256)
+# of every source file so an unchanged file isn't even read. Contract artifacts are cut down to what the front end uses.
+# Every file is written to a temp file and moved into place, so the front end never sees a half written file.
+
+FRONT_END = "../../astro-swap-front-end/src"
+MANIFEST_NAME = ".manifest.json"
+ARTIFACT_FIELDS = ["contractName", "abi", "bytecode"]
+
 def update_front_end():
-    copy_folders_to_front_end("./build", "../../astro-swap-front-end/src/chain-info")
+    written, removed = sync_artifacts("./build", os.path.join(FRONT_END, "chain-info"))
+    print("Synced chain-info:", written, "written,", removed, "removed")
     with open("brownie-config.yaml", "r") as f:
         config = yaml.load(f, Loader=yaml.FullLoader)
-        with open("../../astro-swap-front-end/src/config.json", "w") as f:
-            f.write(json.dumps(config))
+    if write_if_changed(os.path.join(FRONT_END, "config.json"), json.dumps(config).encode()):
         print("Updated front end config.")
 
-def copy_folders_to_front_end(src, dest):
-    if os.path.exists(dest):
-        shutil.rmtree(dest)
-    shutil.copytree(src, dest)
+def atomic_write(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+    tempPath = path + "." + str(os.getpid()) + ".tmp"
+    with open(tempPath, "wb") as f:
+        f.write(content)
+    os.replace(tempPath, path)
+
+def write_if_changed(path, content):
+    # Returns True if the file was written
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return False
+    atomic_write(path, content)
+    return True
+
+def strip_artifact(content):
+    # Brownie artifacts (anything with an abi) keep ARTIFACT_FIELDS, other files (ex: deployments/map.json) are copied as is
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(data, dict) or "abi" not in data:
+        return content
+    return json.dumps({field: data[field] for field in ARTIFACT_FIELDS if field in data}).encode()
+
+def load_manifest(dest):
+    path = os.path.join(dest, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def sync_artifacts(src, dest):
+    # Returns (files written, files removed)
+    manifest = load_manifest(dest)
+    newManifest = {}
+    written = 0
+    for root, dirs, files in os.walk(src):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, src)
+            stat = os.stat(path)
+            entry = manifest.get(relative)
+            target = os.path.join(dest, relative)
+            if entry != None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size and os.path.exists(target):
+                newManifest[relative] = entry
+                continue
+            with open(path, "rb") as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            newManifest[relative] = [stat.st_mtime_ns, stat.st_size, digest]
+            if entry != None and entry[2] == digest and os.path.exists(target):
+                continue # Touched but not changed
+            atomic_write(target, strip_artifact(content))
+            written += 1
+    removed = 0
+    for relative in manifest:
+        if relative not in newManifest and os.path.exists(os.path.join(dest, relative)):
+            os.remove(os.path.join(dest, relative))
+            removed += 1
+    if newManifest != manifest:
+        atomic_write(os.path.join(dest, MANIFEST_NAME), json.dumps(newManifest, sort_keys = True).encode())
+    return written, removed
 
 def main():
     update_front_end()
-
@@ -0,0 +1,100 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20, exchange_from_address
+from brownie import network, config, chain, AstroSwapExchange, AstroSwapFactory, MiniSwap
+import pytest
+
+# Shared test states, deployed once per session and reverted after every test
+# Brownie's fn_isolation can't be used here, its module_isolation resets the chain and would wipe the session deployments
+# - token, token2: two fresh ERC20s
+# - exchange: an AstroSwapExchange for token, nothing approved or seeded
+# - seeded_exchange: another AstroSwapExchange for token, seeded with 1 ETH and 100 tokens, no allowance left
+# - factory: an empty factory
+# - factory_pair: a factory with an exchange for token and token2, nothing approved or seeded
+# - seeded_factory_pair: same as factory_pair on another factory, both seeded with 1 ETH and 100 tokens
+# - miniswap: a MiniSwap with token and token2 approved for 10**27 and seeded with 1 ETH and 100 tokens each
+
+fee = 400
+
+@pytest.fixture(autouse = True)
+def isolation():
+    # Session fixtures are set up before this so they are part of the snapshot
+    chain.snapshot()
+    yield
+    chain.revert()
+
+@pytest.fixture(scope = "session")
+def account():
+    return smart_get_account(1)
+
+@pytest.fixture(scope = "session")
+def token(account):
+    return deploy_erc20()
+
+@pytest.fixture(scope = "session")
+def token2(account):
+    return deploy_erc20()
+
+def deploy_exchange(token, account):
+    return AstroSwapExchange.deploy(
+        token.address,
+        fee,
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+    )
+
+def deploy_factory(account):
+    return AstroSwapFactory.deploy(
+        fee,
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+    )
+
+def add_exchange(factory, token, account):
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
+    forgeTx.wait(1)
+    return exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"])
+
+def seed(token, exchange, account):
+    token.approve(exchange.address, 100*10**18, {'from': account}).wait(1)
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+
+@pytest.fixture(scope = "session")
+def exchange(token, account):
+    return deploy_exchange(token, account)
+
+@pytest.fixture(scope = "session")
+def seeded_exchange(token, account):
+    exchange = deploy_exchange(token, account)
+    seed(token, exchange, account)
+    return exchange
+
+@pytest.fixture(scope = "session")
+def factory(account):
+    return deploy_factory(account)
+
+@pytest.fixture(scope = "session")
+def factory_pair(token, token2, account):
+    # (factory, exchange for token, exchange for token2)
+    factory = deploy_factory(account)
+    return factory, add_exchange(factory, token, account), add_exchange(factory, token2, account)
+
+@pytest.fixture(scope = "session")
+def seeded_factory_pair(token, token2, account):
+    factory = deploy_factory(account)
+    exchange1 = add_exchange(factory, token, account)
+    exchange2 = add_exchange(factory, token2, account)
+    seed(token, exchange1, account)
+    seed(token2, exchange2, account)
+    return factory, exchange1, exchange2
+
+@pytest.fixture(scope = "session")
+def miniswap(token, token2, account):
+    miniSwap = MiniSwap.deploy(
+        fee,
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+    )
+    for erc20 in (token, token2):
+        erc20.approve(miniSwap.address, 10**27, {'from': account}).wait(1)
+        miniSwap.seedInvest(erc20.address, 100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    return miniSwap
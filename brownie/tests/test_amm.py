@@ -0,0 +1,123 @@
+from scripts.amm import swap_output, eth_to_token, token_to_eth, token_to_token, simulate_eth_to_token, simulate_token_to_eth, SwapReverted, Pool, MAX_RESERVE
+import pytest
+
+# All the AMM model tests
+# - Small pools match the worked examples
+# - 1e18 scale pools stay exact
+# - Zero sized trades revert like the contract
+# - Trades on empty pools revert
+# - minOut is enforced
+# - tokenToToken takes a fee on both sides
+# - Batch results match the single trade functions
+# - Batch marks reverted trades with None and keeps their pools
+# - Pool seeds, invests and divests like the exchange
+# - Pool refuses divesting more shares than owned
+# - Pools can't grow past uint112 like the contracts
+
+fee = 400
+
+def test_swap_output_small_pools():
+    assert swap_output(10, 500, 1, 400) == 45
+    assert swap_output(1000, 100000, 30, 10) == 2629
+
+def test_swap_output_wei_scale():
+    # Arrange
+    ethPool = 1*10**18 + 7
+    tokenPool = 100*10**18 + 3
+    ethIn = 10**17 + 11
+    # Act
+    tokensOut = swap_output(ethPool, tokenPool, ethIn, fee)
+    # Assert
+    expected = tokenPool - (ethPool * tokenPool // (ethPool + ethIn - ethIn // fee) + 1)
+    assert tokensOut == expected
+
+def test_swap_output_zero_trade_reverts():
+    with pytest.raises(SwapReverted):
+        swap_output(10**18, 10**20, 0, fee)
+
+def test_swap_output_no_liquidity_reverts():
+    with pytest.raises(SwapReverted):
+        swap_output(0, 0, 10**18, fee)
+
+def test_eth_to_token_min_out():
+    # Arrange
+    tokensOut, ethPool, tokenPool = eth_to_token(10**18, 100*10**18, 10**17, fee)
+    # Act & Assert
+    assert ethPool == 10**18 + 10**17
+    assert tokenPool == 100*10**18 - tokensOut
+    with pytest.raises(SwapReverted):
+        eth_to_token(10**18, 100*10**18, 10**17, fee, tokensOut + 1)
+
+def test_token_to_eth_pools():
+    ethOut, ethPool, tokenPool = token_to_eth(10**18, 100*10**18, 10**19, fee)
+    assert ethOut == swap_output(100*10**18, 10**18, 10**19, fee)
+    assert ethPool == 10**18 - ethOut
+    assert tokenPool == 110*10**18
+
+def test_token_to_token_two_fees():
+    # Arrange
+    fromPools = (10**18, 100*10**18)
+    toPools = (2*10**18, 50*10**18)
+    # Act
+    tokensOut, newFromPools, newToPools = token_to_token(fromPools, toPools, 10**19, fee, fee)
+    # Assert
+    ethTransfer = swap_output(fromPools[1], fromPools[0], 10**19, fee)
+    assert tokensOut == swap_output(toPools[0], toPools[1], ethTransfer, fee)
+    assert newFromPools == (10**18 - ethTransfer, 110*10**18)
+    assert newToPools == (2*10**18 + ethTransfer, 50*10**18 - tokensOut)
+
+def test_simulate_matches_single_trades():
+    # Arrange
+    ethPools = [10**18, 5*10**18, 10**20]
+    tokenPools = [100*10**18, 10**18, 3*10**22]
+    amounts = [10**17, 12345678901234567, 10**18]
+    # Act
+    outputs, newEthPools, newTokenPools = simulate_eth_to_token(ethPools, tokenPools, amounts, fee)
+    ethOuts, ethAfterSell, tokensAfterSell = simulate_token_to_eth(ethPools, tokenPools, amounts, fee)
+    # Assert
+    for i in range(3):
+        assert (outputs[i], newEthPools[i], newTokenPools[i]) == eth_to_token(ethPools[i], tokenPools[i], amounts[i], fee)
+        assert (ethOuts[i], ethAfterSell[i], tokensAfterSell[i]) == token_to_eth(ethPools[i], tokenPools[i], amounts[i], fee)
+
+def test_simulate_reverted_trades():
+    # One pool priced against many sizes, the zero trade and the capped trade revert
+    outputs, newEthPools, newTokenPools = simulate_eth_to_token(10**18, 100*10**18, [0, 10**17, 10**17], fee, [0, 0, 10**30])
+    assert outputs[0] is None and outputs[2] is None
+    assert outputs[1] == swap_output(10**18, 100*10**18, 10**17, fee)
+    assert newEthPools == [10**18, 11*10**17, 10**18]
+    assert newTokenPools == [100*10**18, 100*10**18 - outputs[1], 100*10**18]
+
+def test_pool_invest_divest():
+    # Arrange
+    pool = Pool(fee, investorShares = {})
+    pool.seed_invest("alice", 1*10**18, 100*10**18)
+    # Act
+    tokensInvested, sharesPurchased = pool.invest("bob", 5*10**17)
+    ethOut, tokensOut = pool.divest("alice", 5000)
+    # Assert
+    assert (tokensInvested, sharesPurchased) == (50*10**18, 5000)
+    assert (ethOut, tokensOut) == (5*10**17, 50*10**18)
+    assert pool.investorShares == {"alice": 5000, "bob": 5000}
+    assert (pool.ethPool, pool.tokenPool, pool.totalShares) == (10**18, 100*10**18, 10000)
+
+def test_pool_divest_too_much():
+    pool = Pool(fee, investorShares = {})
+    pool.seed_invest("alice", 1*10**18, 100*10**18)
+    with pytest.raises(SwapReverted):
+        pool.divest("bob", 1)
+    with pytest.raises(SwapReverted):
+        pool.seed_invest("bob", 1, 1)
+
+def test_pool_reserve_cap():
+    # Arrange
+    pool = Pool(fee, investorShares = {})
+    pool.seed_invest("alice", 10**18, MAX_RESERVE - 10**18)
+    # Act & Assert
+    with pytest.raises(SwapReverted):
+        pool.token_to_eth(10**18 + 1)
+    with pytest.raises(SwapReverted):
+        pool.invest("bob", 10**18)
+    assert simulate_token_to_eth(10**18, MAX_RESERVE - 10**18, [10**18, 10**18 + 1], fee)[0][1] is None
+    assert pool.token_to_eth(10**18) == swap_output(MAX_RESERVE - 10**18, 10**18, 10**18, fee)
+    with pytest.raises(SwapReverted):
+        Pool(fee).seed_invest("alice", 1, MAX_RESERVE + 1)
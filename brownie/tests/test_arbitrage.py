@@ -0,0 +1,37 @@
+from scripts.arbitrage import round_trip, optimal_size, find_opportunities
+from scripts.amm import Pool
+
+# All the arbitrage tests
+# - Pools at the same price have no opportunity
+# - A price gap is found in the right direction
+# - The found size beats nearby sizes
+# - Tokens with a single pool are skipped
+
+fee = 400
+
+def test_no_opportunity_same_price():
+    pools = {"0xtoken": {"exchange": Pool(fee, 10**18, 100*10**18), "mini": Pool(fee, 2*10**18, 200*10**18)}}
+    assert find_opportunities(pools) == []
+
+def test_opportunity_direction():
+    # Arrange: tokens are cheaper in the exchange pool
+    cheap = Pool(fee, 10**18, 120*10**18)
+    expensive = Pool(fee, 10**18, 100*10**18)
+    # Act
+    opportunities = find_opportunities({"0xtoken": {"exchange": cheap, "mini": expensive}})
+    # Assert
+    assert len(opportunities) == 1
+    profit, token, buyKey, sellKey, ethIn = opportunities[0]
+    assert (token, buyKey, sellKey) == ("0xtoken", "exchange", "mini")
+    assert round_trip(cheap, expensive, ethIn) - ethIn == profit
+
+def test_opportunity_size_is_best():
+    cheap = Pool(fee, 10**18, 120*10**18)
+    expensive = Pool(fee, 10**18, 100*10**18)
+    size = optimal_size(cheap, expensive)
+    profit = round_trip(cheap, expensive, size) - size
+    for other in (size * 9 // 10, size * 11 // 10, size // 2, size * 2):
+        assert round_trip(cheap, expensive, other) - other <= profit
+
+def test_single_pool_skipped():
+    assert find_opportunities({"0xtoken": {"exchange": Pool(fee, 10**18, 120*10**18)}}) == []
@@ -0,0 +1,98 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20, exchange_from_address
+from scripts.indexer import Indexer
+from scripts.archive import PartitionWriter, Partition, partitions, export_archive, volume_and_fees, price_series, event_amounts, KINDS
+from brownie import network, config, chain, AstroSwapFactory, MiniSwap
+import os
+
+# All the event archive tests
+# - Columns written by a partition read back exactly, uint256 included
+# - Partitions outside the block range are skipped
+# - Whole partitions are summed from their meta.json totals, cut ones are scanned
+# - Exported swaps and reserves match the chain for exchanges and MiniSwap
+# - A second export only rewrites the last partition
+
+fee = 400
+
+def writePartition(root, key, fromBlock, rows):
+    writer = PartitionWriter(key, fee, fromBlock, 100)
+    for i, (block, name, args, reserves) in enumerate(rows):
+        writer.append(dict(event_amounts(name, args), block = block, logIndex = i, kind = KINDS.index(name), user = "0x" + "11" * 20, ethPool = reserves[0], tokenPool = reserves[1], totalShares = 10000))
+    writer.write(root)
+
+def test_archive_roundtrip(tmp_path):
+    # Arrange
+    root = str(tmp_path)
+    big = 2**256 - 1
+    writePartition(root, "0xabc", 0, [(5, "TokenPurchase", {"ethIn": 10**18, "tokensOut": big}, (big, 7)), (9, "EthPurchase", {"tokensIn": 4000, "ethOut": 3}, (1, 2))])
+    # Act
+    with Partition(partitions(root)[0]) as partition:
+        blocks = list(partition.column("block"))
+        kinds = list(partition.column("kind"))
+        tokensOut = list(partition.column("tokensOut"))
+        ethPools = list(partition.column("ethPool"))
+        users = partition.column("user")
+    # Assert
+    assert blocks == [5, 9]
+    assert kinds == [KINDS.index("TokenPurchase"), KINDS.index("EthPurchase")]
+    assert tokensOut == [big, 0]
+    assert ethPools == [big, 1]
+    assert users == ["0x" + "11" * 20] * 2
+    assert volume_and_fees(root)["0xabc"] == {"ethVolume": 10**18 + 3, "tokenVolume": big + 4000, "ethFees": 10**18 // fee, "tokenFees": 10, "swaps": 2}
+
+def test_archive_block_range(tmp_path):
+    # Arrange
+    root = str(tmp_path)
+    writePartition(root, "0xabc", 0, [(50, "TokenPurchase", {"ethIn": 1, "tokensOut": 1}, (1, 1))])
+    writePartition(root, "0xabc", 100, [(150, "TokenPurchase", {"ethIn": 2, "tokensOut": 2}, (2, 2))])
+    # Act & Assert
+    assert len(partitions(root, "0xabc", fromBlock = 100)) == 1
+    assert list(price_series(root, "0xabc", fromBlock = 100)) == [(150, 2, 2)]
+    assert [block for block, _, _ in price_series(root, "0xabc")] == [50, 150]
+
+def test_archive_totals(tmp_path):
+    # Arrange
+    root = str(tmp_path)
+    writePartition(root, "0xabc", 0, [(10, "TokenPurchase", {"ethIn": 800, "tokensOut": 5}, (1, 1)), (60, "EthPurchase", {"tokensIn": 4000, "ethOut": 7}, (1, 1))])
+    writePartition(root, "0xabc", 100, [(150, "Investment", {"ethInvested": 9, "tokensInvested": 9, "sharesPurchased": 9}, (1, 1))])
+    # Act
+    with Partition(partitions(root)[0]) as partition:
+        totals = partition.meta["totals"]
+    whole = volume_and_fees(root)["0xabc"]
+    cut = volume_and_fees(root, fromBlock = 50)["0xabc"]
+    # Assert
+    assert totals == {"ethVolume": 807, "tokenVolume": 4005, "ethFees": 2, "tokenFees": 10, "swaps": 2}
+    assert whole == totals
+    assert cut == {"ethVolume": 7, "tokenVolume": 4000, "ethFees": 0, "tokenFees": 10, "swaps": 1}
+
+def test_archive_export(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    startBlock = chain.height + 1
+    factory = AstroSwapFactory.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+    miniSwap = MiniSwap.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+    token, token2 = deploy_erc20(), deploy_erc20()
+    exchange = exchange_from_address(factory.addTokenExchange(token.address, {'from': account}).events["TokenExchangeAdded"][0]["tokenExchange"])
+    token.approve(exchange.address, 10**27, {'from': account}).wait(1)
+    token.approve(miniSwap.address, 10**27, {'from': account}).wait(1)
+    token2.approve(miniSwap.address, 10**27, {'from': account}).wait(1)
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 10**18}).wait(1)
+    miniSwap.seedInvest(token.address, 100*10**18, {'from': account, 'value': 10**18}).wait(1)
+    miniSwap.seedInvest(token2.address, 100*10**18, {'from': account, 'value': 10**18}).wait(1)
+    exchange.ethToToken(account.address, 0, {'from': account, 'value': 10**17}).wait(1)
+    miniSwap.tokenToToken(token.address, account.address, token2.address, 10**19, 0, {'from': account}).wait(1)
+    indexer = Indexer(factory.address, [miniSwap.address], dbPath = str(tmp_path / "index.sqlite"), startBlock = startBlock)
+    root = str(tmp_path / "archive")
+    # Act
+    written = export_archive(indexer, root, blockRange = 5)
+    rewritten = export_archive(indexer, root)
+    # Assert
+    assert written >= 3
+    assert 0 < rewritten < written
+    assert list(price_series(root, exchange.address))[-1][1:] == (exchange.ethPool(), exchange.tokenPool())
+    for tokenAddress in (token.address, token2.address):
+        _, ethPool, tokenPool, _ = miniSwap.exchanges(tokenAddress)
+        assert list(price_series(root, (miniSwap.address, tokenAddress)))[-1][1:] == (ethPool, tokenPool)
+    totals = volume_and_fees(root)
+    assert totals[exchange.address]["swaps"] == 1
+    assert totals[(miniSwap.address, token2.address)]["swaps"] == 1
@@ -0,0 +1,63 @@
+from scripts.confirmations import ConfirmationManager, ConfirmationTimeout
+from scripts.tx_pipeline import TxPipeline
+import pytest
+
+# All the confirmation manager tests
+# - Many transactions are confirmed with a handful of batched requests
+# - A reverted transaction resolves with status 0
+# - A transaction that never lands times out
+# - Callbacks run before the future resolves
+# - A pipeline with a manager confirms its steps through it
+
+def test_confirmations_batched(token, account):
+    # Arrange
+    txs = [token.transfer(account.address, i, {'from': account, 'required_confs': 0}) for i in range(20)]
+    # Act
+    with ConfirmationManager(pollInterval = 0.2) as manager:
+        futures = [manager.track(tx.txid) for tx in txs]
+        receipts = [future.result(timeout = 30) for future in futures]
+    # Assert
+    assert [receipt["status"] for receipt in receipts] == [1] * 20
+    assert [receipt["transactionHash"] for receipt in receipts] == [tx.txid for tx in txs]
+    assert manager.requests < 10
+    assert manager.pending == 0
+
+def test_confirmations_revert(factory, token, account):
+    # Arrange
+    factory.addTokenExchange(token.address, {'from': account}).wait(1)
+    # Act
+    tx = factory.addTokenExchange(token.address, {'from': account, 'gas_limit': 500000, 'allow_revert': True, 'required_confs': 0})
+    with ConfirmationManager(pollInterval = 0.1) as manager:
+        receipt = manager.wait(tx.txid, timeout = 30)
+    # Assert
+    assert receipt["status"] == 0
+
+def test_confirmations_timeout():
+    with ConfirmationManager(pollInterval = 0.1) as manager:
+        with pytest.raises(ConfirmationTimeout):
+            manager.wait("0x" + "00" * 32, timeout = 0.5)
+
+def test_confirmations_callback(token, account):
+    # Arrange
+    seen = []
+    tx = token.transfer(account.address, 1, {'from': account, 'required_confs': 0})
+    # Act
+    with ConfirmationManager(pollInterval = 0.1) as manager:
+        future = manager.track(tx.txid, callback = lambda txid, receipt, error: seen.append((txid, receipt["status"], error)))
+        future.result(timeout = 30)
+        # Assert
+        assert seen == [(tx.txid, 1, None)]
+
+def test_confirmations_pipeline(token, exchange, account):
+    # Arrange
+    with ConfirmationManager(pollInterval = 0.1) as manager:
+        pipeline = TxPipeline(account, manager = manager)
+        # Act
+        pipeline.add(token.approve, exchange.address, 100*10**18)
+        seed = pipeline.add(exchange.seedInvest, 100*10**18, value = 1*10**18, gasLimit = 500000)
+        pipeline.run()
+        pipeline.close()
+    # Assert
+    assert seed.confirmed
+    assert seed.receipt["status"] == 1
+    assert exchange.ethPool() == 1*10**18
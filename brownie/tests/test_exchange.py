@@ -1,5 +1,4 @@
 from scripts.helpers import smart_get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS, calculate_liquidity_pool_output
-from scripts.runAstroSwap import deploy_erc20 , exchange_from_address
 from brownie import network, accounts, config, AstroSwapExchange, AstroSwapFactory
 import pytest
 from random import randint
@@ -40,26 +39,14 @@ from random import randint
 # - Compare tokenToTokenQuote to actual cost (3 different values + 1 random one)
 # - Compare investQuoteFromEth to actual cost (3 different values)
 # - Compare investQuoteFromToken to actual cost (3 different values)
-
-def setupExchange(factory, token1, token2, account):
-    exchangeForge1 = factory.addTokenExchange(token1.address, {'from': account})
-    exchangeForge1.wait(1)
-    exchangeAddress1 = exchangeForge1.events["TokenExchangeAdded"][0]["tokenExchange"]
-    exchange1 = exchange_from_address(exchangeAddress1)
-    exchangeForge2 = factory.addTokenExchange(token2.address, {'from': account})
-    exchangeForge2.wait(1)
-    exchangeAddress2 = exchangeForge2.events["TokenExchangeAdded"][0]["tokenExchange"]
-    exchange2 = exchange_from_address(exchangeAddress2)
-    return exchange1, exchange2
-
-
+# - getPoolState matches the single getters
+# - tokenToEth and divest pay the ETH out
 
 fee = 400
 
-def test_exchange_deploy():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
+# Fixtures are in conftest.py, every test starts from the same snapshot of them
+
+def test_exchange_deploy(token, account):
     # Act
     exchange = AstroSwapExchange.deploy(
         token.address,
@@ -71,17 +58,9 @@ def test_exchange_deploy():
     # Assert
     assert AstroSwapExchange[-1] != "0x0000000000000000000000000000000000000000"
 
-def test_exchange_seed_invest_properly():
+def test_exchange_seed_invest_properly(token, exchange, account):
     # Going with an seed rate of 100 tokens for 1 ETH
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
     approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
     # Act
@@ -95,16 +74,8 @@ def test_exchange_seed_invest_properly():
     assert exchange.totalShares() == 10000
     assert exchange.invariant() == exchange.ethPool() * exchange.tokenPool()
 
-def test_exchange_seed_invest_just_tokens():
+def test_exchange_seed_invest_just_tokens(token, exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
     approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
     # Act & Assert
@@ -112,65 +83,29 @@ def test_exchange_seed_invest_just_tokens():
         seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 0})
         seedTx.wait(1)
     
-def test_exchange_seed_invest_just_eth():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
+def test_exchange_seed_invest_just_eth(exchange, account):
     # Act & Assert
     with pytest.raises(Exception):
         seedTx = exchange.seedInvest(0, {'from': account, 'value': 1*10**18})
         seedTx.wait(1)
 
-def test_exchange_seed_invest_nothing():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
+def test_exchange_seed_invest_nothing(exchange, account):
     # Act & Assert
     with pytest.raises(Exception):
         seedTx = exchange.seedInvest(0, {'from': account, 'value': 0})
         seedTx.wait(1)
 
-def test_exchange_seed_invest_without_authorising_erc20_transfer():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
+def test_exchange_seed_invest_without_authorising_erc20_transfer(exchange, account):
     # Act & Assert
     with pytest.raises(Exception):
         seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
         seedTx.wait(1)
 
-def test_exchange_invest_properly():
+def test_exchange_invest_properly(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
     investTx = exchange.invest(10**22, {'from': account, 'value': 1*10**18})
     investTx.wait(1)
@@ -181,60 +116,28 @@ def test_exchange_invest_properly():
     assert exchange.totalShares() == 20000
     assert exchange.invariant() == exchange.ethPool() * exchange.tokenPool()
 
-def test_exchange_invest_just_eth():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
+def test_exchange_invest_just_eth(seeded_exchange, account):
     # Act & Assert
     with pytest.raises(Exception): # Fails because we only authorize transfer of tokens for the seeding
-        investTx = exchange.invest(10**22, {'from': account, 'value': 1*10**18})
+        investTx = seeded_exchange.invest(10**22, {'from': account, 'value': 1*10**18})
         investTx.wait(1)
 
-def test_exchange_invest_nothing():
+def test_exchange_invest_nothing(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
+    approveTx = token.approve(seeded_exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
-    investTx = exchange.invest(10**22, {'from': account, 'value': 0})
+    investTx = seeded_exchange.invest(10**22, {'from': account, 'value': 0})
     investTx.wait(1)
     # Assert
     assert investTx.events["Investment"]["sharesPurchased"] == 0
         
 
-def test_exchange_invest_half():
+def test_exchange_invest_half(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 150*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 50*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
     investTx = exchange.invest(10**22, {'from': account, 'value': 0.5*10**18})
     investTx.wait(1)
@@ -246,20 +149,11 @@ def test_exchange_invest_half():
     assert exchange.totalShares() == 15000
     assert exchange.invariant() == exchange.ethPool() * exchange.tokenPool()
 
-def test_exchange_invest_two_x():
+def test_exchange_invest_two_x(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 300*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
     investTx = exchange.invest(10**22, {'from': account, 'value': 2*10**18})
     investTx.wait(1)
@@ -270,20 +164,11 @@ def test_exchange_invest_two_x():
     assert exchange.totalShares() == 30000
     assert exchange.invariant() == exchange.ethPool() * exchange.tokenPool()
 
-def test_exchange_invest_maxToken_double():
+def test_exchange_invest_maxToken_double(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
     investTx = exchange.invest(200*10**18, {'from': account, 'value': 1*10**18})
     investTx.wait(1)
@@ -294,20 +179,11 @@ def test_exchange_invest_maxToken_double():
     assert exchange.totalShares() == 20000
     assert exchange.invariant() == exchange.ethPool() * exchange.tokenPool()
 
-def test_exchange_invest_maxToken_exact():
+def test_exchange_invest_maxToken_exact(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
     investTx = exchange.invest(100*10**18, {'from': account, 'value': 1*10**18})
     investTx.wait(1)
@@ -318,59 +194,25 @@ def test_exchange_invest_maxToken_exact():
     assert exchange.totalShares() == 20000
     assert exchange.invariant() == exchange.ethPool() * exchange.tokenPool()
 
-def test_exchange_invest_maxToken_less():
+def test_exchange_invest_maxToken_less(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
+    approveTx = token.approve(seeded_exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act & Assert
     with pytest.raises(Exception):
-        investTx = exchange.invest(99*10**18, {'from': account, 'value': 1*10**18})
+        investTx = seeded_exchange.invest(99*10**18, {'from': account, 'value': 1*10**18})
         investTx.wait(1)
 
-def test_try_calling_privates():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
+def test_try_calling_privates(seeded_exchange, account):
     # Act & Assert
     with pytest.raises(Exception):
-        exchange.ethToTokenPrivate(1*10**18, {'from': account})
+        seeded_exchange.ethToTokenPrivate(1*10**18, {'from': account})
     with pytest.raises(Exception):
-        exchange.tokenToEthPrivate(1*10**18, {'from': account})
+        seeded_exchange.tokenToEthPrivate(1*10**18, {'from': account})
 
-def test_call_ethToToken_min_0():
+def test_call_ethToToken_min_0(seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
+    exchange = seeded_exchange
     beforeInvariant = exchange.invariant()
     expectedReturn = calculate_liquidity_pool_output(exchange.ethPool(), exchange.tokenPool(), 0.1*10**18, fee)
     # Act
@@ -380,20 +222,9 @@ def test_call_ethToToken_min_0():
     assert abs(ethToTokenTx.events["TokenPurchase"]["tokensOut"] / expectedReturn - 1) < 0.0001 # I was having some jank in the math, was not able to find it. 0.01% error is fine.
     assert exchange.invariant() >= beforeInvariant
 
-def test_call_ethToToken_min_smaller():
+def test_call_ethToToken_min_smaller(seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
+    exchange = seeded_exchange
     beforeInvariant = exchange.invariant()
     expectedReturn = calculate_liquidity_pool_output(exchange.ethPool(), exchange.tokenPool(), 0.1*10**18, fee)
     # Act
@@ -404,56 +235,26 @@ def test_call_ethToToken_min_smaller():
     assert abs(ethToTokenTx.events["TokenPurchase"]["tokensOut"] / expectedReturn - 1) < 0.0001 # I was having some jank in the math, was not able to find it. 0.01% error is fine.
     assert exchange.invariant() >= beforeInvariant
 
-def test_call_ethToToken_min_larger():
+def test_call_ethToToken_min_larger(seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
-    
+    exchange = seeded_exchange
     expectedReturn = calculate_liquidity_pool_output(exchange.ethPool(), exchange.tokenPool(), 0.1*10**18, fee)
     # Act & Assert
     with pytest.raises(Exception):
         ethToTokenTx = exchange.ethToToken(account.address, expectedReturn * 1.05, {'from': account, 'value': 0.1*10**18})
         ethToTokenTx.wait(1)
 
-def test_call_ethToToken_no_seed():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
+def test_call_ethToToken_no_seed(exchange, account):
     # Act & Assert
     with pytest.raises(Exception):
         ethToTokenTx = exchange.ethToToken(account.address, 1*10**18, {'from': account, 'value': 0.1*10**18})
         ethToTokenTx.wait(1)
 
-def test_call_tokenToEth_min_0():
+def test_call_tokenToEth_min_0(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18 + 2*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 2*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     beforeInvariant = exchange.invariant()
     expectedReturn = calculate_liquidity_pool_output(exchange.tokenPool(), exchange.ethPool(), 2*10**18, fee)
     # Act
@@ -463,20 +264,11 @@ def test_call_tokenToEth_min_0():
     assert abs(tokenToEthTx.events["EthPurchase"]["ethOut"] / expectedReturn - 1) < 0.0001 # I was having some jank in the math, was not able to find it. 0.01% error is fine.
     assert exchange.invariant() >= beforeInvariant
 
-def test_call_tokenToEth_min_smaller():
+def test_call_tokenToEth_min_smaller(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18 + 2*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 2*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     beforeInvariant = exchange.invariant()
     expectedReturn = calculate_liquidity_pool_output(exchange.tokenPool(), exchange.ethPool(), 2*10**18, fee)
     # Act
@@ -487,56 +279,26 @@ def test_call_tokenToEth_min_smaller():
     assert abs(tokenToEthTx.events["EthPurchase"]["ethOut"] / expectedReturn - 1) < 0.0001 # I was having some jank in the math, was not able to find it. 0.01% error is fine.
     assert exchange.invariant() >= beforeInvariant
 
-def test_call_tokenToEth_min_larger():
+def test_call_tokenToEth_min_larger(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18 + 2*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 2*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
-    
     expectedReturn = calculate_liquidity_pool_output(exchange.tokenPool(), exchange.ethPool(), 2*10**18, fee)
     # Act & Assert
     with pytest.raises(Exception):
         tokenToEthTx = exchange.tokenToEth(account.address, 2*10**18, expectedReturn * 1.05, {'from': account})
         tokenToEthTx.wait(1)
 
-def test_call_tokenToEth_no_seed():
-    # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
+def test_call_tokenToEth_no_seed(exchange, account):
     # Act & Assert
     with pytest.raises(Exception):
         tokenToEthTx = exchange.tokenToEth(account.address, 2*10**18, 0, {'from': account})
         tokenToEthTx.wait(1)
 
-def test_ethToToken_quotes():
+def test_ethToToken_quotes(seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
-    approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
+    exchange = seeded_exchange
     quote = exchange.getEthToTokenQuote(0.1*10**18)
     # Act
     ethToTokenTx = exchange.ethToToken(account.address, 0, {'from': account, 'value': 0.1*10**18})
@@ -560,20 +322,11 @@ def test_ethToToken_quotes():
     # Assert
     assert abs(ethToTokenTx.events["TokenPurchase"]["tokensOut"] / quote - 1) == 0
 
-def test_tokenToEth_quotes():
+def test_tokenToEth_quotes(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 200*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     quote = exchange.getTokenToEthQuote(1*10**18)
     # Act
     tokenToEthTx = exchange.tokenToEth(account.address, 1*10**18, 0, {'from': account})
@@ -597,21 +350,9 @@ def test_tokenToEth_quotes():
     # Assert
     assert abs(tokenToEthTx.events["EthPurchase"]["ethOut"] / quote - 1) == 0
 
-def test_divest_proprely():
+def test_divest_proprely(seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    print("Seeding")
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
+    exchange = seeded_exchange
     print("Divesting")
     # Act
     divestTx = exchange.divest(10000, {'from': account})
@@ -623,21 +364,9 @@ def test_divest_proprely():
     assert exchange.invariant() == 0
     assert exchange.getShares(account.address) == 0
 
-def test_divest_half():
+def test_divest_half(seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    print("Seeding")
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
+    exchange = seeded_exchange
     print("Divesting")
     # Act
     divestTx = exchange.divest(10000*0.5, {'from': account})
@@ -648,50 +377,19 @@ def test_divest_half():
     assert exchange.ethPool() == 0.5*10**18
     assert exchange.getShares(account.address) == 10000 - 10000*0.5
 
-def test_divest_more_than_owned():
+def test_divest_more_than_owned(seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 100*10**18, {'from': account})
-    approveTx.wait(1)
-    print("Seeding")
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     print("Divesting")
     # Act & Assert
     with pytest.raises(Exception):
-        divestTx = exchange.divest(10000*2, {'from': account})
+        divestTx = seeded_exchange.divest(10000*2, {'from': account})
         divestTx.wait(1)
 
-def test_call_tokenToToken():
+def test_call_tokenToToken(token, token2, seeded_factory_pair, account):
     # Arrange
-    token1 = deploy_erc20()
-    token2 = deploy_erc20()
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    # Create the two exchanges
-    exchange1, exchange2 = setupExchange(factory, token1, token2, account)
-    # Seed the two exchanges
-    approve1Tx = token1.approve(exchange1.address, 100*10**18, {'from': account})
-    approve1Tx.wait(1)
-    approve2Tx = token2.approve(exchange2.address, 100*10**18, {'from': account})
-    approve2Tx.wait(1)
-    seed1Tx = exchange1.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seed1Tx.wait(1)
-    seed2Tx = exchange2.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seed2Tx.wait(1)
+    factory, exchange1, exchange2 = seeded_factory_pair
     # Act
-    approve1Tx = token1.approve(exchange1.address, 0.1*10**18, {'from': account})
+    approve1Tx = token.approve(exchange1.address, 0.1*10**18, {'from': account})
     approve1Tx.wait(1)
     tokenToTokenTx = exchange1.tokenToToken(account.address, token2.address, 0.1*10**18, 0, {'from': account})
     tokenToTokenTx.wait(1)
@@ -705,71 +403,35 @@ def test_call_tokenToToken():
     assert tokenToTokenTx.events["TokenPurchase"]["ethIn"] == tokenToTokenTx.events["TokenToTokenOut"]["ethTransfer"]
     assert tokenToTokenTx.events["TokenPurchase"]["tokensOut"] > 0
 
-def test_call_tokenToToken_min_bigger():
+def test_call_tokenToToken_min_bigger(token, token2, seeded_factory_pair, account):
     # Arrange
-    token1 = deploy_erc20()
-    token2 = deploy_erc20()
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    # Create the two exchanges
-    exchange1, exchange2 = setupExchange(factory, token1, token2, account)
-    # Seed the two exchanges
-    approve1Tx = token1.approve(exchange1.address, 100*10**18, {'from': account})
-    approve1Tx.wait(1)
-    approve2Tx = token2.approve(exchange2.address, 100*10**18, {'from': account})
-    approve2Tx.wait(1)
-    seed1Tx = exchange1.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seed1Tx.wait(1)
-    seed2Tx = exchange2.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seed2Tx.wait(1)
+    factory, exchange1, exchange2 = seeded_factory_pair
     # Act & Assert
     with pytest.raises(Exception):
-        approve1Tx = token1.approve(exchange1.address, 0.1*10**18, {'from': account})
+        approve1Tx = token.approve(exchange1.address, 0.1*10**18, {'from': account})
         approve1Tx.wait(1)
         tokenToTokenTx = exchange1.tokenToToken(account.address, token2.address, 0.1*10**18, 100*10**18, {'from': account})
         tokenToTokenTx.wait(1)
 
-def test_call_tokenToToken_seeded_only_from():
+def test_call_tokenToToken_seeded_only_from(token, token2, factory_pair, account):
     # Arrange
-    token1 = deploy_erc20()
-    token2 = deploy_erc20()
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    # Create the two exchanges
-    exchange1, exchange2 = setupExchange(factory, token1, token2, account)
-    # Seed the two exchanges
-    approve1Tx = token1.approve(exchange1.address, 100*10**18, {'from': account})
+    factory, exchange1, exchange2 = factory_pair
+    # Seed only the exchange we trade from
+    approve1Tx = token.approve(exchange1.address, 100*10**18, {'from': account})
     approve1Tx.wait(1)
     seed1Tx = exchange1.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
     seed1Tx.wait(1)
     # Act & Assert
     with pytest.raises(Exception):
-        approve1Tx = token1.approve(exchange1.address, 0.1*10**18, {'from': account})
+        approve1Tx = token.approve(exchange1.address, 0.1*10**18, {'from': account})
         approve1Tx.wait(1)
         tokenToTokenTx = exchange1.tokenToToken(account.address, token2.address, 0.1*10**18, 0, {'from': account})
         tokenToTokenTx.wait(1)
 
-def test_call_tokenToToken_seeded_only_to():
+def test_call_tokenToToken_seeded_only_to(token, token2, factory_pair, account):
     # Arrange
-    token1 = deploy_erc20()
-    token2 = deploy_erc20()
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    # Create the two exchanges
-    exchange1, exchange2 = setupExchange(factory, token1, token2, account)
-    # Seed the two exchanges
+    factory, exchange1, exchange2 = factory_pair
+    # Seed only the exchange we trade to
     approve2Tx = token2.approve(exchange2.address, 100*10**18, {'from': account})
     approve2Tx.wait(1)
     seed2Tx = exchange2.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
@@ -778,33 +440,15 @@ def test_call_tokenToToken_seeded_only_to():
     with pytest.raises(Exception):
         approve2Tx = token2.approve(exchange2.address, 0.1*10**18, {'from': account})
         approve2Tx.wait(1)
-        tokenToTokenTx = exchange2.tokenToToken(account.address, token1.address, 0.1*10**18, 0, {'from': account})
+        tokenToTokenTx = exchange2.tokenToToken(account.address, token.address, 0.1*10**18, 0, {'from': account})
         tokenToTokenTx.wait(1)
 
-def test_tokenToToken_quotes():
+def test_tokenToToken_quotes(token, token2, seeded_factory_pair, account):
     # Arrange
-    token1 = deploy_erc20()
-    token2 = deploy_erc20()
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    # Create the two exchanges
-    exchange1, exchange2 = setupExchange(factory, token1, token2, account)
-    # Seed the two exchanges
-    approve1Tx = token1.approve(exchange1.address, 100*10**18, {'from': account})
-    approve1Tx.wait(1)
-    seed1Tx = exchange1.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seed1Tx.wait(1)
-    approve2Tx = token2.approve(exchange2.address, 100*10**18, {'from': account})
-    approve2Tx.wait(1)
-    seed2Tx = exchange2.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seed2Tx.wait(1)
+    factory, exchange1, exchange2 = seeded_factory_pair
     # Act
     tokenOutQuote = exchange1.getTokenToTokenQuote(0.1*10**18, token2.address, {'from': account})
-    approve1Tx = token1.approve(exchange1.address, 0.1*10**18, {'from': account})
+    approve1Tx = token.approve(exchange1.address, 0.1*10**18, {'from': account})
     approve1Tx.wait(1)
     tokenToTokenTx = exchange1.tokenToToken(account.address, token2.address, 0.1*10**18, 0, {'from': account})
     tokenToTokenTx.wait(1)
@@ -812,17 +456,17 @@ def test_tokenToToken_quotes():
     assert tokenToTokenTx.events["TokenPurchase"]["tokensOut"] == tokenOutQuote
 
     # And again!
-    tokenOutQuote2 = exchange2.getTokenToTokenQuote(11*10**18, token1.address, {'from': account})
+    tokenOutQuote2 = exchange2.getTokenToTokenQuote(11*10**18, token.address, {'from': account})
     approve2Tx = token2.approve(exchange2.address, 11*10**18, {'from': account})
     approve2Tx.wait(1)
-    tokenToTokenTx2 = exchange2.tokenToToken(account.address, token1.address, 11*10**18, 0, {'from': account})
+    tokenToTokenTx2 = exchange2.tokenToToken(account.address, token.address, 11*10**18, 0, {'from': account})
     tokenToTokenTx2.wait(1)
     # Assert
     assert tokenToTokenTx2.events["TokenPurchase"]["tokensOut"] == tokenOutQuote2
 
     # And again!
     tokenOutQuote3 = exchange1.getTokenToTokenQuote(0.12345*10**18, token2.address, {'from': account})
-    approve1Tx = token1.approve(exchange1.address, 0.12345*10**18, {'from': account})
+    approve1Tx = token.approve(exchange1.address, 0.12345*10**18, {'from': account})
     approve1Tx.wait(1)
     tokenToTokenTx3 = exchange1.tokenToToken(account.address, token2.address, 0.12345*10**18, 0, {'from': account})
     tokenToTokenTx3.wait(1)
@@ -832,7 +476,7 @@ def test_tokenToToken_quotes():
     # And again! (Random this time ;)
     randomTokens = randint(0, 20*10**18)
     tokenOutQuote4 = exchange1.getTokenToTokenQuote(randomTokens, token2.address, {'from': account})
-    approve1Tx = token1.approve(exchange1.address, randomTokens, {'from': account})
+    approve1Tx = token.approve(exchange1.address, randomTokens, {'from': account})
     approve1Tx.wait(1)
     tokenToTokenTx4 = exchange1.tokenToToken(account.address, token2.address, randomTokens, 0, {'from': account})
     tokenToTokenTx4.wait(1)
@@ -840,20 +484,11 @@ def test_tokenToToken_quotes():
     assert tokenToTokenTx4.events["TokenPurchase"]["tokensOut"] == tokenOutQuote4
 
 
-def test_investQuoteFromEth():
+def test_investQuoteFromEth(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 1000*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 900*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
     quote = exchange.investQuoteFromEth(1*10**18)
     investTx = exchange.invest(10**22, {'from': account, 'value': 1*10**18})
@@ -882,20 +517,11 @@ def test_investQuoteFromEth():
     # Assert
     assert investTx4.events["Investment"]["tokensInvested"] == quote4
 
-def test_investQuoteFromToken():
+def test_investQuoteFromToken(token, seeded_exchange, account):
     # Arrange
-    token = deploy_erc20()
-    account = smart_get_account(1)
-    exchange = AstroSwapExchange.deploy(
-        token.address,
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-        )
-    approveTx = token.approve(exchange.address, 1000*10**18, {'from': account})
+    exchange = seeded_exchange
+    approveTx = token.approve(exchange.address, 900*10**18, {'from': account})
     approveTx.wait(1)
-    seedTx = exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18})
-    seedTx.wait(1)
     # Act
     quote = exchange.investQuoteFromTokens(6*10**18)
     print(quote)
@@ -923,4 +549,29 @@ def test_investQuoteFromToken():
     investTx4 = exchange.invest(10**22, {'from': account, 'value': quote4})
     investTx4.wait(1)
     # Assert
-    assert investTx4.events["Investment"]["tokensInvested"] == 0
\ No newline at end of file
+    assert investTx4.events["Investment"]["tokensInvested"] == 0
+
+def test_pool_state(seeded_exchange, account):
+    # Arrange
+    seeded_exchange.ethToToken(account.address, 0, {'from': account, 'value': 10**17}).wait(1)
+    # Act
+    state = seeded_exchange.getPoolState()
+    # Assert
+    assert tuple(state) == (seeded_exchange.ethPool(), seeded_exchange.tokenPool(), seeded_exchange.invariant(), seeded_exchange.feeAmmount(), seeded_exchange.totalShares())
+
+def test_eth_paid_out(token, seeded_exchange, account):
+    # Arrange
+    recipient = smart_get_account(2)
+    balance = recipient.balance()
+    token.approve(seeded_exchange.address, 10**19, {'from': account}).wait(1)
+    # Act
+    sellTx = seeded_exchange.tokenToEth(recipient.address, 10**19, 0, {'from': account})
+    sellTx.wait(1)
+    ethOut = sellTx.events["EthPurchase"]["ethOut"]
+    accountBalance = account.balance()
+    divestTx = seeded_exchange.divest(5000, {'from': account, 'gas_price': 0})
+    divestTx.wait(1)
+    # Assert
+    assert recipient.balance() == balance + ethOut
+    assert account.balance() == accountBalance + divestTx.events["Divestment"]["ethDivested"]
+    assert seeded_exchange.balance() == seeded_exchange.ethPool()
@@ -0,0 +1,74 @@
+from scripts.helpers import smart_get_account
+from scripts.gas_compare import deploy_pair, run_workload
+from brownie import AstroSwapFactory, AstroSwapExchange, AstroSwapExchangeLean, MockLeanFactory
+import pytest
+
+# All the lean exchange tests
+# - Same trades leave both exchanges with the same pools, invariant and shares
+# - Quotes match the original exchange
+# - Divest pays out the ETH
+# - Trading without liquidity fails
+# - Uses less gas on every swap, invest and divest
+
+def test_lean_matches_original():
+    # Arrange
+    account = smart_get_account(1)
+    _, original = deploy_pair(AstroSwapFactory, AstroSwapExchange, account)
+    _, lean = deploy_pair(MockLeanFactory, AstroSwapExchangeLean, account)
+    # Act
+    run_workload(original, account)
+    run_workload(lean, account)
+    # Assert
+    for (_, exchange), (_, leanExchange) in zip(original, lean):
+        assert leanExchange.ethPool() == exchange.ethPool()
+        assert leanExchange.tokenPool() == exchange.tokenPool()
+        assert leanExchange.invariant() == exchange.invariant()
+        assert leanExchange.totalShares() == exchange.totalShares()
+        assert leanExchange.getShares(account) == exchange.getShares(account)
+
+def test_lean_quotes():
+    # Arrange
+    account = smart_get_account(1)
+    _, original = deploy_pair(AstroSwapFactory, AstroSwapExchange, account)
+    _, lean = deploy_pair(MockLeanFactory, AstroSwapExchangeLean, account)
+    run_workload(original, account)
+    run_workload(lean, account)
+    exchange, leanExchange = original[0][1], lean[0][1]
+    # Act & Assert
+    for value in (1000, 10**15, 3*10**17):
+        assert leanExchange.getEthToTokenQuote(value) == exchange.getEthToTokenQuote(value)
+        assert leanExchange.getTokenToEthQuote(value) == exchange.getTokenToEthQuote(value)
+        assert leanExchange.investQuoteFromEth(value) == exchange.investQuoteFromEth(value)
+    assert leanExchange.getTokenToTokenQuote(10**18, lean[1][0].address) == exchange.getTokenToTokenQuote(10**18, original[1][0].address)
+
+def test_lean_divest_pays_eth():
+    # Arrange
+    account = smart_get_account(1)
+    _, lean = deploy_pair(MockLeanFactory, AstroSwapExchangeLean, account)
+    token, exchange = lean[0]
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    balance = account.balance()
+    # Act
+    divestTx = exchange.divest(5000, {'from': account, 'gas_price': 0})
+    divestTx.wait(1)
+    # Assert
+    assert account.balance() == balance + 5*10**17
+    assert exchange.ethPool() == 5*10**17
+
+def test_lean_no_liquidity():
+    account = smart_get_account(1)
+    _, lean = deploy_pair(MockLeanFactory, AstroSwapExchangeLean, account)
+    with pytest.raises(Exception):
+        lean[0][1].ethToToken(account.address, 0, {'from': account, 'value': 10**17})
+
+def test_lean_uses_less_gas():
+    # Arrange
+    account = smart_get_account(1)
+    _, original = deploy_pair(AstroSwapFactory, AstroSwapExchange, account)
+    _, lean = deploy_pair(MockLeanFactory, AstroSwapExchangeLean, account)
+    # Act
+    before = run_workload(original, account)
+    after = run_workload(lean, account)
+    # Assert
+    for function in ("ethToToken", "tokenToEth", "tokenToToken", "invest", "divest"):
+        assert after[function] < before[function]
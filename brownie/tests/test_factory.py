@@ -1,8 +1,9 @@
 from eth_typing import Address
 from scripts.helpers import smart_get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS, calculate_liquidity_pool_output
 from scripts.runAstroSwap import deploy_erc20 , get_exchange_info
-from scripts.runAstroFactory import get_factory_info, deploy_new_exchange
-from brownie import network, accounts, config, AstroSwapExchange, AstroSwapFactory, MockERC20
+from scripts.runAstroFactory import get_factory_info, deploy_new_exchange, deploy_new_exchanges, exchange_chunk_size, chunk_tokens
+from brownie import network, accounts, config, web3, AstroSwapExchange, AstroSwapFactory, MockERC20
+from scripts.runAstroSwap import exchange_from_address
 import pytest
 from random import randint
 
@@ -17,6 +18,14 @@ from random import randint
 # - Convert from exchange to token when the exchange is not deployed 
 # - Deploy a random amount of exchanges, make sure the count is right
 # - Make sure count is correct for 0 exchanges
+# - Exchanges are minimal proxies initialized with the token, fee and factory
+# - A clone can't be initialized twice
+# - The implementation can't be initialized
+# - Bulk add creates an exchange per token and emits an event for each
+# - Bulk add skips listed, repeated and 0x0 tokens instead of failing
+# - The python bulk helper splits the tokens in chunks
+# - Chunk size fits the block gas limit
+# - getExchanges pages through the exchanges in the order they were added
 
 fee = 400
 
@@ -32,113 +41,51 @@ def test_factory_deploy():
     # Assert
     assert factory.address != None
 
-def test_factory_add_exchange():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    erc20 = deploy_erc20()
+def test_factory_add_exchange(token, factory, account):
     # Act
-    forgeTx = factory.addTokenExchange(erc20.address, {'from': account})
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
     forgeTx.wait(1)
     # Assert
     assert forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"] != "0x0000000000000000000000000000000000000000"
 
-def test_factory_add_exchange_zero_address():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
+def test_factory_add_exchange_zero_address(factory, account):
     # Act & Assert
     with pytest.raises(Exception):
         factory.addTokenExchange("0x0000000000000000000000000000000000000000", {'from': account})
 
-def test_factory_add_exchange_allready_added():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    erc20 = deploy_erc20()
+def test_factory_add_exchange_allready_added(token, factory, account):
     # Act
-    forgeTx = factory.addTokenExchange(erc20.address, {'from': account})
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
     forgeTx.wait(1)
     # Assert
     with pytest.raises(Exception):
-        forgeTx = factory.addTokenExchange(erc20.address, {'from': account})
+        forgeTx = factory.addTokenExchange(token.address, {'from': account})
 
-def test_factory_convert_token_to_exchange():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    erc20 = deploy_erc20()
+def test_factory_convert_token_to_exchange(token, factory, account):
     # Act
-    forgeTx = factory.addTokenExchange(erc20.address, {'from': account})
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
     forgeTx.wait(1)
     tokenExchangeAddress = forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"]
     # Assert
-    assert factory.convertTokenToExchange(erc20.address) == tokenExchangeAddress
+    assert factory.convertTokenToExchange(token.address) == tokenExchangeAddress
 
-def test_factory_convert_exchange_to_token():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    erc20 = deploy_erc20()
+def test_factory_convert_exchange_to_token(token, factory, account):
     # Act
-    forgeTx = factory.addTokenExchange(erc20.address, {'from': account})
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
     forgeTx.wait(1)
     tokenExchangeAddress = forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"]
     # Assert
-    assert factory.convertExchangeToToken(tokenExchangeAddress) == erc20.address
+    assert factory.convertExchangeToToken(tokenExchangeAddress) == token.address
 
-def test_factory_convert_token_to_exchange_no_exchange():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    erc20 = deploy_erc20()
+def test_factory_convert_token_to_exchange_no_exchange(token, factory, account):
     # Act & Assert
-    assert factory.convertTokenToExchange(erc20.address) == "0x0000000000000000000000000000000000000000"
+    assert factory.convertTokenToExchange(token.address) == "0x0000000000000000000000000000000000000000"
 
-def test_factory_convert_exchange_to_token_no_exchange():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
-    erc20 = deploy_erc20()
+def test_factory_convert_exchange_to_token_no_exchange(token, factory, account):
     # Act & Assert
-    assert factory.convertExchangeToToken(erc20.address) == "0x0000000000000000000000000000000000000000"
+    assert factory.convertExchangeToToken(token.address) == "0x0000000000000000000000000000000000000000"
 
-def test_factory_count_random():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
+def test_factory_count_random(factory, account):
     # Act
     value = randint(1, 10)
     for i in range(value):
@@ -149,15 +96,97 @@ def test_factory_count_random():
     # Assert
     assert count == value
 
-def test_factory_count_zero():
-    # Arrange
-    account = smart_get_account(1)
-    factory = AstroSwapFactory.deploy(
-        fee,
-        {'from': account},
-        publish_source = config["networks"][network.show_active()].get("verify", False)
-    )
+def test_factory_count_zero(factory, account):
     # Act
     count = factory.exchangeCount()
     # Assert
-    assert count == 0
\ No newline at end of file
+    assert count == 0
+
+def test_factory_exchange_is_clone(token, factory, account):
+    # Act
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
+    forgeTx.wait(1)
+    exchange = exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"])
+    # Assert
+    assert len(web3.eth.get_code(exchange.address)) == 45 # EIP-1167 runtime code
+    assert exchange.token() == token.address
+    assert exchange.feeAmmount() == fee
+    assert exchange.factory() == factory.address
+
+def test_factory_clone_initialize_twice(token, factory, account):
+    # Arrange
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
+    forgeTx.wait(1)
+    exchange = exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"])
+    # Act & Assert
+    with pytest.raises(Exception):
+        exchange.initialize(token.address, 1, {'from': account})
+
+def test_factory_implementation_initialize(token, factory, account):
+    # Arrange
+    implementation = exchange_from_address(factory.exchangeImplementation())
+    # Act & Assert
+    with pytest.raises(Exception):
+        implementation.initialize(token.address, 1, {'from': account})
+
+def test_factory_add_exchanges(factory, account):
+    # Arrange
+    tokens = [deploy_erc20().address for i in range(3)]
+    # Act
+    forgeTx = factory.addTokenExchanges(tokens, {'from': account})
+    forgeTx.wait(1)
+    # Assert
+    assert forgeTx.return_value == 3
+    assert factory.exchangeCount() == 3
+    assert [event["tokenAddress"] for event in forgeTx.events["TokenExchangeAdded"]] == tokens
+    for event in forgeTx.events["TokenExchangeAdded"]:
+        assert factory.convertTokenToExchange(event["tokenAddress"]) == event["tokenExchange"]
+        assert exchange_from_address(event["tokenExchange"]).token() == event["tokenAddress"]
+
+def test_factory_add_exchanges_skips(token, token2, factory, account):
+    # Arrange
+    listed = token.address
+    new = token2.address
+    factory.addTokenExchange(listed, {'from': account}).wait(1)
+    listedExchange = factory.convertTokenToExchange(listed)
+    # Act
+    forgeTx = factory.addTokenExchanges([listed, new, new, "0x0000000000000000000000000000000000000000"], {'from': account})
+    forgeTx.wait(1)
+    # Assert
+    assert forgeTx.return_value == 1
+    assert len(forgeTx.events["TokenExchangeAdded"]) == 1
+    assert factory.exchangeCount() == 2
+    assert factory.convertTokenToExchange(listed) == listedExchange
+
+def test_factory_deploy_new_exchanges_chunks(factory, account):
+    # Arrange
+    tokens = [deploy_erc20().address for i in range(5)]
+    factory.addTokenExchange(tokens[0], {'from': account}).wait(1)
+    # Act
+    exchanges = deploy_new_exchanges(factory, tokens, chunkSize = 2)
+    # Assert
+    assert sorted(exchanges) == sorted(tokens[1:])
+    assert factory.exchangeCount() == 5
+    for token, exchange in exchanges.items():
+        assert factory.convertTokenToExchange(token) == exchange
+
+def test_factory_exchange_chunk_size():
+    assert chunk_tokens([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert exchange_chunk_size(30000000, 100000) == 239
+    assert exchange_chunk_size(30000000, 10**9) == 1
+
+def test_factory_get_exchanges(factory, account):
+    # Arrange
+    tokens = [deploy_erc20().address for i in range(3)]
+    forgeTx = factory.addTokenExchanges(tokens, {'from': account})
+    forgeTx.wait(1)
+    exchanges = [event["tokenExchange"] for event in forgeTx.events["TokenExchangeAdded"]]
+    # Act
+    firstPage = factory.getExchanges(0, 2)
+    lastPage = factory.getExchanges(2, 2)
+    pastEnd = factory.getExchanges(5, 2)
+    # Assert
+    assert list(firstPage[0]) == exchanges[:2] and list(firstPage[1]) == tokens[:2]
+    assert list(lastPage[0]) == exchanges[2:] and list(lastPage[1]) == tokens[2:]
+    assert list(pastEnd[0]) == [] and list(pastEnd[1]) == []
+    assert factory.exchangeList(1) == exchanges[1]
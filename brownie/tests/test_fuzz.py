@@ -0,0 +1,32 @@
+from scripts.fuzz import ExchangeTarget, MiniSwapTarget, fuzz_seed, fuzz_investors, run_sequence
+from scripts.fuzz_model import generate_sequence
+import pytest
+import os
+
+# All the differential fuzzing tests, the contracts must match scripts/fuzz_model.py op for op
+# - A short sequence matches the model and leaves the chain as it was
+# - FUZZ_SEQUENCES random sequences per contract (default 4 of FUZZ_LENGTH ops, default 100)
+# Run with "brownie test tests/test_fuzz.py -n auto" to fuzz on one chain per CPU
+
+FUZZ_SEQUENCES = int(os.environ.get("FUZZ_SEQUENCES", 4))
+FUZZ_LENGTH = int(os.environ.get("FUZZ_LENGTH", 100))
+
+@pytest.fixture(scope = "session", params = [ExchangeTarget, MiniSwapTarget], ids = ["exchange", "miniswap"])
+def target(request):
+    # Session scoped so it is deployed before the isolation snapshot, like the conftest fixtures
+    return request.param(fuzz_investors())
+
+def test_fuzz_short_sequence(target):
+    # Arrange
+    ops = generate_sequence(0, 20, 400, target.poolCount, len(target.investors))
+    balances = [investor.balance() for investor in target.investors]
+    # Act
+    mismatch = run_sequence(target, ops)
+    # Assert
+    assert mismatch == None
+    assert [investor.balance() for investor in target.investors] == balances
+
+@pytest.mark.parametrize("seed", range(FUZZ_SEQUENCES))
+def test_fuzz_random_sequences(target, seed):
+    failure = fuzz_seed(target, seed, FUZZ_LENGTH)
+    assert failure == None, "Minimal failing ops: " + str(failure[0]) + " mismatch: " + str(failure[1])
@@ -0,0 +1,63 @@
+from scripts.fuzz_model import FuzzModel, generate_sequence, expected_results, shrink, REVERT
+from scripts.amm import swap_output
+import pytest
+
+# All the fuzzer model tests (no chain needed)
+# - Model swaps match the exact AMM math
+# - Reverting ops leave the model unchanged
+# - Sequences are the same for the same seed
+# - Sequences mix successful and reverting ops on every function
+# - Shrinking finds the single op that fails
+
+fee = 400
+
+def test_model_matches_amm():
+    # Arrange
+    model = FuzzModel(fee, 2, 2)
+    model.apply(("seedInvest", 0, 0, 10**18, 100*10**18))
+    model.apply(("seedInvest", 1, 1, 2*10**18, 50*10**18))
+    # Act
+    tokensOut = model.apply(("ethToToken", 0, 0, 10**17, 0))
+    ethTransfer, tokensOut2 = model.apply(("tokenToToken", 1, 0, 1, 10**18, 0))
+    # Assert
+    assert tokensOut == (swap_output(10**18, 100*10**18, 10**17, fee),)
+    assert ethTransfer == swap_output(100*10**18 - tokensOut[0], 11*10**17, 10**18, fee)
+    assert tokensOut2 == swap_output(2*10**18, 50*10**18, ethTransfer, fee)
+    assert model.state()[0][4] == (10000, 0)
+
+def test_model_revert_keeps_state():
+    # Arrange
+    model = FuzzModel(fee, 1, 2)
+    model.apply(("seedInvest", 0, 0, 10**18, 100*10**18))
+    state = model.state()
+    # Act & Assert
+    assert model.apply(("ethToToken", 1, 0, 10**17, 10**30)) == REVERT
+    assert model.apply(("divest", 1, 0, 1)) == REVERT
+    assert model.apply(("seedInvest", 1, 0, 10**18, 10**18)) == REVERT
+    assert model.state() == state
+
+def test_generate_sequence_deterministic():
+    assert generate_sequence(7, 200, fee, 2, 3) == generate_sequence(7, 200, fee, 2, 3)
+    assert generate_sequence(7, 200, fee, 2, 3) != generate_sequence(8, 200, fee, 2, 3)
+
+def test_generate_sequence_mix():
+    # Arrange
+    ops = generate_sequence(1, 2000, fee, 2, 3)
+    # Act
+    results = expected_results(ops, fee, 2, 3)
+    # Assert
+    for function in ("invest", "divest", "ethToToken", "tokenToEth", "tokenToToken"):
+        outputs = [result[0] for op, result in zip(ops, results) if op[0] == function]
+        assert any(output == REVERT for output in outputs)
+        assert any(output != REVERT for output in outputs)
+
+def test_shrink_single_op():
+    # Arrange
+    ops = generate_sequence(3, 300, fee, 2, 3)
+    bad = ops[150]
+    # Act
+    shrunk = shrink(ops, lambda candidate: any(op[0] == bad[0] and op[1] == bad[1] for op in candidate))
+    # Assert
+    assert len(shrunk) == 1
+    assert shrunk[0][:2] == bad[:2]
+    assert all(value == 0 for value in shrunk[0][4 if bad[0] == "tokenToToken" else 3:])
@@ -0,0 +1,14 @@
+from scripts.gas_benchmark import load_snapshot, run_workload, find_regressions, find_unbaselined
+
+# Gas regression gate, see scripts/gas_benchmark.py
+# - gas_snapshot.json is committed
+# - Every benchmarked function is in gas_snapshot.json
+# - No function uses more gas than gas_snapshot.json allows
+
+def test_gas_regressions():
+    snapshot = load_snapshot()
+    # A missing snapshot fails instead of skipping, otherwise the gate would silently do nothing
+    assert snapshot != None, "No gas snapshot, run: brownie run scripts/gas_benchmark.py update_snapshot and commit gas_snapshot.json"
+    results = run_workload()
+    assert find_unbaselined(snapshot, results) == []
+    assert find_regressions(snapshot, results) == []
@@ -1,4 +1,20 @@
 from scripts.helpers import *
+from scripts.runAstroSwap import exchange_from_address
+import os
+import time
+
+# All the helpers tests
+# - calculate_liquidity_pool_output matches the exchange math
+# - Contract handles are built once per address and ABI
+# - The handle cache drops the least recently used handle when full
+# - Warming the cache from a factory loads its exchanges and tokens
+# - list_exchanges pages through getExchanges
+# - A keystore is only decrypted once per process
+# - With ASTROSWAP_UNLOCK_SECONDS the unlocked key is reused from an owner only, encrypted file until it expires
+# - Without ASTROSWAP_UNLOCK_KEY, or with another one, nothing is read from disk
+# - Expired key files are deleted on the next load
+# - A directory others can read is not used
+# - lock_accounts forgets the unlocked accounts
 
 def test_calculate_liquidity_pool_output():
     ethPool1 = 10
@@ -26,3 +42,136 @@ def test_calculate_liquidity_pool_output():
     # New omgPool is 100000000 / 1027 = 97371 (+ 1)
     # What will be paid out is 100000 - 97371 = 2629
     assert calculate_liquidity_pool_output(ethPool2, omgPool2, amount, fee) == 2629
+
+def test_cached_contract_reused(seeded_exchange):
+    # Arrange
+    first = exchange_from_address(seeded_exchange.address)
+    # Act
+    second = exchange_from_address(seeded_exchange.address.lower())
+    # Assert
+    assert second is first
+    assert second.ethPool() == 1*10**18
+    assert cached_contract("ERC20", seeded_exchange.address, MockERC20.abi) is not first
+
+def test_cached_contract_bounded(seeded_exchange, monkeypatch):
+    monkeypatch.setattr("scripts.helpers.CONTRACT_CACHE_SIZE", 1)
+    first = exchange_from_address(seeded_exchange.address)
+    erc20_from_address(seeded_exchange.token())
+    assert len(contractCache) == 1
+    assert exchange_from_address(seeded_exchange.address) is not first
+
+def test_warm_contract_cache(token, token2, factory_pair):
+    # Arrange
+    factory, exchange1, exchange2 = factory_pair
+    contractCache.clear()
+    # Act
+    count = warm_contract_cache(factory)
+    # Assert
+    assert count == 2
+    assert (exchange1.address.lower(), id(AstroSwapExchange.abi)) in contractCache
+    assert (token2.address.lower(), id(MockERC20.abi)) in contractCache
+
+def test_list_exchanges(token, token2, factory_pair):
+    # Arrange
+    factory, exchange1, exchange2 = factory_pair
+    # Act
+    pairs = list_exchanges(factory, pageSize = 1)
+    # Assert
+    assert pairs == [(exchange1.address, token.address), (exchange2.address, token2.address)]
+
+def loadCounter(monkeypatch, tmp_path):
+    # accounts.load without a real keystore, counts the decryptions. Key files go to tmp_path
+    monkeypatch.setattr("scripts.helpers.UNLOCK_DIR", str(tmp_path))
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_KEY", "11" * 32)
+    lock_accounts()
+    loaded = []
+    def load(id):
+        loaded.append(id)
+        return accounts.add()
+    monkeypatch.setattr(accounts, "load", load)
+    return loaded
+
+def test_load_account_once(monkeypatch, tmp_path):
+    # Arrange
+    loaded = loadCounter(monkeypatch, tmp_path)
+    lock_accounts()
+    monkeypatch.delenv("ASTROSWAP_UNLOCK_SECONDS", raising = False)
+    # Act
+    first = load_account("test1")
+    second = load_account("test1")
+    # Assert
+    assert second is first
+    assert loaded == ["test1"]
+
+def test_load_account_unlock_file(monkeypatch, tmp_path):
+    # Arrange
+    loaded = loadCounter(monkeypatch, tmp_path)
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_SECONDS", "60")
+    lock_accounts()
+    first = load_account("test1")
+    accountCache.clear() # As if it was another process
+    # Act
+    second = load_account("test1")
+    # Assert
+    assert loaded == ["test1"]
+    assert second.address == first.address
+    assert os.stat(tmp_path / "test1.json").st_mode & 0o777 == 0o600
+    assert first.private_key[2:] not in (tmp_path / "test1.json").read_text()
+
+def test_load_account_unlock_key(monkeypatch, tmp_path):
+    # Arrange
+    loaded = loadCounter(monkeypatch, tmp_path)
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_SECONDS", "60")
+    load_account("test1")
+    accountCache.clear()
+    # Act
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_KEY", "22" * 32)
+    load_account("test1")
+    accountCache.clear()
+    monkeypatch.delenv("ASTROSWAP_UNLOCK_KEY")
+    load_account("test1")
+    # Assert
+    assert loaded == ["test1", "test1", "test1"]
+
+def test_purge_expired(monkeypatch, tmp_path):
+    # Arrange
+    loaded = loadCounter(monkeypatch, tmp_path)
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_SECONDS", "60")
+    load_account("test1")
+    monkeypatch.setattr(time, "time", lambda: 10**12)
+    # Act
+    load_account("test2")
+    # Assert
+    assert os.listdir(tmp_path) == ["test2.json"]
+
+def test_unlock_dir_shared(monkeypatch, tmp_path):
+    # Arrange
+    loaded = loadCounter(monkeypatch, tmp_path)
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_SECONDS", "60")
+    os.chmod(tmp_path, 0o777)
+    # Act
+    load_account("test1")
+    # Assert
+    if hasattr(os, "getuid"):
+        assert os.listdir(tmp_path) == []
+
+def test_load_account_unlock_expired(monkeypatch, tmp_path):
+    # Arrange
+    loaded = loadCounter(monkeypatch, tmp_path)
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_SECONDS", "60")
+    lock_accounts()
+    load_account("test1")
+    accountCache.clear()
+    monkeypatch.setattr(time, "time", lambda: 10**12)
+    # Act
+    load_account("test1")
+    # Assert
+    assert loaded == ["test1", "test1"]
+
+def test_lock_accounts(monkeypatch, tmp_path):
+    loaded = loadCounter(monkeypatch, tmp_path)
+    monkeypatch.setenv("ASTROSWAP_UNLOCK_SECONDS", "60")
+    load_account("test1")
+    lock_accounts()
+    assert accountCache == {}
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,80 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20, exchange_from_address
+from scripts.indexer import Indexer
+from brownie import network, config, chain, AstroSwapFactory
+
+# All the indexer tests
+# - Index exchange creation, seeding and a trade
+# - Restarting from the database resumes at the checkpoint
+# - A replaced block is rolled back and reindexed
+
+fee = 400
+
+def setupExchange(account):
+    factory = AstroSwapFactory.deploy(
+        fee,
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+    )
+    token = deploy_erc20()
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
+    forgeTx.wait(1)
+    exchangeAddress = forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"]
+    token.approve(exchangeAddress, 100*10**18, {'from': account}).wait(1)
+    return factory, token, exchangeAddress
+
+def test_indexer_sync(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    startBlock = chain.height + 1
+    factory, token, exchangeAddress = setupExchange(account)
+    exchange = exchange_from_address(exchangeAddress)
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    exchange.ethToToken(account.address, 0, {'from': account, 'value': 10**17}).wait(1)
+    # Act
+    indexer = Indexer(factory.address, dbPath = str(tmp_path / "index.sqlite"), startBlock = startBlock)
+    checkpoint = indexer.sync()
+    # Assert
+    assert checkpoint == chain.height
+    assert indexer.exchanges == {exchangeAddress: token.address}
+    names = [event[4] for event in indexer.events()]
+    assert names == ["TokenExchangeAdded", "Investment", "TokenPurchase"]
+    purchase = indexer.events(name = "TokenPurchase")[0]
+    assert purchase[2] == exchangeAddress and purchase[3] == token.address
+    assert purchase[5]["ethIn"] == 10**17
+
+def test_indexer_resume(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    startBlock = chain.height + 1
+    factory, token, exchangeAddress = setupExchange(account)
+    dbPath = str(tmp_path / "index.sqlite")
+    Indexer(factory.address, dbPath = dbPath, startBlock = startBlock).sync()
+    exchange = exchange_from_address(exchangeAddress)
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    # Act
+    indexer = Indexer(factory.address, dbPath = dbPath, startBlock = startBlock)
+    previousCheckpoint = indexer.checkpoint
+    indexer.sync()
+    # Assert
+    assert previousCheckpoint == chain.height - 1
+    assert indexer.exchanges == {exchangeAddress: token.address}
+    assert [event[4] for event in indexer.events()] == ["TokenExchangeAdded", "Investment"]
+
+def test_indexer_reorg(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    startBlock = chain.height + 1
+    factory, token, exchangeAddress = setupExchange(account)
+    exchange = exchange_from_address(exchangeAddress)
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    indexer = Indexer(factory.address, dbPath = str(tmp_path / "index.sqlite"), startBlock = startBlock)
+    indexer.sync()
+    # Act: replace the seeding block with a different one
+    chain.undo()
+    exchange.seedInvest(50*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    indexer.sync()
+    # Assert
+    investments = indexer.events(name = "Investment")
+    assert len(investments) == 1
+    assert investments[0][5]["tokensInvested"] == 50*10**18
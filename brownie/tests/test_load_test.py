@@ -0,0 +1,60 @@
+from scripts.load_test import percentile, summarize, compare_reports, run_load, default_config
+import pytest
+
+# All the load generator tests
+# - Percentiles use the nearest rank
+# - Summaries count reverts, TPS, gas and latency per operation
+# - Reports compare on the headline numbers and shared operations
+# - A small run trades on both venues and reports every operation
+
+def test_percentile():
+    values = list(range(100, 0, -1))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7], 90) == 7
+    assert percentile([], 50) == None
+
+def test_summarize():
+    # Arrange
+    samples = [
+        ("MiniSwap.ethToToken", 0.0, 0.010, 60000, False),
+        ("MiniSwap.ethToToken", 0.5, 0.530, 62000, False),
+        ("MiniSwap.divest", 1.0, 1.020, 30000, True),
+        ("MiniSwap.divest", 1.5, 1.540, None, True),
+    ]
+    # Act
+    report = summarize(samples, 2.0)
+    # Assert
+    assert report["ops"] == 4
+    assert report["reverted"] == 2
+    assert report["revertRate"] == 0.5
+    assert report["tps"] == 1.0
+    assert report["operations"]["MiniSwap.ethToToken"]["gasAvg"] == 61000
+    assert report["operations"]["MiniSwap.divest"]["gasAvg"] == None
+    assert report["operations"]["MiniSwap.divest"]["revertRate"] == 1.0
+    assert round(report["latencyMs"]["max"]) == 40
+
+def test_compare_reports():
+    # Arrange
+    old = summarize([("MiniSwap.invest", 0.0, 0.01, 90000, False)], 1.0)
+    new = summarize([("MiniSwap.invest", 0.0, 0.02, 80000, False), ("MiniSwap.divest", 0.0, 0.02, 50000, False)], 1.0)
+    # Act
+    rows = compare_reports(old, new)
+    # Assert
+    assert ("tps", 1.0, 2.0) in rows
+    assert ("MiniSwap.invest gas", 90000, 80000) in rows
+    assert all(not metric.startswith("MiniSwap.divest") for metric, _, _ in rows)
+
+def test_run_load_small():
+    # Arrange
+    config = default_config()
+    config.update({"traders": 3, "lps": 1, "exchanges": 2, "opsPerActor": 10})
+    # Act
+    report = run_load(config)
+    # Assert
+    assert report["ops"] == 40
+    assert report["tps"] > 0
+    assert report["revertRate"] < 1
+    assert any(name.startswith("MiniSwap.") for name in report["operations"])
+    assert any(name.startswith("AstroSwapExchange.") for name in report["operations"])
@@ -0,0 +1,195 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20
+from scripts.runMiniSwap import swap_instruction, ETH_TO_TOKEN, TOKEN_TO_ETH, TOKEN_TO_TOKEN
+from brownie import network, config, MiniSwap
+import pytest
+
+# All the MiniSwap tests
+# - Seeding creates the exchange for the token
+# - Seeding twice fails
+# - ethToToken pays out the quote
+# - tokenToEth pays out the quote
+# - tokenToToken moves both pools
+# - multiSwap gives the same outputs as the single swaps
+# - multiSwap nets the token transfers
+# - multiSwap fails when one leg is under its minOut
+# - multiSwap sends the leftover ETH to the recipient
+# - multiSwap refunds unspent msg.value to the sender
+# - tokenToEth and divest pay the ETH out
+# - getPoolState matches the exchanges getter
+
+fee = 400
+
+def setupMiniSwap(account):
+    miniSwap = MiniSwap.deploy(
+        fee,
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+    )
+    token = deploy_erc20()
+    token.approve(miniSwap.address, 10**27, {'from': account}).wait(1)
+    return miniSwap, token
+
+def test_miniswap_seed():
+    # Arrange
+    account = smart_get_account(1)
+    miniSwap, token = setupMiniSwap(account)
+    # Act
+    seedTx = miniSwap.seedInvest(token.address, 100*10**18, {'from': account, 'value': 1*10**18})
+    seedTx.wait(1)
+    # Assert
+    assert miniSwap.exchangeCount() == 1
+    assert miniSwap.exchanges(token.address) == (token.address, 1*10**18, 100*10**18, 10000)
+    assert miniSwap.getShares(token.address, account) == 10000
+
+def test_miniswap_seed_twice():
+    account = smart_get_account(1)
+    miniSwap, token = setupMiniSwap(account)
+    miniSwap.seedInvest(token.address, 100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    with pytest.raises(Exception):
+        miniSwap.seedInvest(token.address, 100*10**18, {'from': account, 'value': 1*10**18})
+
+def test_miniswap_ethToToken_quote(token, miniswap, account):
+    # Arrange
+    quote = miniswap.getEthToTokenQuote(token.address, 10**17)
+    # Act
+    buyTx = miniswap.ethToToken(token.address, account.address, quote, {'from': account, 'value': 10**17})
+    buyTx.wait(1)
+    # Assert
+    assert buyTx.events["TokenPurchase"]["tokensOut"] == quote
+    assert miniswap.exchanges(token.address)[2] == 100*10**18 - quote
+
+def test_miniswap_tokenToEth_quote(token, miniswap, account):
+    # Arrange
+    quote = miniswap.getTokenToEthQuote(token.address, 10**19)
+    # Act
+    sellTx = miniswap.tokenToEth(token.address, account.address, 10**19, quote, {'from': account})
+    sellTx.wait(1)
+    # Assert
+    assert sellTx.events["EthPurchase"]["ethOut"] == quote
+    assert miniswap.exchanges(token.address)[1] == 1*10**18 - quote
+
+def test_miniswap_tokenToToken(token, token2, miniswap, account):
+    # Arrange
+    ethTransfer = miniswap.getTokenToEthQuote(token.address, 10**19)
+    tokensOut = miniswap.getEthToTokenQuote(token2.address, ethTransfer)
+    # Act
+    tradeTx = miniswap.tokenToToken(token.address, account.address, token2.address, 10**19, tokensOut, {'from': account})
+    tradeTx.wait(1)
+    # Assert
+    assert tradeTx.return_value == tokensOut
+    assert miniswap.exchanges(token.address)[1] == 1*10**18 - ethTransfer
+    assert miniswap.exchanges(token2.address)[1] == 1*10**18 + ethTransfer
+    assert miniswap.exchanges(token2.address)[2] == 100*10**18 - tokensOut
+
+def setupTwoPools(account):
+    miniSwap, token1 = setupMiniSwap(account)
+    token2 = deploy_erc20()
+    token2.approve(miniSwap.address, 10**27, {'from': account}).wait(1)
+    miniSwap.seedInvest(token1.address, 100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    miniSwap.seedInvest(token2.address, 50*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    return miniSwap, token1, token2
+
+def test_miniswap_multiSwap_matches_single_swaps():
+    # Arrange
+    account = smart_get_account(1)
+    miniSwap, token1, token2 = setupTwoPools(account)
+    singleSwap, single1, single2 = setupTwoPools(account)
+    singleOut = [
+        singleSwap.ethToToken(single1.address, account.address, 0, {'from': account, 'value': 10**17}).return_value,
+        singleSwap.tokenToEth(single2.address, account.address, 10**19, 0, {'from': account}).return_value,
+        singleSwap.tokenToToken(single1.address, account.address, single2.address, 10**19, 0, {'from': account}).return_value
+    ]
+    legs = [
+        swap_instruction(ETH_TO_TOKEN, 10**17, tokenOut = token1.address),
+        swap_instruction(TOKEN_TO_ETH, 10**19, tokenIn = token2.address),
+        swap_instruction(TOKEN_TO_TOKEN, 10**19, tokenIn = token1.address, tokenOut = token2.address)
+    ]
+    # Act
+    swapTx = miniSwap.multiSwap(legs, account.address, {'from': account, 'value': 10**17})
+    swapTx.wait(1)
+    # Assert
+    assert list(swapTx.return_value) == singleOut
+    assert len(swapTx.events["TokenPurchase"]) == 1
+    assert len(swapTx.events["EthPurchase"]) == 1
+    assert len(swapTx.events["TokenToToken"]) == 1
+    for token, singleToken in ((token1, single1), (token2, single2)):
+        assert miniSwap.exchanges(token.address)[1:] == singleSwap.exchanges(singleToken.address)[1:]
+
+def test_miniswap_multiSwap_nets_transfers(token, token2, miniswap, account):
+    # Arrange
+    legs = [
+        swap_instruction(TOKEN_TO_ETH, 10**19, tokenIn = token.address),
+        swap_instruction(ETH_TO_TOKEN, 10**17, tokenOut = token.address)
+    ]
+    balance = token.balanceOf(account)
+    # Act
+    swapTx = miniswap.multiSwap(legs, account.address, {'from': account, 'value': 10**17})
+    swapTx.wait(1)
+    # Assert
+    assert len(swapTx.events["Transfer"]) == 1
+    assert token.balanceOf(account) == balance - 10**19 + swapTx.return_value[1]
+
+def test_miniswap_multiSwap_minOut(token, token2, miniswap, account):
+    quote = miniswap.getEthToTokenQuote(token.address, 10**17)
+    legs = [
+        swap_instruction(TOKEN_TO_ETH, 10**19, tokenIn = token2.address),
+        swap_instruction(ETH_TO_TOKEN, 10**17, tokenOut = token.address, minOut = quote + 1)
+    ]
+    with pytest.raises(Exception):
+        miniswap.multiSwap(legs, account.address, {'from': account, 'value': 10**17})
+
+def test_miniswap_multiSwap_leftover_eth(token, token2, miniswap, account):
+    # Arrange
+    recipient = smart_get_account(2)
+    ethOut = miniswap.getTokenToEthQuote(token.address, 10**19)
+    legs = [
+        swap_instruction(TOKEN_TO_ETH, 10**19, tokenIn = token.address),
+        swap_instruction(ETH_TO_TOKEN, ethOut // 2, tokenOut = token2.address)
+    ]
+    balance = recipient.balance()
+    # Act
+    swapTx = miniswap.multiSwap(legs, recipient.address, {'from': account})
+    swapTx.wait(1)
+    # Assert
+    assert recipient.balance() == balance + ethOut - ethOut // 2
+    assert token2.balanceOf(recipient) == swapTx.return_value[1]
+    assert miniswap.balance() == miniswap.exchanges(token.address)[1] + miniswap.exchanges(token2.address)[1]
+
+def test_miniswap_multiSwap_refund(token, miniswap, account):
+    # Arrange
+    recipient = smart_get_account(2)
+    legs = [swap_instruction(ETH_TO_TOKEN, 10**17, tokenOut = token.address)]
+    balance = account.balance()
+    recipientBalance = recipient.balance()
+    # Act
+    swapTx = miniswap.multiSwap(legs, recipient.address, {'from': account, 'value': 3*10**17, 'gas_price': 0})
+    swapTx.wait(1)
+    # Assert
+    assert account.balance() == balance - 10**17
+    assert recipient.balance() == recipientBalance
+    assert token.balanceOf(recipient) == swapTx.return_value[0]
+
+def test_miniswap_eth_paid_out(token, miniswap, account):
+    # Arrange
+    recipient = smart_get_account(2)
+    balance = recipient.balance()
+    # Act
+    sellTx = miniswap.tokenToEth(token.address, recipient.address, 10**19, 0, {'from': account})
+    sellTx.wait(1)
+    accountBalance = account.balance()
+    divestTx = miniswap.divest(token.address, 5000, {'from': account, 'gas_price': 0})
+    divestTx.wait(1)
+    # Assert
+    assert recipient.balance() == balance + sellTx.events["EthPurchase"]["ethOut"]
+    assert account.balance() == accountBalance + divestTx.events["Divestment"]["ethDivested"]
+
+def test_miniswap_pool_state(token, miniswap, account):
+    # Arrange
+    miniswap.ethToToken(token.address, account.address, 0, {'from': account, 'value': 10**17}).wait(1)
+    # Act
+    ethPool, tokenPool, invariant, feeRate, totalShares = miniswap.getPoolState(token.address)
+    # Assert
+    assert (ethPool, tokenPool, totalShares) == tuple(miniswap.exchanges(token.address)[1:])
+    assert invariant == ethPool * tokenPool
+    assert feeRate == miniswap.feeRate()
@@ -0,0 +1,98 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20, exchange_from_address
+from scripts.multicall import deploy_multicall, Multicall, exchange_snapshot, factory_snapshot
+from brownie import network, config, AstroSwapFactory
+import pytest
+
+# All the multicall tests
+# - Snapshot of seeded and unseeded exchanges matches the single reads
+# - Factory snapshot skips tokens without an exchange
+# - Factory snapshot without tokens reads every listed exchange
+# - A failing call reverts aggregate
+# - A failing call is None with allowFailure
+
+fee = 400
+
+def setupFactory(tokenCount, account):
+    factory = AstroSwapFactory.deploy(
+        fee,
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+    )
+    tokens = []
+    exchanges = []
+    for i in range(tokenCount):
+        token = deploy_erc20()
+        forgeTx = factory.addTokenExchange(token.address, {'from': account})
+        forgeTx.wait(1)
+        tokens.append(token)
+        exchanges.append(exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"]))
+    return factory, tokens, exchanges
+
+def test_exchange_snapshot():
+    # Arrange
+    account = smart_get_account(1)
+    multicall = deploy_multicall()
+    factory, tokens, exchanges = setupFactory(2, account)
+    tokens[0].approve(exchanges[0].address, 100*10**18, {'from': account}).wait(1)
+    exchanges[0].seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    # Act
+    snapshot, blockNumber = exchange_snapshot([exchange.address for exchange in exchanges], multicall)
+    # Assert
+    assert blockNumber > 0
+    for exchange in exchanges:
+        state = snapshot[exchange.address]
+        assert state["token"] == exchange.token()
+        assert state["feeAmmount"] == exchange.feeAmmount()
+        assert state["ethPool"] == exchange.ethPool()
+        assert state["tokenPool"] == exchange.tokenPool()
+        assert state["invariant"] == exchange.invariant()
+        assert state["totalShares"] == exchange.totalShares()
+    assert snapshot[exchanges[0].address]["ethPool"] == 1*10**18
+
+def test_factory_snapshot_skips_unlisted():
+    # Arrange
+    account = smart_get_account(1)
+    multicall = deploy_multicall()
+    factory, tokens, exchanges = setupFactory(2, account)
+    unlisted = deploy_erc20()
+    # Act
+    snapshot, blockNumber = factory_snapshot(factory, [tokens[0].address, unlisted.address, tokens[1].address], multicall)
+    # Assert
+    assert list(snapshot) == [exchanges[0].address, exchanges[1].address]
+
+def test_factory_snapshot_all():
+    # Arrange
+    account = smart_get_account(1)
+    multicall = deploy_multicall()
+    factory, tokens, exchanges = setupFactory(3, account)
+    # Act
+    snapshot, blockNumber = factory_snapshot(factory, aggregator = multicall)
+    # Assert
+    assert list(snapshot) == [exchange.address for exchange in exchanges]
+    assert [state["token"] for state in snapshot.values()] == [token.address for token in tokens]
+
+def test_aggregate_failing_call():
+    # Arrange
+    account = smart_get_account(1)
+    multicall = deploy_multicall()
+    factory, tokens, exchanges = setupFactory(1, account)
+    calls = Multicall(multicall)
+    calls.add(exchanges[0].ethPool)
+    calls.add(exchanges[0].getEthToTokenQuote, 10**18) # Unseeded, underflows
+    # Act & Assert
+    with pytest.raises(Exception):
+        calls.call()
+
+def test_try_aggregate_failing_call():
+    # Arrange
+    account = smart_get_account(1)
+    multicall = deploy_multicall()
+    factory, tokens, exchanges = setupFactory(1, account)
+    calls = Multicall(multicall)
+    calls.add(exchanges[0].ethPool)
+    calls.add(exchanges[0].getEthToTokenQuote, 10**18)
+    # Act
+    results = calls.call(allowFailure = True)
+    # Assert
+    assert results == [0, None]
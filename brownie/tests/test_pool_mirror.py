@@ -0,0 +1,103 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20, exchange_from_address
+from scripts.multicall import deploy_multicall
+from scripts.indexer import Indexer
+from scripts.pool_mirror import PoolMirror
+from brownie import network, config, chain, AstroSwapFactory, MiniSwap
+
+# All the pool mirror tests
+# - Trades, investments and divestments after the snapshot are mirrored exactly
+# - Exchanges added after the snapshot are picked up
+# - A drifted pool is caught by verify and replaced
+# - MiniSwap pools seeded before the load are found from the index
+
+fee = 400
+
+def setupMirror(tmp_path, account):
+    multicall = deploy_multicall()
+    startBlock = chain.height + 1
+    factory = AstroSwapFactory.deploy(
+        fee,
+        {'from': account},
+        publish_source = config["networks"][network.show_active()].get("verify", False)
+    )
+    token = deploy_erc20()
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
+    forgeTx.wait(1)
+    exchange = exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"])
+    token.approve(exchange.address, 1000*10**18, {'from': account}).wait(1)
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    indexer = Indexer(factory.address, dbPath = str(tmp_path / "index.sqlite"), startBlock = startBlock)
+    mirror = PoolMirror(indexer, aggregator = multicall, checkInterval = 0)
+    mirror.load()
+    return mirror, factory, token, exchange
+
+def assertMirrored(mirror, exchange):
+    pool = mirror.pools[exchange.address]
+    assert pool.ethPool == exchange.ethPool()
+    assert pool.tokenPool == exchange.tokenPool()
+    assert pool.invariant == exchange.invariant()
+    assert pool.totalShares == exchange.totalShares()
+
+def test_pool_mirror_follows_events(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    mirror, factory, token, exchange = setupMirror(tmp_path, account)
+    # Act
+    exchange.ethToToken(account.address, 0, {'from': account, 'value': 12345678901234567}).wait(1)
+    exchange.tokenToEth(account.address, 3*10**18, 0, {'from': account}).wait(1)
+    exchange.invest(10**22, {'from': account, 'value': 10**17}).wait(1)
+    exchange.divest(1234, {'from': account}).wait(1)
+    mirror.update()
+    # Assert
+    assert mirror.drift == []
+    assertMirrored(mirror, exchange)
+    assert mirror.verify() == []
+
+def test_pool_mirror_new_exchange(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    mirror, factory, token, exchange = setupMirror(tmp_path, account)
+    token2 = deploy_erc20()
+    # Act
+    forgeTx = factory.addTokenExchange(token2.address, {'from': account})
+    forgeTx.wait(1)
+    exchange2 = exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"])
+    token2.approve(exchange2.address, 100*10**18, {'from': account}).wait(1)
+    exchange2.seedInvest(100*10**18, {'from': account, 'value': 2*10**18}).wait(1)
+    exchange2.ethToToken(account.address, 0, {'from': account, 'value': 10**17}).wait(1)
+    mirror.update()
+    # Assert
+    assert mirror.drift == []
+    assertMirrored(mirror, exchange2)
+
+def test_pool_mirror_verify_catches_drift(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    mirror, factory, token, exchange = setupMirror(tmp_path, account)
+    mirror.pools[exchange.address].ethPool += 1
+    # Act
+    drifted = mirror.verify()
+    # Assert
+    assert drifted == [exchange.address]
+    assertMirrored(mirror, exchange)
+
+def test_pool_mirror_miniswap_tokens(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    multicall = deploy_multicall()
+    startBlock = chain.height + 1
+    factory = AstroSwapFactory.deploy(fee, {'from': account})
+    miniSwap = MiniSwap.deploy(fee, {'from': account})
+    token = deploy_erc20()
+    token.approve(miniSwap.address, 1000*10**18, {'from': account}).wait(1)
+    miniSwap.seedInvest(token.address, 100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    miniSwap.ethToToken(token.address, account.address, 0, {'from': account, 'value': 10**17}).wait(1)
+    indexer = Indexer(factory.address, [miniSwap.address], dbPath = str(tmp_path / "index.sqlite"), startBlock = startBlock)
+    mirror = PoolMirror(indexer, aggregator = multicall, checkInterval = 0)
+    # Act
+    mirror.load()
+    # Assert
+    pool = mirror.pools[(miniSwap.address, token.address)]
+    assert (pool.ethPool, pool.tokenPool, pool.totalShares) == tuple(miniSwap.exchanges(token.address)[1:])
+    assert mirror.verify() == []
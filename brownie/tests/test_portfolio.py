@@ -0,0 +1,85 @@
+from scripts.helpers import smart_get_account
+from scripts.runAstroSwap import deploy_erc20, exchange_from_address
+from scripts.indexer import Indexer
+from scripts.portfolio import PositionBook, value_positions, by_investor, build_portfolio
+from scripts.amm import Pool
+from brownie import network, config, chain, AstroSwapFactory
+
+# All the LP portfolio tests
+# - A position in an untraded pool has no fees and no impermanent loss
+# - Trades grow the fees, a moved price shows an impermanent loss
+# - Divesting removes its share of the invested amounts
+# - Positions built from the indexed history value like divest on chain
+
+fee = 400
+
+def seededPool():
+    pool = Pool(fee)
+    pool.seed_invest("lp", 10**18, 100*10**18)
+    book = PositionBook()
+    book.invest("pool", "lp", 10000, 10**18, 100*10**18, pool)
+    return pool, book
+
+def test_portfolio_untraded():
+    # Arrange
+    pool, book = seededPool()
+    # Act
+    row = value_positions(book.positions, {"pool": pool})[0]
+    # Assert
+    assert (row["ethOut"], row["tokensOut"]) == (10**18, 100*10**18)
+    assert row["valueEth"] == 2*10**18
+    assert row["feesEth"] == 0
+    assert row["impermanentLossEth"] == 0
+
+def test_portfolio_fees_and_loss():
+    # Arrange
+    pool, book = seededPool()
+    # Act
+    for i in range(20):
+        pool.eth_to_token(10**17)
+        pool.token_to_eth(9*10**18)
+    pool.eth_to_token(5*10**17)
+    row = value_positions(book.positions, {"pool": pool})[0]
+    # Assert
+    assert row["feesEth"] > 0
+    assert row["impermanentLossEth"] < 0
+    assert row["valueEth"] == row["hodlEth"] + row["feesEth"] + row["impermanentLossEth"]
+
+def test_portfolio_divest():
+    # Arrange
+    pool, book = seededPool()
+    # Act
+    pool.divest("lp", 2500)
+    book.divest("pool", "lp", 2500)
+    rows = value_positions(book.positions, {"pool": pool})
+    # Assert
+    assert book.positions[("pool", "lp")] == [7500, 75*10**16, 75*10**18, 7500 * 10**33]
+    assert by_investor(rows)["lp"]["valueEth"] == 15*10**17
+
+def test_portfolio_from_index(tmp_path):
+    # Arrange
+    account = smart_get_account(1)
+    investor = smart_get_account(2)
+    startBlock = chain.height + 1
+    factory = AstroSwapFactory.deploy(fee, {'from': account}, publish_source = config["networks"][network.show_active()].get("verify", False))
+    token = deploy_erc20()
+    forgeTx = factory.addTokenExchange(token.address, {'from': account})
+    exchange = exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"])
+    token.transfer(investor, 100*10**18, {'from': account}).wait(1)
+    token.approve(exchange.address, 1000*10**18, {'from': account}).wait(1)
+    token.approve(exchange.address, 100*10**18, {'from': investor}).wait(1)
+    exchange.seedInvest(100*10**18, {'from': account, 'value': 1*10**18}).wait(1)
+    exchange.invest(10**22, {'from': investor, 'value': 2*10**17}).wait(1)
+    exchange.ethToToken(account.address, 0, {'from': account, 'value': 10**17}).wait(1)
+    exchange.tokenToEth(account.address, 5*10**18, 0, {'from': account}).wait(1)
+    exchange.divest(1000, {'from': investor}).wait(1)
+    # Act
+    rows, mirror = build_portfolio(Indexer(factory.address, dbPath = str(tmp_path / "index.sqlite"), startBlock = startBlock))
+    # Assert
+    assert len(rows) == 2
+    for row in rows:
+        shares = exchange.getShares(row["investor"])
+        assert row["shares"] == shares
+        assert row["ethOut"] == exchange.ethPool() * shares // exchange.totalShares()
+        assert row["tokensOut"] == exchange.tokenPool() * shares // exchange.totalShares()
+        assert row["feesEth"] > 0
@@ -0,0 +1,80 @@
+from scripts.quote_cache import QuoteCache
+from collections import namedtuple
+import pytest
+
+# All the quote cache tests
+# - Repeated quotes in one block only call the exchange once
+# - A new block drops the old quotes
+# - Pool moving events drop the exchange's quotes
+# - Events from other exchanges keep the quotes
+# - Least recently used quotes are evicted first
+# - Non quote functions are refused
+
+Event = namedtuple("Event", ["address", "name"])
+
+class FakeExchange:
+    def __init__(self, address):
+        self.address = address
+        self.calls = 0
+
+    def getEthToTokenQuote(self, ethValue, block_identifier=None):
+        self.calls += 1
+        return ethValue * 2
+
+    def getTokenToTokenQuote(self, tokenValue, tokenOutAddress, block_identifier=None):
+        self.calls += 1
+        return tokenValue * 3
+
+def test_quote_cache_same_block():
+    # Arrange
+    cache = QuoteCache(block=1)
+    exchange = FakeExchange("0x1")
+    # Act
+    quotes = [cache.quote(exchange, "getEthToTokenQuote", 10) for _ in range(5)]
+    # Assert
+    assert quotes == [20] * 5
+    assert exchange.calls == 1
+    assert cache.hits == 4 and cache.misses == 1
+
+def test_quote_cache_new_block():
+    cache = QuoteCache(block=1)
+    exchange = FakeExchange("0x1")
+    cache.quote(exchange, "getEthToTokenQuote", 10)
+    cache.set_block(2)
+    assert len(cache.entries) == 0
+    cache.quote(exchange, "getEthToTokenQuote", 10)
+    assert exchange.calls == 2
+
+def test_quote_cache_event_invalidation():
+    # Arrange
+    cache = QuoteCache(block=1)
+    exchange1 = FakeExchange("0x1")
+    exchange2 = FakeExchange("0x2")
+    cache.quote(exchange1, "getEthToTokenQuote", 10)
+    cache.quote(exchange2, "getEthToTokenQuote", 10)
+    cache.quote(exchange2, "getTokenToTokenQuote", 10, "0xtoken")
+    # Act
+    cache.handle_events([Event("0x1", "TokenPurchase"), Event("0x2", "Transfer")])
+    # Assert
+    cache.quote(exchange1, "getEthToTokenQuote", 10)
+    cache.quote(exchange2, "getEthToTokenQuote", 10)
+    assert exchange1.calls == 2
+    assert exchange2.calls == 2
+    # The tokenToToken quote could read exchange1 so it had to go too
+    cache.quote(exchange2, "getTokenToTokenQuote", 10, "0xtoken")
+    assert exchange2.calls == 3
+
+def test_quote_cache_lru_eviction():
+    cache = QuoteCache(maxSize=2, block=1)
+    exchange = FakeExchange("0x1")
+    cache.quote(exchange, "getEthToTokenQuote", 1)
+    cache.quote(exchange, "getEthToTokenQuote", 2)
+    cache.quote(exchange, "getEthToTokenQuote", 1) # 1 is now the most recent
+    cache.quote(exchange, "getEthToTokenQuote", 3) # evicts 2
+    assert [key[2] for key in cache.entries] == [(1,), (3,)]
+    assert cache.byExchange["0x1"] == set(cache.entries)
+
+def test_quote_cache_rejects_other_functions():
+    cache = QuoteCache(block=1)
+    with pytest.raises(ValueError):
+        cache.quote(FakeExchange("0x1"), "ethToToken", 1)
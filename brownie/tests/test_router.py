@@ -0,0 +1,56 @@
+from scripts.router import split_amount, route_eth_to_token, route_token_to_eth, route_token_to_token
+from scripts.amm import Pool, swap_output, token_to_token
+
+# All the router tests
+# - The split beats every single pool and a brute force grid
+# - The split spends exactly the input
+# - Tiny trades still find a pool
+# - Empty pools get nothing
+# - tokenToToken routes both hops and matches the single path when there is one pool per side
+
+fee = 400
+
+def test_split_beats_grid():
+    # Arrange
+    reserves = [(10**18, 100*10**18, 400), (3*10**18, 290*10**18, 300)]
+    amount = 10**18
+    # Act
+    total, amounts = split_amount(reserves, amount)
+    # Assert
+    assert sum(amounts) == amount
+    for i in range(0, 101):
+        a = amount * i // 100
+        b = amount - a
+        grid = (swap_output(*reserves[0][:2], a, 400) if a else 0) + (swap_output(*reserves[1][:2], b, 300) if b else 0)
+        assert total >= grid
+
+def test_split_tiny_trade():
+    total, amounts = split_amount([(10**18, 10**20, fee), (10**18, 2*10**20, fee)], 1)
+    assert amounts == [0, 1]
+    assert total == swap_output(10**18, 2*10**20, 1, fee)
+
+def test_route_skips_empty_pools():
+    # Arrange
+    pools = [Pool(fee), Pool(fee, 10**18, 100*10**18)]
+    # Act
+    tokensOut, legs = route_eth_to_token(pools, 10**17)
+    # Assert
+    assert len(legs) == 1 and legs[0][0] is pools[1]
+    assert tokensOut == swap_output(10**18, 100*10**18, 10**17, fee)
+
+def test_route_legs_add_up():
+    pools = [Pool(fee, 10**18, 100*10**18), Pool(fee, 2*10**18, 150*10**18), Pool(fee, 10**17, 10**19)]
+    ethOut, legs = route_token_to_eth(pools, 50*10**18)
+    assert sum(leg[1] for leg in legs) == 50*10**18
+    assert sum(leg[2] for leg in legs) == ethOut
+    assert ethOut >= max(swap_output(pool.tokenPool, pool.ethPool, 50*10**18, fee) for pool in pools)
+
+def test_route_token_to_token_single_path():
+    # Arrange
+    fromPool = Pool(fee, 10**18, 100*10**18)
+    toPool = Pool(fee, 2*10**18, 50*10**18)
+    # Act
+    tokensOut, sellLegs, buyLegs = route_token_to_token([fromPool], [toPool], 10**19)
+    # Assert
+    assert tokensOut == token_to_token((10**18, 100*10**18), (2*10**18, 50*10**18), 10**19, fee, fee)[0]
+    assert sellLegs[0][2] == buyLegs[0][1]
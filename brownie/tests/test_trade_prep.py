@@ -0,0 +1,64 @@
+from scripts.trade_prep import apply_slippage, prepare_eth_to_token, prepare_token_to_eth, prepare_token_to_token, TradePreparer
+from scripts.amm import Pool, SwapReverted, swap_output
+import pytest
+
+# All the trade preparation tests (no chain needed)
+# - Slippage is taken in basis points and rounds down
+# - Each trade is priced with the exact contract math
+# - tokenToToken takes the fee of both pools
+# - Trades that would revert raise before anything is sent
+# - advance moves the cached pools so back to back trades are priced in order
+
+fee = 400
+
+def test_apply_slippage():
+    assert apply_slippage(10000, 50) == 9950
+    assert apply_slippage(199, 50) == 198
+    assert apply_slippage(123, 0) == 123
+    assert apply_slippage(123, 10000) == 0
+    with pytest.raises(ValueError):
+        apply_slippage(100, 10001)
+
+def test_prepare_single_hops():
+    # Arrange
+    pool = Pool(fee, 10**18, 100*10**18)
+    # Act
+    tokensOut, minTokens = prepare_eth_to_token(pool, 10**17, 100)
+    ethOut, minEth = prepare_token_to_eth(pool, 10**19, 100)
+    # Assert
+    assert tokensOut == swap_output(10**18, 100*10**18, 10**17, fee)
+    assert minTokens == tokensOut * 9900 // 10000
+    assert ethOut == swap_output(100*10**18, 10**18, 10**19, fee)
+    assert minEth == ethOut * 9900 // 10000
+    assert (pool.ethPool, pool.tokenPool) == (10**18, 100*10**18)
+
+def test_prepare_token_to_token_two_fees():
+    # Arrange
+    fromPool = Pool(fee, 10**18, 100*10**18)
+    toPool = Pool(1000, 2*10**18, 50*10**18)
+    # Act
+    tokensOut, minOut = prepare_token_to_token(fromPool, toPool, 10**19)
+    # Assert
+    ethTransfer = swap_output(100*10**18, 10**18, 10**19, fee)
+    assert tokensOut == swap_output(2*10**18, 50*10**18, ethTransfer, 1000)
+    assert minOut == tokensOut * 9950 // 10000
+
+def test_prepare_reverting_trade():
+    with pytest.raises(SwapReverted):
+        prepare_eth_to_token(Pool(fee), 10**18)
+    with pytest.raises(SwapReverted):
+        prepare_token_to_token(Pool(fee, 10**18, 100*10**18), Pool(fee, 10**18, 100*10**18), 1)
+
+def test_preparer_advance():
+    # Arrange
+    preparer = TradePreparer({"a": Pool(fee, 10**18, 100*10**18), "b": Pool(fee, 10**18, 100*10**18)}, slippageBps = 30)
+    # Act
+    first, _ = preparer.eth_to_token("a", 10**17, advance = True)
+    second, _ = preparer.eth_to_token("a", 10**17)
+    third, _ = preparer.eth_to_token("a", 10**17)
+    preparer.token_to_token("a", "b", 10**19, advance = True)
+    # Assert
+    assert second < first
+    assert third == second
+    assert preparer.pools["a"].ethPool == 11*10**17 - swap_output(100*10**18 - first, 11*10**17, 10**19, fee)
+    assert preparer.pools["b"].ethPool > 10**18
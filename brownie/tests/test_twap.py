@@ -0,0 +1,91 @@
+from scripts.twap import read_cumulatives, read_many, twap, twap_fixed, Q112
+from scripts.multicall import deploy_multicall
+from brownie import chain, AstroSwapExchange, MockERC20Supply
+import pytest
+
+# All the TWAP accumulator tests
+# - An untraded pool's TWAP is its price
+# - A trade weights the old and new prices by how long they held
+# - MiniSwap pools keep their own accumulators
+# - Accumulators of many exchanges come back from one multicall
+# - Wrapped accumulators still give the right average
+# - Pools stop at uint112 and the price is still exact at the cap
+
+def test_twap_constant_price(seeded_exchange):
+    # Arrange
+    first = read_cumulatives(seeded_exchange)
+    # Act
+    chain.sleep(100)
+    chain.mine()
+    second = read_cumulatives(seeded_exchange)
+    # Assert
+    assert twap_fixed(first, second) == ((100*10**18 << 112) // 10**18, (10**18 << 112) // (100*10**18))
+    assert twap(first, second)[0] == pytest.approx(100)
+
+def test_twap_weights_prices(seeded_exchange, token, account):
+    # Arrange
+    first = read_cumulatives(seeded_exchange)
+    oldPrice = (seeded_exchange.tokenPool() << 112) // seeded_exchange.ethPool()
+    # Act
+    chain.sleep(100)
+    tx = seeded_exchange.ethToToken(account.address, 0, {'from': account, 'value': 10**18})
+    newPrice = (seeded_exchange.tokenPool() << 112) // seeded_exchange.ethPool()
+    chain.sleep(300)
+    chain.mine()
+    second = read_cumulatives(seeded_exchange)
+    # Assert
+    swapTime = chain[tx.block_number].timestamp
+    expected = (oldPrice * (swapTime - first[2]) + newPrice * (second[2] - swapTime)) // (second[2] - first[2])
+    assert twap_fixed(first, second)[0] == expected
+    assert seeded_exchange.priceTimestamp() == swapTime
+
+def test_twap_miniswap(miniswap, token, token2, account):
+    # Arrange
+    first = read_cumulatives(miniswap, token.address)
+    untouched = read_cumulatives(miniswap, token2.address)
+    # Act
+    chain.sleep(100)
+    miniswap.ethToToken(token.address, account.address, 0, {'from': account, 'value': 10**18})
+    chain.sleep(100)
+    chain.mine()
+    second = read_cumulatives(miniswap, token.address)
+    secondUntouched = read_cumulatives(miniswap, token2.address)
+    # Assert
+    assert twap(first, second)[0] < 100
+    assert twap(untouched, secondUntouched)[0] == pytest.approx(100)
+
+def test_twap_multicall(seeded_factory_pair):
+    # Arrange
+    factory, exchange1, exchange2 = seeded_factory_pair
+    aggregator = deploy_multicall()
+    # Act
+    reads = read_many([exchange1.address, exchange2.address], aggregator = aggregator)
+    # Assert
+    assert reads[exchange1.address] == read_cumulatives(exchange1)
+    assert reads[exchange2.address] == read_cumulatives(exchange2)
+
+def test_twap_wraps():
+    first = (2**256 - 50 * Q112, 0, 1000)
+    second = (50 * Q112, 10 * Q112, 1010)
+    assert twap(first, second) == (10, 1)
+
+def test_twap_reserve_cap(account):
+    # Arrange
+    maxReserve = 2**112 - 1
+    bigToken = MockERC20Supply.deploy("big", 2**113, {'from': account})
+    exchange = AstroSwapExchange.deploy(bigToken.address, 400, {'from': account})
+    bigToken.approve(exchange.address, 2**113, {'from': account}).wait(1)
+    with pytest.raises(Exception):
+        exchange.seedInvest(maxReserve + 1, {'from': account, 'value': 10**18})
+    exchange.seedInvest(maxReserve - 10**18, {'from': account, 'value': 10**18}).wait(1)
+    # Act
+    with pytest.raises(Exception):
+        exchange.tokenToEth(account.address, 10**18 + 1, 0, {'from': account})
+    exchange.tokenToEth(account.address, 10**18, 0, {'from': account}).wait(1)
+    first = read_cumulatives(exchange)
+    chain.sleep(100)
+    chain.mine()
+    second = read_cumulatives(exchange)
+    # Assert
+    assert exchange.tokenPool() == maxReserve
+    assert twap_fixed(first, second)[0] == (maxReserve << 112) // exchange.ethPool()
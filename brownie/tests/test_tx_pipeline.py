@@ -0,0 +1,74 @@
+from scripts.tx_pipeline import TxPipeline
+from scripts.confirmations import ConfirmationManager, ConfirmationTimeout
+from threading import Event
+from types import SimpleNamespace
+from scripts.runAstroSwap import exchange_from_address
+from brownie import AstroSwapFactory, MockERC20
+import pytest
+
+# All the transaction pipeline tests
+# - Independent transactions get consecutive nonces without waiting
+# - Deferred transactions get the receipts of the ones they wait for
+# - An approve then seedInvest pair lands in order without waiting on each other
+# - A failed transaction skips the ones waiting for it and run fails
+# - A receipt brownie never fills in times out instead of hanging the pipeline
+
+def test_pipeline_nonces(account):
+    # Arrange
+    nonce = account.nonce
+    pipeline = TxPipeline(account)
+    # Act
+    steps = [pipeline.add(MockERC20.deploy, str(i)) for i in range(3)]
+    pipeline.run()
+    pipeline.close()
+    # Assert
+    assert [step.tx.nonce for step in steps] == [nonce, nonce + 1, nonce + 2]
+    assert all(step.confirmed for step in steps)
+    assert account.nonce == nonce + 3
+
+def test_pipeline_deferred(token, account):
+    # Arrange
+    pipeline = TxPipeline(account)
+    factory = pipeline.add(AstroSwapFactory.deploy, 400)
+    # Act
+    forge = pipeline.add_deferred(lambda factoryTx: (AstroSwapFactory.at(factoryTx.contract_address).addTokenExchange, (token.address,)), after = [factory])
+    pipeline.run()
+    pipeline.close()
+    # Assert
+    assert AstroSwapFactory.at(factory.tx.contract_address).convertTokenToExchange(token.address) == forge.tx.events["TokenExchangeAdded"][0]["tokenExchange"]
+
+def test_pipeline_ordered(token, exchange, account):
+    # Arrange
+    pipeline = TxPipeline(account)
+    # Act
+    pipeline.add(token.approve, exchange.address, 100*10**18)
+    seed = pipeline.add(exchange.seedInvest, 100*10**18, value = 1*10**18, gasLimit = 500000)
+    pipeline.run()
+    pipeline.close()
+    # Assert
+    assert seed.confirmed
+    assert exchange.ethPool() == 1*10**18
+    assert exchange.tokenPool() == 100*10**18
+
+def test_pipeline_failed_dependency(token, factory, account):
+    # Arrange
+    factory.addTokenExchange(token.address, {'from': account}).wait(1)
+    pipeline = TxPipeline(account)
+    # Act
+    forge = pipeline.add(factory.addTokenExchange, token.address, gasLimit = 500000) # Allready added, reverts
+    seed = pipeline.add_deferred(lambda forgeTx: (exchange_from_address(forgeTx.events["TokenExchangeAdded"][0]["tokenExchange"]).seedInvest, (100,)), after = [forge], value = 100)
+    # Assert
+    with pytest.raises(Exception):
+        pipeline.run()
+    pipeline.close()
+    assert forge.failed
+    assert seed.skipped
+
+def test_pipeline_settle_timeout(account):
+    # Arrange
+    pipeline = TxPipeline(account, manager = ConfirmationManager(timeout = 0.1))
+    stuck = SimpleNamespace(txid = "0x01", status = -1, _confirmed = Event())
+    # Act & Assert
+    with pytest.raises(ConfirmationTimeout):
+        pipeline._settled(stuck)
+    pipeline.close()
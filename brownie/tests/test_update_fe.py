@@ -0,0 +1,67 @@
+from scripts.update_fe import sync_artifacts, write_if_changed, MANIFEST_NAME
+import json
+import os
+
+# All the front end sync tests (no chain needed)
+# - Artifacts are cut down to the ABI and bytecode, other files are copied as is
+# - A second sync with no changes writes nothing
+# - Only the changed artifact is written again, deleted ones are removed
+# - config.json is only rewritten when it changes
+
+def writeJson(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+def readJson(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def makeBuild(tmp_path):
+    build = str(tmp_path / "build")
+    writeJson(os.path.join(build, "contracts", "MiniSwap.json"), {"contractName": "MiniSwap", "abi": [], "bytecode": "0x60", "ast": {"big": True}, "source": "contract MiniSwap {}"})
+    writeJson(os.path.join(build, "contracts", "MockERC20.json"), {"contractName": "MockERC20", "abi": [], "bytecode": "0x61", "ast": {}})
+    writeJson(os.path.join(build, "deployments", "map.json"), {"1337": {"MiniSwap": ["0x01"]}})
+    return build, str(tmp_path / "chain-info")
+
+def test_sync_strips_artifacts(tmp_path):
+    # Arrange
+    build, dest = makeBuild(tmp_path)
+    # Act
+    written, removed = sync_artifacts(build, dest)
+    # Assert
+    assert (written, removed) == (3, 0)
+    assert readJson(os.path.join(dest, "contracts", "MiniSwap.json")) == {"contractName": "MiniSwap", "abi": [], "bytecode": "0x60"}
+    assert readJson(os.path.join(dest, "deployments", "map.json")) == {"1337": {"MiniSwap": ["0x01"]}}
+    assert os.path.exists(os.path.join(dest, MANIFEST_NAME))
+
+def test_sync_unchanged(tmp_path):
+    # Arrange
+    build, dest = makeBuild(tmp_path)
+    sync_artifacts(build, dest)
+    manifestTime = os.stat(os.path.join(dest, MANIFEST_NAME)).st_mtime_ns
+    # Act
+    written, removed = sync_artifacts(build, dest)
+    # Assert
+    assert (written, removed) == (0, 0)
+    assert os.stat(os.path.join(dest, MANIFEST_NAME)).st_mtime_ns == manifestTime
+
+def test_sync_changed_and_removed(tmp_path):
+    # Arrange
+    build, dest = makeBuild(tmp_path)
+    sync_artifacts(build, dest)
+    # Act
+    writeJson(os.path.join(build, "contracts", "MiniSwap.json"), {"contractName": "MiniSwap", "abi": [{"name": "x"}], "bytecode": "0x62"})
+    os.remove(os.path.join(build, "contracts", "MockERC20.json"))
+    written, removed = sync_artifacts(build, dest)
+    # Assert
+    assert (written, removed) == (1, 1)
+    assert readJson(os.path.join(dest, "contracts", "MiniSwap.json"))["bytecode"] == "0x62"
+    assert not os.path.exists(os.path.join(dest, "contracts", "MockERC20.json"))
+    assert [name for name in os.listdir(os.path.join(dest, "contracts")) if name.endswith(".tmp")] == []
+
+def test_write_if_changed(tmp_path):
+    path = str(tmp_path / "config.json")
+    assert write_if_changed(path, b"{}")
+    assert not write_if_changed(path, b"{}")
+    assert write_if_changed(path, b"{\"a\": 1}")